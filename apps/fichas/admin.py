@@ -1,8 +1,9 @@
 from django.contrib import admin
 from .models import (
     Institucion, Dimension, Pregunta, Opcion, 
-    FichaEvaluacion, FamiliarDelEvaluado, FichaDetalle, FichaHistorial
+    FichaEvaluacion, FamiliarDelEvaluado, FichaDetalle, FichaHistorial, CambioFicha
 )
+from .catalogo import invalidar_catalogo
 
 # =======================================================
 # 1. CONFIGURACIÓN DE MAESTROS
@@ -14,18 +15,32 @@ class InstitucionAdmin(admin.ModelAdmin):
     search_fields = ('nombre', 'codigo_modular')
     list_filter = ('fecha_registro',)
 
+class InvalidaCatalogoMixin:
+    """Los cambios hechos desde el admin también invalidan el catálogo en memoria."""
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        invalidar_catalogo()
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        invalidar_catalogo()
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        invalidar_catalogo()
+
 class OpcionInline(admin.TabularInline):
     model = Opcion
     extra = 0
     min_num = 2  # Obliga a tener al menos 2 opciones
 
 @admin.register(Dimension)
-class DimensionAdmin(admin.ModelAdmin):
+class DimensionAdmin(InvalidaCatalogoMixin, admin.ModelAdmin):
     list_display = ('nombre', 'orden', 'descripcion')
     ordering = ('orden',)
 
 @admin.register(Pregunta)
-class PreguntaAdmin(admin.ModelAdmin):
+class PreguntaAdmin(InvalidaCatalogoMixin, admin.ModelAdmin):
     inlines = [OpcionInline]
     list_display = ('orden', 'enunciado_corto', 'dimension')
     list_filter = ('dimension',)
@@ -176,4 +191,9 @@ class FichaEvaluacionAdmin(admin.ModelAdmin):
 @admin.register(FichaHistorial)
 class FichaHistorialAdmin(admin.ModelAdmin):
     list_display = ('ficha', 'usuario', 'fecha_edicion', 'accion')
-    list_filter = ('fecha_edicion', 'usuario')
\ No newline at end of file
+    list_filter = ('fecha_edicion', 'usuario')
+@admin.register(CambioFicha)
+class CambioFichaAdmin(admin.ModelAdmin):
+    list_display = ('ficha', 'campo', 'pregunta_id', 'valor_anterior', 'valor_nuevo', 'fecha_edicion')
+    list_filter = ('campo', 'fecha_edicion')
+    raw_id_fields = ('ficha', 'historial')
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class FichasConfig(AppConfig):
     name = 'apps.fichas'
+
+    def ready(self):
+        from . import signals  # noqa: F401 (registra los receivers)
@@ -0,0 +1,47 @@
+"""
+Consultas independientes en paralelo para las vistas async.
+
+Los métodos async del ORM (acount, aaggregate, ...) todavía corren con
+sync_to_async en el único hilo del request, así que un asyncio.gather sobre
+ellos las ejecuta una detrás de otra. en_paralelo() manda cada consulta a un
+hilo de un pool propio y las espera con asyncio.gather: la página tarda lo que
+la consulta más lenta y no la suma de todas.
+
+Cada hilo del pool tiene su propia conexión persistente, administrada igual que
+la de un hilo de gthread (CONN_MAX_AGE, health checks o el pool de PostgreSQL);
+el total de conexiones por despliegue está en gunicorn.conf.py.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.shortcuts import render
+
+_hilos = ThreadPoolExecutor(max_workers=settings.DB_CONSULTAS_PARALELAS, thread_name_prefix='consultas')
+
+
+def _ejecutar(funcion):
+    # Lo mismo que hace Django en request_started / request_finished con la conexión del hilo
+    close_old_connections()
+    try:
+        return funcion()
+    finally:
+        close_old_connections()
+
+
+async def en_paralelo(*funciones):
+    """
+    Ejecuta a la vez funciones sync sin argumentos (cada una con sus consultas ya
+    evaluadas: list(), aggregate(), count()...) y devuelve sus resultados en orden.
+    """
+    loop = asyncio.get_running_loop()
+    return await asyncio.gather(*(loop.run_in_executor(_hilos, _ejecutar, funcion) for funcion in funciones))
+
+
+async def arender(request, plantilla, contexto):
+    """render() para vistas async: la plantilla corre en el hilo sync del request."""
+    # El usuario ya lo resolvió el decorador: la plantilla no repite su consulta
+    request.user = await request.auser()
+    return await sync_to_async(render)(request, plantilla, contexto)
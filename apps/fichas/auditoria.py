@@ -0,0 +1,91 @@
+"""
+Auditoría estructurada de las ediciones de fichas.
+
+Cada edición guarda un FichaHistorial (con el texto legible de siempre en
+'detalles') y una fila CambioFicha por campo o pregunta modificada, escritas
+con un solo bulk_create. Así "qué fichas cambiaron de nivel de riesgo el mes
+pasado" es un filtro por (campo, fecha_edicion) sobre índice, sin parsear texto.
+"""
+from .forms import FichaEvaluacionForm
+from .models import CambioFicha, FichaEvaluacion, FichaHistorial
+
+# Resultados recalculados que también se auditan aunque no vengan del formulario
+CAMPOS_DERIVADOS = ('puntaje_total', 'nivel_riesgo')
+
+
+def _texto(valor):
+    return '' if valor is None else str(valor)
+
+
+def cambio_campo(campo, anterior, nuevo):
+    """CambioFicha (sin guardar) de un campo de la cabecera o un resultado."""
+    return CambioFicha(campo=campo, valor_anterior=_texto(anterior), valor_nuevo=_texto(nuevo))
+
+
+def cambio_pregunta(pregunta_id, texto_anterior, texto_nuevo):
+    """CambioFicha (sin guardar) de la respuesta a una pregunta."""
+    return CambioFicha(
+        campo=CambioFicha.CAMPO_PREGUNTA, pregunta_id=pregunta_id,
+        valor_anterior=texto_anterior, valor_nuevo=texto_nuevo,
+    )
+
+
+def describir(cambio, catalogo):
+    """Línea legible del cambio (la misma que antes se guardaba en 'detalles')."""
+    if cambio.campo == CambioFicha.CAMPO_PREGUNTA:
+        pregunta = catalogo.preguntas.get(cambio.pregunta_id)
+        numero = pregunta.orden if pregunta else cambio.pregunta_id
+        return f"Pregunta {numero}: '{cambio.valor_anterior}' ➔ '{cambio.valor_nuevo}'"
+    return f"Campo {cambio.campo}: '{cambio.valor_anterior}' ➔ '{cambio.valor_nuevo}'"
+
+
+def registrar_edicion(ficha, usuario, cambios, catalogo, accion="Edición de Ficha"):
+    """Guarda la edición y sus cambios (dos INSERT sin importar cuántos cambios haya)."""
+    historial = FichaHistorial.objects.create(
+        ficha=ficha,
+        usuario=usuario,
+        accion=accion,
+        detalles="\n".join(describir(cambio, catalogo) for cambio in cambios),
+    )
+    for cambio in cambios:
+        cambio.historial = historial
+        cambio.ficha_id = ficha.pk
+        cambio.fecha_edicion = historial.fecha_edicion
+    CambioFicha.objects.bulk_create(cambios)
+    return historial
+
+
+def campos_auditables():
+    """Opciones (valor, etiqueta) para el filtro de campo de la búsqueda."""
+    campos = [
+        ('nivel_riesgo', 'Nivel de riesgo'),
+        ('puntaje_total', 'Puntaje total'),
+        (CambioFicha.CAMPO_PREGUNTA, 'Respuestas del cuestionario'),
+    ]
+    campos += [
+        (campo, FichaEvaluacion._meta.get_field(campo).verbose_name)
+        for campo in FichaEvaluacionForm._meta.fields
+    ]
+    return campos
+
+
+def buscar_cambios(usuario, campo='', ficha_id=None, valor='', rango=None):
+    """
+    Cambios auditados de las fichas del equipo del supervisor 'usuario', filtrados.
+    Con 'campo' usa el índice (campo, fecha_edicion); con 'ficha_id', el índice
+    (ficha, fecha_edicion). El equipo se resuelve con los índices de las FK.
+    """
+    cambios = CambioFicha.objects.select_related('historial__usuario', 'ficha').only(
+        'id', 'campo', 'pregunta_id', 'valor_anterior', 'valor_nuevo', 'fecha_edicion',
+        'ficha__id', 'ficha__nombres_evaluado', 'ficha__apellidos_evaluado', 'ficha__dni_evaluado',
+        'historial__id', 'historial__usuario__id', 'historial__usuario__nombres', 'historial__usuario__apellidos',
+    ).filter(ficha__usuario_registra__supervisor_asignado=usuario)
+    if campo:
+        cambios = cambios.filter(campo=campo)
+    if ficha_id:
+        cambios = cambios.filter(ficha_id=ficha_id)
+    if valor:
+        cambios = cambios.filter(valor_nuevo=valor)
+    if rango:
+        cambios = cambios.filter(**rango.filtro('fecha_edicion'))
+    return cambios
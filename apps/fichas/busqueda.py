@@ -0,0 +1,49 @@
+"""
+Búsqueda de fichas por DNI del evaluado usando el índice de 'dni_evaluado'.
+
+'icontains' se traduce a LIKE '%valor%' y obliga a recorrer toda la tabla.
+Por eso, por defecto:
+  - 8 dígitos          -> coincidencia exacta (dni_evaluado = '12345678')
+  - menos de 8 dígitos -> prefijo como rango (dni >= '1234' AND dni < '1235')
+  - modo 'contiene'    -> icontains, solo si el usuario lo pide explícitamente
+"""
+from django.db.models import Q
+
+LONGITUD_DNI = 8
+
+MODO_EXACTO = 'exacto'
+MODO_PREFIJO = 'prefijo'
+MODO_CONTIENE = 'contiene'
+MODOS_DNI = (MODO_EXACTO, MODO_PREFIJO, MODO_CONTIENE)
+
+
+def filtro_prefijo(campo, prefijo):
+    """
+    Q para "campo empieza con prefijo". Con solo dígitos se expresa como rango
+    [prefijo, siguiente) para que cualquier motor lo resuelva con el índice
+    (un LIKE 'x%' depende de la collation y del motor).
+    """
+    if not prefijo.isdigit():
+        return Q(**{f'{campo}__istartswith': prefijo})
+
+    filtro = Q(**{f'{campo}__gte': prefijo})
+    # '1239' -> tope '124'; '999' no tiene tope (todo lo que sea >= '999')
+    base = prefijo.rstrip('9')
+    if base:
+        filtro &= Q(**{f'{campo}__lt': base[:-1] + str(int(base[-1]) + 1)})
+    return filtro
+
+
+def filtrar_por_dni(queryset, dni, modo='', campo='dni_evaluado'):
+    """Aplica al queryset la búsqueda por DNI según 'modo' (ver docstring del módulo)."""
+    dni = (dni or '').strip()
+    if not dni:
+        return queryset
+
+    if modo == MODO_CONTIENE:
+        return queryset.filter(**{f'{campo}__icontains': dni})
+
+    if modo == MODO_EXACTO or (modo != MODO_PREFIJO and len(dni) >= LONGITUD_DNI):
+        return queryset.filter(**{campo: dni})
+
+    return queryset.filter(filtro_prefijo(campo, dni))
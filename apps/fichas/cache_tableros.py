@@ -0,0 +1,180 @@
+"""
+Cache de los tableros: dashboard del supervisor, KPIs del encuestador y
+contadores de la lista de usuarios del admin.
+
+Cada valor se guarda en el cache de Django (CACHES['default'], ver CACHE_URL en
+settings) con una clave por tablero, usuario, rol y filtros, más la versión de
+cada "ámbito" del que depende:
+
+  - 'encuestador:<id>': fichas de un encuestador.
+  - 'equipo:<id>':      fichas del equipo de un supervisor.
+  - 'usuarios':         cualquier alta, edición o baja de usuario.
+  - 'todo':             lo incluyen todas las claves (procesos masivos).
+
+Invalidar un ámbito solo incrementa su versión (una escritura); las claves
+viejas dejan de pedirse y el backend las descarta por TTL. Así funciona igual
+con locmem, archivos o Redis, que no permiten borrar por patrón. Los signals de
+FichaEvaluacion y Usuario invalidan después del commit, para que ningún request
+guarde datos previos a la transacción con la versión nueva.
+
+locmem es por proceso: con varios workers de gunicorn use filecache o Redis,
+o cada worker verá sus propias versiones (hasta CACHE_TABLEROS_SEGUNDOS).
+"""
+import hashlib
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from apps.usuarios.models import Usuario
+
+from .models import FichaEvaluacion
+
+PREFIJO = 'tableros'
+TABLEROS = ('dashboard_supervisor', 'kpis_encuestador', 'contadores_usuarios')
+
+
+def _clave_version(ambito):
+    return f'{PREFIJO}:v:{ambito}'
+
+
+def _clave_valor(nombre, usuario, filtros, versiones):
+    # Los filtros se ordenan: el mismo conjunto da la misma clave sin importar el orden
+    huella = hashlib.md5(repr(sorted((filtros or {}).items())).encode('utf-8')).hexdigest()[:12]
+    return f'{PREFIJO}:{nombre}:{usuario.pk}:{usuario.rol}:{huella}:' + '.'.join(str(v) for v in versiones)
+
+
+def _claves_version(ambitos):
+    return [_clave_version(ambito) for ambito in ('todo', *ambitos)]
+
+
+def _versiones(claves):
+    """Versiones de los ámbitos (una lectura); un ámbito sin versión arranca con la hora en ns."""
+    encontradas = cache.get_many(claves)
+    for clave in claves:
+        if clave not in encontradas:
+            # Un valor nuevo y no 0: si el backend descartó la versión, no revive claves viejas
+            inicial = time.time_ns()
+            encontradas[clave] = inicial if cache.add(clave, inicial, None) else cache.get(clave, inicial)
+    return [encontradas[clave] for clave in claves]
+
+
+async def _aversiones(claves):
+    encontradas = await cache.aget_many(claves)
+    for clave in claves:
+        if clave not in encontradas:
+            inicial = time.time_ns()
+            encontradas[clave] = inicial if await cache.aadd(clave, inicial, None) else await cache.aget(clave, inicial)
+    return [encontradas[clave] for clave in claves]
+
+
+def _contar(nombre, acierto):
+    clave = f'{PREFIJO}:{"aciertos" if acierto else "fallos"}:{nombre}'
+    cache.add(clave, 0, None)
+    try:
+        cache.incr(clave)
+    except ValueError:
+        # Descartada entre add e incr (culling de locmem/archivos): se pierde una cuenta
+        pass
+
+
+async def _acontar(nombre, acierto):
+    clave = f'{PREFIJO}:{"aciertos" if acierto else "fallos"}:{nombre}'
+    await cache.aadd(clave, 0, None)
+    try:
+        await cache.aincr(clave)
+    except ValueError:
+        pass
+
+
+def obtener(nombre, usuario, ambitos, calcular, filtros=None):
+    """
+    Valor del tablero 'nombre' para 'usuario' y 'filtros'; si no está en cache
+    (o cambió alguno de sus ámbitos) lo calcula con calcular() y lo guarda.
+    """
+    clave = _clave_valor(nombre, usuario, filtros, _versiones(_claves_version(ambitos)))
+    valor = cache.get(clave)
+    _contar(nombre, valor is not None)
+    if valor is None:
+        valor = calcular()
+        cache.set(clave, valor, settings.CACHE_TABLEROS_SEGUNDOS)
+    return valor
+
+
+async def aobtener(nombre, usuario, ambitos, calcular, filtros=None):
+    """obtener() para vistas async: calcular es una función async sin argumentos."""
+    clave = _clave_valor(nombre, usuario, filtros, await _aversiones(_claves_version(ambitos)))
+    valor = await cache.aget(clave)
+    await _acontar(nombre, valor is not None)
+    if valor is None:
+        valor = await calcular()
+        await cache.aset(clave, valor, settings.CACHE_TABLEROS_SEGUNDOS)
+    return valor
+
+
+def invalidar(*ambitos):
+    """Incrementa la versión de los ámbitos (sin esperar al commit)."""
+    for ambito in ambitos:
+        clave = _clave_version(ambito)
+        try:
+            cache.incr(clave)
+        except ValueError:
+            cache.set(clave, time.time_ns(), None)
+    cache.add(f'{PREFIJO}:invalidaciones', 0, None)
+    try:
+        cache.incr(f'{PREFIJO}:invalidaciones', len(ambitos))
+    except ValueError:
+        pass
+
+
+def invalidar_al_confirmar(*ambitos):
+    """invalidar() cuando termine la transacción en curso (de inmediato si no hay una)."""
+    transaction.on_commit(partial(invalidar, *ambitos))
+
+
+def invalidar_encuestador(usuario_id, supervisor_id=None):
+    ambitos = [f'encuestador:{usuario_id}']
+    if supervisor_id:
+        ambitos.append(f'equipo:{supervisor_id}')
+    invalidar_al_confirmar(*ambitos)
+
+
+def invalidar_ficha(ficha):
+    """Tableros que muestran la ficha: los de su encuestador y los del supervisor de este."""
+    if not ficha.usuario_registra_id:
+        return
+    if FichaEvaluacion.usuario_registra.is_cached(ficha):
+        supervisor_id = ficha.usuario_registra.supervisor_asignado_id
+    else:
+        supervisor_id = Usuario.objects.filter(pk=ficha.usuario_registra_id).values_list(
+            'supervisor_asignado_id', flat=True
+        ).first()
+    invalidar_encuestador(ficha.usuario_registra_id, supervisor_id)
+
+
+def invalidar_todo():
+    invalidar_al_confirmar('todo')
+
+
+def estadisticas():
+    """Aciertos y fallos por tablero (los de este proceso si el backend es locmem)."""
+    claves = [f'{PREFIJO}:{tipo}:{nombre}' for nombre in TABLEROS for tipo in ('aciertos', 'fallos')]
+    valores = cache.get_many(claves + [f'{PREFIJO}:invalidaciones'])
+    tableros = {}
+    for nombre in TABLEROS:
+        aciertos = valores.get(f'{PREFIJO}:aciertos:{nombre}', 0)
+        fallos = valores.get(f'{PREFIJO}:fallos:{nombre}', 0)
+        pedidos = aciertos + fallos
+        tableros[nombre] = {
+            'aciertos': aciertos,
+            'fallos': fallos,
+            'tasa_aciertos': round(aciertos / pedidos, 3) if pedidos else None,
+        }
+    return {
+        'backend': settings.CACHES['default']['BACKEND'],
+        'ttl_segundos': settings.CACHE_TABLEROS_SEGUNDOS,
+        'invalidaciones': valores.get(f'{PREFIJO}:invalidaciones', 0),
+        'tableros': tableros,
+    }
@@ -0,0 +1,230 @@
+"""
+Catálogo en memoria del cuestionario (Dimensiones -> Preguntas -> Opciones).
+
+El banco de preguntas solo cambia cuando un administrador lo edita, así que cada
+proceso guarda una "foto" inmutable del catálogo y solo la reconstruye cuando el
+contador de VersionCatalogo cambia. Verificar la versión cuesta una consulta
+por request en lugar de las tres del prefetch_related('preguntas__opciones').
+
+Toda vista o comando que modifique el banco debe llamar a invalidar_catalogo().
+
+Cada foto se guarda además como VersionCuestionario (un JSON por versión) y las
+fichas nuevas apuntan a ella. Ver o re-puntuar una ficha antigua usa
+catalogo_de_ficha(), que arma el catálogo desde ese JSON: las versiones son
+inmutables, así que se cachean por proceso y cuestan una consulta la primera vez.
+"""
+import hashlib
+import json
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+
+from django.db.models import F
+from django.db.models.functions import Now
+
+from .models import Dimension, Opcion, Pregunta, VersionCatalogo, VersionCuestionario
+from .puntaje import RIESGO_POR_DEFECTO, UMBRALES_RIESGO
+
+
+@dataclass(frozen=True)
+class OpcionCatalogo:
+    id: int
+    texto: str
+    puntaje: int
+    pregunta_id: int
+
+
+@dataclass(frozen=True)
+class PreguntaCatalogo:
+    id: int
+    orden: int
+    enunciado: str
+    dimension_id: int
+    opciones: tuple
+
+
+@dataclass(frozen=True)
+class DimensionCatalogo:
+    id: int
+    nombre: str
+    descripcion: str
+    orden: int
+    preguntas: tuple
+
+
+@dataclass(frozen=True)
+class RespuestaCatalogo:
+    """Una respuesta de ficha resuelta contra un catálogo (para mostrarla)."""
+    dimension: DimensionCatalogo
+    pregunta: PreguntaCatalogo
+    opcion_seleccionada: OpcionCatalogo
+    puntaje_obtenido: int
+
+
+@dataclass(frozen=True)
+class Catalogo:
+    version: int
+    dimensiones: tuple
+    dimensiones_por_id: MappingProxyType  # {dimension_id: DimensionCatalogo}
+    preguntas: MappingProxyType   # {pregunta_id: PreguntaCatalogo}
+    opciones: MappingProxyType    # {opcion_id: OpcionCatalogo}
+    umbrales: tuple               # ((puntaje mínimo, nivel), ...) de mayor a menor
+    riesgo_por_defecto: str
+    version_cuestionario_id: int  # VersionCuestionario con este mismo contenido
+
+
+# pk de la única fila de VersionCatalogo (la crea la migración 0007)
+FILA_VERSION = 1
+
+_lock = threading.Lock()
+_catalogo = None
+# {version_cuestionario_id: Catalogo}; las versiones no cambian nunca
+_versiones = {}
+
+
+def version_actual():
+    numero = VersionCatalogo.objects.filter(pk=FILA_VERSION).values_list('numero', flat=True).first()
+    return numero or 0
+
+
+def leer_contenido():
+    """
+    Lee el banco vigente (una consulta por tabla) en el formato JSON de
+    VersionCuestionario. Las opciones van como [id, texto, puntaje].
+    """
+    opciones_por_pregunta = {}
+    for pk, texto, puntaje, pregunta_id in Opcion.objects.order_by('id').values_list('id', 'texto', 'puntaje', 'pregunta_id'):
+        opciones_por_pregunta.setdefault(pregunta_id, []).append([pk, texto, puntaje])
+
+    preguntas_por_dimension = {}
+    for pk, orden, enunciado, dimension_id in Pregunta.objects.order_by('orden', 'id').values_list('id', 'orden', 'enunciado', 'dimension_id'):
+        preguntas_por_dimension.setdefault(dimension_id, []).append({
+            'id': pk, 'orden': orden, 'enunciado': enunciado,
+            'opciones': opciones_por_pregunta.get(pk, []),
+        })
+
+    return {
+        'dimensiones': [
+            {**fila, 'preguntas': preguntas_por_dimension.get(fila['id'], [])}
+            for fila in Dimension.objects.order_by('orden', 'id').values('id', 'nombre', 'descripcion', 'orden')
+        ],
+        'umbrales': [[minimo, nivel] for minimo, nivel in UMBRALES_RIESGO],
+        'riesgo_por_defecto': RIESGO_POR_DEFECTO,
+    }
+
+
+def catalogo_desde_contenido(contenido, version_cuestionario_id, version=None):
+    """Arma la foto inmutable a partir del JSON de una VersionCuestionario."""
+    opciones = {}
+    preguntas = {}
+    dimensiones = []
+    for dim in contenido['dimensiones']:
+        preguntas_dim = []
+        for preg in dim['preguntas']:
+            opciones_preg = tuple(
+                OpcionCatalogo(id=pk, texto=texto, puntaje=puntaje, pregunta_id=preg['id'])
+                for pk, texto, puntaje in preg['opciones']
+            )
+            opciones.update((o.id, o) for o in opciones_preg)
+            pregunta = PreguntaCatalogo(
+                id=preg['id'], orden=preg['orden'], enunciado=preg['enunciado'],
+                dimension_id=dim['id'], opciones=opciones_preg,
+            )
+            preguntas[pregunta.id] = pregunta
+            preguntas_dim.append(pregunta)
+        dimensiones.append(DimensionCatalogo(
+            id=dim['id'], nombre=dim['nombre'], descripcion=dim['descripcion'],
+            orden=dim['orden'], preguntas=tuple(preguntas_dim),
+        ))
+
+    return Catalogo(
+        version=version,
+        dimensiones=tuple(dimensiones),
+        dimensiones_por_id=MappingProxyType({d.id: d for d in dimensiones}),
+        preguntas=MappingProxyType(preguntas),
+        opciones=MappingProxyType(opciones),
+        umbrales=tuple((minimo, nivel) for minimo, nivel in contenido['umbrales']),
+        riesgo_por_defecto=contenido['riesgo_por_defecto'],
+        version_cuestionario_id=version_cuestionario_id,
+    )
+
+
+def registrar_version(contenido):
+    """Guarda el contenido como VersionCuestionario (o reutiliza la idéntica). Retorna su id."""
+    serializado = json.dumps(contenido, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    huella = hashlib.sha256(serializado.encode('utf-8')).hexdigest()
+    version, _ = VersionCuestionario.objects.get_or_create(huella=huella, defaults={'contenido': contenido})
+    return version.pk
+
+
+def construir_catalogo(version):
+    """Arma la foto del banco vigente y la registra como VersionCuestionario."""
+    contenido = leer_contenido()
+    catalogo = catalogo_desde_contenido(contenido, registrar_version(contenido), version=version)
+    _versiones.setdefault(catalogo.version_cuestionario_id, catalogo)
+    return catalogo
+
+
+def obtener_catalogo():
+    """Devuelve el catálogo vigente, reconstruyéndolo solo si cambió la versión."""
+    global _catalogo
+    version = version_actual()
+    catalogo = _catalogo
+    if catalogo is not None and catalogo.version == version:
+        return catalogo
+
+    with _lock:
+        if _catalogo is None or _catalogo.version != version:
+            _catalogo = construir_catalogo(version)
+        return _catalogo
+
+
+def invalidar_catalogo():
+    """Incrementa la versión global; los demás workers lo detectan en su próximo request."""
+    global _catalogo
+    # update() no aplica auto_now: la fecha se pone a mano
+    incrementar = {'numero': F('numero') + 1, 'fecha_actualizacion': Now()}
+    if not VersionCatalogo.objects.filter(pk=FILA_VERSION).update(**incrementar):
+        # Sin la fila que siembra la migración 0007 (p. ej. tras un flush). Con pk fija,
+        # dos invalidaciones a la vez no pueden crear dos filas
+        VersionCatalogo.objects.get_or_create(pk=FILA_VERSION)
+        VersionCatalogo.objects.filter(pk=FILA_VERSION).update(**incrementar)
+    _catalogo = None
+
+
+def obtener_version(version_cuestionario_id):
+    """Catálogo de una versión guardada (una consulta la primera vez por proceso)."""
+    catalogo = _versiones.get(version_cuestionario_id)
+    if catalogo is None:
+        contenido = VersionCuestionario.objects.values_list('contenido', flat=True).get(pk=version_cuestionario_id)
+        catalogo = _versiones.setdefault(
+            version_cuestionario_id, catalogo_desde_contenido(contenido, version_cuestionario_id)
+        )
+    return catalogo
+
+
+def catalogo_de_ficha(ficha):
+    """Catálogo con el que se llenó la ficha; las fichas sin versión usan el vigente."""
+    if ficha.version_cuestionario_id:
+        return obtener_version(ficha.version_cuestionario_id)
+    return obtener_catalogo()
+
+
+def respuestas_de_ficha(detalles, catalogo):
+    """
+    detalles: iterable de (pregunta_id, opcion_id, puntaje_obtenido).
+    Devuelve las respuestas con sus textos del catálogo, en el orden del cuestionario.
+    """
+    respuestas = []
+    for pregunta_id, opcion_id, puntaje in detalles:
+        pregunta = catalogo.preguntas.get(pregunta_id)
+        if pregunta is None:
+            continue
+        respuestas.append(RespuestaCatalogo(
+            dimension=catalogo.dimensiones_por_id[pregunta.dimension_id],
+            pregunta=pregunta,
+            opcion_seleccionada=catalogo.opciones.get(opcion_id),
+            puntaje_obtenido=puntaje,
+        ))
+    respuestas.sort(key=lambda r: (r.dimension.orden, r.dimension.id, r.pregunta.orden, r.pregunta.id))
+    return respuestas
@@ -0,0 +1,120 @@
+"""
+Detección de fichas duplicadas de un mismo estudiante.
+
+Cada ficha guarda dos claves normalizadas (ver asignar_claves):
+  - dni_normalizado: solo dígitos, completado a 8 (Excel suele comerse los ceros).
+  - nombre_normalizado: nombres + apellidos sin tildes ni mayúsculas, con las
+    palabras ordenadas; así "Pérez García, Ana" y "ANA PEREZ GARCIA" coinciden
+    aunque el formulario haya partido distinto nombres y apellidos.
+
+Dentro de una institución, dos fichas son un posible duplicado si comparten el
+DNI normalizado, o el nombre normalizado y la fecha de nacimiento. Ambas
+búsquedas usan índices (institucion, clave), así que revisar una ficha nueva
+cuesta O(log n) sin importar el tamaño de la tabla.
+
+Las claves se asignan en pre_save (signals.py); las fichas creadas con
+bulk_create (sincronizacion.py) las reciben a mano y las fichas anteriores a
+los campos las rellena la migración 0016. 'agrupar_duplicados' corrige claves
+desactualizadas (p. ej. tras un UPDATE directo en la base) y lista los grupos.
+"""
+import re
+import unicodedata
+
+from django.db.models import Q
+
+from .models import FichaEvaluacion
+
+LARGO_DNI = 8
+_NO_ALFANUMERICO = re.compile(r'[^0-9a-z]+')
+
+
+def normalizar_dni(dni):
+    digitos = ''.join(c for c in (dni or '') if c.isdigit())
+    return digitos.zfill(LARGO_DNI) if digitos else ''
+
+
+def normalizar_nombre(*partes):
+    texto = unicodedata.normalize('NFKD', ' '.join(p or '' for p in partes))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c)).casefold()
+    return ' '.join(sorted(_NO_ALFANUMERICO.sub(' ', texto).split()))
+
+
+def claves_de(dni, nombres, apellidos):
+    """(dni_normalizado, nombre_normalizado) de los datos crudos de una ficha."""
+    nombre = normalizar_nombre(nombres, apellidos)
+    return normalizar_dni(dni), nombre[:FichaEvaluacion._meta.get_field('nombre_normalizado').max_length]
+
+
+def asignar_claves(ficha):
+    """Calcula las claves normalizadas en la instancia (no guarda)."""
+    ficha.dni_normalizado, ficha.nombre_normalizado = claves_de(
+        ficha.dni_evaluado, ficha.nombres_evaluado, ficha.apellidos_evaluado
+    )
+    return ficha
+
+
+def _criterio(institucion_id, dnis, nombres):
+    """
+    OR de dos búsquedas por índice. La institución va dentro de cada rama para
+    que cada una coincida con el prefijo de su índice (el motor las une: index
+    merge en MySQL, BitmapOr en PostgreSQL, multi-index OR en SQLite).
+    """
+    criterio = Q()
+    if dnis:
+        criterio |= Q(institucion_id=institucion_id, dni_normalizado__in=dnis)
+    if nombres:
+        criterio |= Q(institucion_id=institucion_id, nombre_normalizado__in=nombres)
+    return criterio
+
+
+def posibles_duplicados(ficha, limite=5):
+    """Otras fichas de la misma institución que parecen del mismo estudiante (una consulta)."""
+    criterio = Q()
+    if ficha.dni_normalizado:
+        criterio |= Q(institucion_id=ficha.institucion_id, dni_normalizado=ficha.dni_normalizado)
+    if ficha.nombre_normalizado and ficha.fecha_nacimiento:
+        criterio |= Q(
+            institucion_id=ficha.institucion_id,
+            nombre_normalizado=ficha.nombre_normalizado,
+            fecha_nacimiento=ficha.fecha_nacimiento,
+        )
+    if not criterio:
+        return []
+    return list(
+        FichaEvaluacion.objects.filter(criterio)
+        .exclude(pk=ficha.pk)
+        .order_by('-fecha_registro')
+        .values('id', 'nombres_evaluado', 'apellidos_evaluado', 'dni_evaluado', 'fecha_registro')[:limite]
+    )
+
+
+def duplicados_de_lote(fichas):
+    """
+    {ficha_id: [ids de posibles duplicados]} para fichas ya guardadas, con una
+    sola consulta por institución (incluye duplicados dentro del mismo lote).
+    """
+    por_institucion = {}
+    for ficha in fichas:
+        por_institucion.setdefault(ficha.institucion_id, []).append(ficha)
+
+    resultado = {}
+    for institucion_id, grupo in por_institucion.items():
+        dnis = {f.dni_normalizado for f in grupo if f.dni_normalizado}
+        nombres = {f.nombre_normalizado for f in grupo if f.nombre_normalizado and f.fecha_nacimiento}
+        if not dnis and not nombres:
+            continue
+        por_dni, por_nombre = {}, {}
+        for pk, dni, nombre, nacimiento in FichaEvaluacion.objects.filter(
+            _criterio(institucion_id, dnis, nombres)
+        ).values_list('id', 'dni_normalizado', 'nombre_normalizado', 'fecha_nacimiento'):
+            if dni:
+                por_dni.setdefault(dni, []).append(pk)
+            if nombre and nacimiento:
+                por_nombre.setdefault((nombre, nacimiento), []).append(pk)
+        for ficha in grupo:
+            ids = set(por_dni.get(ficha.dni_normalizado, ()))
+            ids.update(por_nombre.get((ficha.nombre_normalizado, ficha.fecha_nacimiento), ()))
+            ids.discard(ficha.pk)
+            if ids:
+                resultado[ficha.pk] = sorted(ids)
+    return resultado
@@ -0,0 +1,135 @@
+"""
+Mantenimiento de la tabla resumen EstadisticaDiaria.
+
+Cada ficha aporta a un solo grupo (día local, encuestador, institución, nivel de
+riesgo). Al crear/editar/eliminar una ficha se suma o resta su aporte con un
+UPDATE atómico (ver signals.py); las fichas creadas en lote (sincronizacion.py)
+usan sumar_fichas(). 'reconstruir_estadisticas' rehace la tabla completa desde
+FichaEvaluacion; la migración 0018 hace lo mismo al desplegar (con su propia
+copia del GROUP BY: si cambia aquí, no cambia allá).
+"""
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Min, Q, Sum, Value
+from django.db.models.functions import Greatest, Least, TruncDate
+from django.utils import timezone
+
+from . import cache_tableros
+from .models import EstadisticaDiaria, FichaEvaluacion
+from .filtros import inicio_del_dia
+
+CAMPOS_CLAVE = ('dia', 'encuestador_id', 'institucion_id', 'nivel_riesgo')
+
+
+def estado_de(fecha_registro, usuario_registra_id, institucion_id, nivel_riesgo, puntaje_total):
+    """Devuelve (clave del grupo, puntaje) con que una ficha aporta al resumen."""
+    clave = (timezone.localdate(fecha_registro), usuario_registra_id, institucion_id, nivel_riesgo or '')
+    return clave, puntaje_total
+
+
+def estado_de_ficha(ficha):
+    return estado_de(ficha.fecha_registro, ficha.usuario_registra_id, ficha.institucion_id,
+                     ficha.nivel_riesgo, ficha.puntaje_total)
+
+
+def sumar(clave, puntaje):
+    sumar_grupo(clave, 1, puntaje, puntaje, puntaje)
+
+
+def sumar_grupo(clave, cantidad, suma, minimo, maximo):
+    """Suma al grupo el aporte de 'cantidad' fichas (con su suma, mínimo y máximo de puntaje)."""
+    filtro = dict(zip(CAMPOS_CLAVE, clave))
+    actualizadas = EstadisticaDiaria.objects.filter(**filtro).update(
+        cantidad=F('cantidad') + cantidad,
+        suma_puntaje=F('suma_puntaje') + suma,
+        puntaje_min=Least('puntaje_min', Value(minimo)),
+        puntaje_max=Greatest('puntaje_max', Value(maximo)),
+    )
+    if actualizadas:
+        return
+    try:
+        with transaction.atomic():
+            EstadisticaDiaria.objects.create(
+                cantidad=cantidad, suma_puntaje=suma, puntaje_min=minimo, puntaje_max=maximo, **filtro
+            )
+    except IntegrityError:
+        # Otro proceso creó el grupo al mismo tiempo: ahora sí existe la fila
+        sumar_grupo(clave, cantidad, suma, minimo, maximo)
+
+
+def sumar_fichas(fichas):
+    """
+    Aporte de fichas creadas con bulk_create (que no dispara signals):
+    se agrupan en memoria y se escribe una vez por grupo, no una vez por ficha.
+    """
+    grupos = {}
+    for ficha in fichas:
+        clave, puntaje = estado_de_ficha(ficha)
+        cantidad, suma, minimo, maximo = grupos.get(clave, (0, 0, puntaje, puntaje))
+        grupos[clave] = (cantidad + 1, suma + puntaje, min(minimo, puntaje), max(maximo, puntaje))
+    for clave, (cantidad, suma, minimo, maximo) in grupos.items():
+        sumar_grupo(clave, cantidad, suma, minimo, maximo)
+
+
+def restar(clave, puntaje):
+    filtro = dict(zip(CAMPOS_CLAVE, clave))
+    grupo = EstadisticaDiaria.objects.filter(**filtro)
+    grupo.update(cantidad=F('cantidad') - 1, suma_puntaje=F('suma_puntaje') - puntaje)
+    grupo.filter(cantidad=0).delete()
+
+    # El mínimo/máximo no se puede "deshacer": si la ficha era el extremo,
+    # se recalcula solo este grupo (un día de un encuestador) desde las fichas.
+    if grupo.filter(Q(puntaje_min=puntaje) | Q(puntaje_max=puntaje)).exists():
+        dia, encuestador_id, institucion_id, nivel_riesgo = clave
+        inicio = inicio_del_dia(dia)
+        extremos = FichaEvaluacion.objects.filter(
+            usuario_registra_id=encuestador_id,
+            institucion_id=institucion_id,
+            nivel_riesgo=nivel_riesgo,
+            fecha_registro__gte=inicio,
+            fecha_registro__lt=inicio + timedelta(days=1),
+        ).aggregate(minimo=Min('puntaje_total'), maximo=Max('puntaje_total'))
+        if extremos['minimo'] is not None:
+            grupo.update(puntaje_min=extremos['minimo'], puntaje_max=extremos['maximo'])
+
+
+def reconstruir_estadisticas(lote=1000):
+    """Borra y recalcula todo el resumen con un GROUP BY sobre FichaEvaluacion."""
+    grupos = (
+        FichaEvaluacion.objects
+        .annotate(dia=TruncDate('fecha_registro'))
+        .values('dia', 'usuario_registra_id', 'institucion_id', 'nivel_riesgo')
+        .annotate(
+            cantidad=Count('id'),
+            suma_puntaje=Sum('puntaje_total'),
+            puntaje_min=Min('puntaje_total'),
+            puntaje_max=Max('puntaje_total'),
+        )
+        .order_by()
+    )
+
+    total = 0
+    with transaction.atomic():
+        EstadisticaDiaria.objects.all().delete()
+        filas = []
+        for g in grupos.iterator(chunk_size=lote):
+            filas.append(EstadisticaDiaria(
+                dia=g['dia'],
+                encuestador_id=g['usuario_registra_id'],
+                institucion_id=g['institucion_id'],
+                nivel_riesgo=g['nivel_riesgo'],
+                cantidad=g['cantidad'],
+                suma_puntaje=g['suma_puntaje'],
+                puntaje_min=g['puntaje_min'],
+                puntaje_max=g['puntaje_max'],
+            ))
+            if len(filas) >= lote:
+                EstadisticaDiaria.objects.bulk_create(filas)
+                total += len(filas)
+                filas = []
+        EstadisticaDiaria.objects.bulk_create(filas)
+        total += len(filas)
+        # Cambia el resumen de todos los encuestadores: ningún tablero en cache sigue vigente
+        cache_tableros.invalidar_todo()
+    return total
@@ -0,0 +1,154 @@
+"""
+Motor de exportación de fichas a Excel.
+
+Usa el modo write-only de openpyxl (las filas se escriben a disco y no quedan
+en memoria), recorre el queryset en lotes por cursor (fecha_registro, id) y usa
+anchos de columna fijos, así la memoria se mantiene plana aunque se exporten
+cientos de miles de fichas. No se usa .iterator(): pymysql trae a memoria el
+resultado completo de la consulta aunque Django lo entregue por bloques. El archivo se arma en un temporal y se envía con
+FileResponse, que lo transmite por partes al cliente.
+
+escribir_xlsx() y escribir_csv() también los usa el worker de exportaciones en
+segundo plano (ver trabajos.py).
+"""
+import csv
+import io
+import tempfile
+from dataclasses import dataclass
+from typing import Callable
+
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Alignment
+from openpyxl.utils import get_column_letter
+from django.http import FileResponse
+from django.utils import timezone
+
+from .paginacion import lotes_por_cursor
+
+CONTENT_TYPE_XLSX = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+TAMANO_BLOQUE = 2000
+
+
+@dataclass(frozen=True)
+class Reporte:
+    titulo_hoja: str
+    columnas: tuple   # ((encabezado, ancho), ...)
+    campos: tuple     # campos para queryset.values()
+    fila: Callable    # dict de values() -> lista de celdas
+
+
+def _fecha(valor):
+    return timezone.localtime(valor).strftime('%d/%m/%Y %H:%M') if valor else '-'
+
+
+REPORTE_ENCUESTADOR = Reporte(
+    titulo_hoja='Reporte Filtrado',
+    columnas=(
+        ('ID', 10), ('Fecha', 18), ('Estudiante', 40), ('DNI', 12),
+        ('Institución', 40), ('Puntaje', 10), ('Nivel de Riesgo', 20),
+    ),
+    campos=('id', 'fecha_registro', 'nombres_evaluado', 'apellidos_evaluado', 'dni_evaluado',
+            'institucion__nombre', 'puntaje_total', 'nivel_riesgo'),
+    fila=lambda f: [
+        f['id'],
+        _fecha(f['fecha_registro']),
+        f"{f['nombres_evaluado']} {f['apellidos_evaluado']}",
+        f['dni_evaluado'],
+        f['institucion__nombre'] or '-',
+        f['puntaje_total'],
+        f['nivel_riesgo'],
+    ],
+)
+
+REPORTE_SUPERVISOR = Reporte(
+    titulo_hoja='Reporte de Fichas',
+    columnas=(
+        ('Fecha Registro', 20), ('Encuestador', 30), ('Evaluado (Estudiante)', 35), ('DNI', 15),
+        ('Edad', 10), ('Institución', 30), ('Puntaje Total', 15), ('Nivel de Riesgo', 20),
+    ),
+    campos=('fecha_registro', 'usuario_registra__nombres', 'usuario_registra__apellidos',
+            'nombres_evaluado', 'apellidos_evaluado', 'dni_evaluado', 'edad_evaluado',
+            'institucion__nombre', 'puntaje_total', 'nivel_riesgo'),
+    fila=lambda f: [
+        _fecha(f['fecha_registro']),
+        f"{f['usuario_registra__nombres']} {f['usuario_registra__apellidos']}",
+        f"{f['nombres_evaluado']} {f['apellidos_evaluado']}",
+        f['dni_evaluado'],
+        f['edad_evaluado'],
+        f['institucion__nombre'] or 'Sin Institución',
+        f['puntaje_total'],
+        f['nivel_riesgo'],
+    ],
+)
+
+
+def filas_reporte(reporte, queryset, tamano=TAMANO_BLOQUE):
+    """
+    Genera las filas del reporte, de la ficha más reciente a la más antigua, con
+    una consulta acotada por lote (ver paginacion.lotes_por_cursor).
+    """
+    # El cursor necesita id y fecha_registro aunque el reporte no los muestre
+    campos = dict.fromkeys(('id', 'fecha_registro', *reporte.campos))
+    for lote in lotes_por_cursor(queryset.values(*campos), campo='fecha_registro', tamano=tamano):
+        for registro in lote:
+            yield reporte.fila(registro)
+
+
+def escribir_xlsx(destino, reporte, queryset):
+    """Escribe el reporte en 'destino' (ruta o archivo binario) en modo write-only. Devuelve el número de filas."""
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(reporte.titulo_hoja)
+
+    # En write-only los anchos deben definirse antes de escribir filas
+    for i, (_, ancho) in enumerate(reporte.columnas, 1):
+        ws.column_dimensions[get_column_letter(i)].width = ancho
+
+    header_font = Font(bold=True, color="FFFFFF")
+    header_fill = PatternFill(start_color="2563EB", end_color="2563EB", fill_type="solid")
+    center_align = Alignment(horizontal="center", vertical="center")
+    encabezados = []
+    for titulo, _ in reporte.columnas:
+        celda = WriteOnlyCell(ws, value=titulo)
+        celda.font = header_font
+        celda.fill = header_fill
+        celda.alignment = center_align
+        encabezados.append(celda)
+    ws.append(encabezados)
+
+    total = 0
+    for fila in filas_reporte(reporte, queryset):
+        ws.append(fila)
+        total += 1
+
+    wb.save(destino)
+    return total
+
+
+def escribir_csv(destino, reporte, queryset):
+    """Escribe el reporte como CSV en 'destino' (archivo binario). Devuelve el número de filas."""
+    # utf-8-sig: Excel reconoce tildes y ñ al abrir el CSV con doble clic
+    texto = io.TextIOWrapper(destino, encoding='utf-8-sig', newline='')
+    writer = csv.writer(texto)
+    writer.writerow([titulo for titulo, _ in reporte.columnas])
+    total = 0
+    for fila in filas_reporte(reporte, queryset):
+        writer.writerow(fila)
+        total += 1
+    texto.flush()
+    texto.detach()  # el archivo binario sigue abierto para quien lo llamó
+    return total
+
+
+ESCRITORES = {
+    'xlsx': escribir_xlsx,
+    'csv': escribir_csv,
+}
+
+
+def respuesta_xlsx(reporte, queryset, nombre_archivo):
+    """Genera el Excel en un temporal en disco y lo transmite al cliente."""
+    archivo = tempfile.TemporaryFile()
+    escribir_xlsx(archivo, reporte, queryset)
+    archivo.seek(0)
+    return FileResponse(archivo, as_attachment=True, filename=nombre_archivo, content_type=CONTENT_TYPE_XLSX)
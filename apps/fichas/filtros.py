@@ -0,0 +1,95 @@
+"""
+Filtro de rango de fechas compartido por listados, dashboards y exportaciones.
+
+Los presets de 'rango_fecha' (hoy, 7dias, mes) y las fechas libres
+'fecha_desde'/'fecha_hasta' se convierten en un rango semiabierto de
+timestamps calculado en hora de Lima:
+
+    fecha_registro >= 00:00 del primer día  AND  fecha_registro < 00:00 del día siguiente al último
+
+Así el motor compara la columna directamente y puede usar los índices sobre
+fecha_registro (un 'fecha_registro__date' envuelve la columna en una
+conversión de zona horaria y obliga a recorrer toda la tabla).
+"""
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+ZONA_LOCAL = ZoneInfo(settings.TIME_ZONE)  # America/Lima
+
+# Preset -> días hacia atrás desde hoy (inclusive)
+PRESETS_FECHA = {
+    'hoy': 0,
+    '7dias': 7,
+    'mes': 30,
+}
+
+
+def hoy_local():
+    return timezone.localdate(timezone=ZONA_LOCAL)
+
+
+def inicio_del_dia(dia):
+    """00:00 hora de Lima del día dado, como datetime aware."""
+    return timezone.make_aware(datetime.combine(dia, time.min), ZONA_LOCAL)
+
+
+@dataclass(frozen=True)
+class RangoFechas:
+    desde: Optional[date] = None  # primer día incluido
+    hasta: Optional[date] = None  # último día incluido
+
+    def __bool__(self):
+        return bool(self.desde or self.hasta)
+
+    def filtro(self, campo='fecha_registro'):
+        """kwargs para filtrar un DateTimeField: {campo__gte: inicio, campo__lt: fin}."""
+        filtro = {}
+        if self.desde:
+            filtro[f'{campo}__gte'] = inicio_del_dia(self.desde)
+        if self.hasta:
+            filtro[f'{campo}__lt'] = inicio_del_dia(self.hasta + timedelta(days=1))
+        return filtro
+
+    def filtro_dias(self, campo='dia'):
+        """kwargs para filtrar un DateField ya en hora local (EstadisticaDiaria.dia)."""
+        filtro = {}
+        if self.desde:
+            filtro[f'{campo}__gte'] = self.desde
+        if self.hasta:
+            filtro[f'{campo}__lte'] = self.hasta
+        return filtro
+
+
+def rango_de_preset(preset):
+    if preset not in PRESETS_FECHA:
+        return RangoFechas()
+    hoy = hoy_local()
+    return RangoFechas(desde=hoy - timedelta(days=PRESETS_FECHA[preset]), hasta=hoy)
+
+
+def leer_rango(datos):
+    """
+    Arma el RangoFechas desde request.GET (o un dict de filtros guardado).
+    Las fechas libres 'fecha_desde'/'fecha_hasta' (YYYY-MM-DD) tienen prioridad
+    sobre el preset 'rango_fecha'; una fecha mal escrita se ignora.
+    """
+    try:
+        desde = parse_date(datos.get('fecha_desde') or '')
+        hasta = parse_date(datos.get('fecha_hasta') or '')
+    except ValueError:
+        desde = hasta = None
+    if desde or hasta:
+        if desde and hasta and desde > hasta:
+            desde, hasta = hasta, desde
+        return RangoFechas(desde=desde, hasta=hasta)
+    return rango_de_preset(datos.get('rango_fecha') or '')
+
+
+def filtrar_por_fecha(queryset, rango, campo='fecha_registro'):
+    return queryset.filter(**rango.filtro(campo)) if rango else queryset
@@ -64,16 +64,19 @@ class FichaEvaluacionForm(forms.ModelForm):
             field.widget.attrs.update({
                 'class': 'block w-full px-3 py-2 border border-gray-300 rounded-lg shadow-sm focus:ring-indigo-500 focus:border-indigo-500 sm:text-sm'
             })
+        # El __str__ de Provincia/Distrito lee su padre: lo traemos en la misma consulta
+        self.fields['ubigeo_provincia'].queryset = Provincia.objects.select_related('departamento')
+        self.fields['ubigeo_distrito'].queryset = Distrito.objects.select_related('provincia')
         # Lógica de carga para Edición
         if self.instance.pk:
             if self.instance.ubigeo_departamento:
                 # Cargamos las provincias de ese departamento
-                self.fields['ubigeo_provincia'].queryset = Provincia.objects.filter(
+                self.fields['ubigeo_provincia'].queryset = Provincia.objects.select_related('departamento').filter(
                     departamento=self.instance.ubigeo_departamento
                 )
             if self.instance.ubigeo_provincia:
                 # Cargamos los distritos de esa provincia
-                self.fields['ubigeo_distrito'].queryset = Distrito.objects.filter(
+                self.fields['ubigeo_distrito'].queryset = Distrito.objects.select_related('provincia').filter(
                     provincia=self.instance.ubigeo_provincia
                 )
 
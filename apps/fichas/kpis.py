@@ -0,0 +1,42 @@
+"""
+Contadores (KPIs) de fichas por nivel de riesgo.
+"""
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+
+# Llave del contexto -> valor de FichaEvaluacion.nivel_riesgo
+NIVELES_KPI = {
+    'bajo': 'RIESGO BAJO',
+    'moderado': 'RIESGO MODERADO',
+    'severo': 'RIESGO SEVERO',
+    'critico': 'RIESGO CRÍTICO',
+}
+
+
+def resumen_riesgo(queryset):
+    """
+    Devuelve {'total', 'bajo', 'moderado', 'severo', 'critico'} para cualquier
+    queryset de FichaEvaluacion con UNA sola consulta (agregación condicional).
+    """
+    return queryset.order_by().aggregate(
+        total=Count('id'),
+        **{
+            llave: Count('id', filter=Q(nivel_riesgo=nivel))
+            for llave, nivel in NIVELES_KPI.items()
+        }
+    )
+
+
+def resumen_riesgo_diario(estadisticas):
+    """
+    Igual que resumen_riesgo(), pero leyendo la tabla resumen EstadisticaDiaria
+    (ya filtrada por encuestador/días). Su costo depende de días x equipo, no de fichas.
+    """
+    return estadisticas.order_by().aggregate(
+        total=Coalesce(Sum('cantidad'), 0),
+        **{
+            llave: Coalesce(Sum('cantidad', filter=Q(nivel_riesgo=nivel)), 0)
+            for llave, nivel in NIVELES_KPI.items()
+        }
+    )
+
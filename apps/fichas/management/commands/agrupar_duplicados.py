@@ -0,0 +1,131 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from django.utils import timezone
+
+from apps.fichas.duplicados import claves_de, _criterio
+from apps.fichas.models import FichaEvaluacion
+from apps.fichas.paginacion import lotes_por_cursor
+
+# Filas por consulta del recorrido y por UPDATE al corregir claves
+TAMANO_LOTE = 2000
+
+
+class Command(BaseCommand):
+    help = (
+        'Agrupa las fichas que parecen del mismo estudiante dentro de cada institución '
+        '(mismo DNI normalizado, o mismo nombre normalizado y fecha de nacimiento) y corrige '
+        'las claves normalizadas desactualizadas. La tabla se recorre una vez en lotes por id; '
+        'las claves repetidas las encuentra la base con GROUP BY sobre los índices.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--institucion', type=int, help='Solo fichas de esta institución (id)')
+        parser.add_argument('--limite', type=int, default=50, help='Grupos a listar, los más grandes primero (default: 50)')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Solo reporta: no corrige las claves guardadas (los grupos usan las claves actuales)',
+        )
+
+    def corregir_claves(self, fichas, dry_run):
+        """Recalcula las claves lote por lote y guarda las que cambiaron. Retorna cuántas."""
+        total = 0
+        filas = fichas.values(
+            'id', 'dni_evaluado', 'nombres_evaluado', 'apellidos_evaluado', 'dni_normalizado', 'nombre_normalizado',
+        )
+        for lote in lotes_por_cursor(filas, tamano=TAMANO_LOTE):
+            corregir = []
+            for f in lote:
+                dni_norm, nombre_norm = claves_de(f['dni_evaluado'], f['nombres_evaluado'], f['apellidos_evaluado'])
+                if (dni_norm, nombre_norm) != (f['dni_normalizado'], f['nombre_normalizado']):
+                    corregir.append(FichaEvaluacion(pk=f['id'], dni_normalizado=dni_norm, nombre_normalizado=nombre_norm))
+            if corregir and not dry_run:
+                FichaEvaluacion.objects.bulk_update(corregir, ['dni_normalizado', 'nombre_normalizado'])
+            total += len(corregir)
+        return total
+
+    def claves_repetidas(self, fichas):
+        """{institucion_id: (dnis, {(nombre, nacimiento)})} de las claves con más de una ficha."""
+        repetidas = {}
+        for institucion_id, dni in (
+            fichas.exclude(dni_normalizado='').order_by()
+            .values('institucion_id', 'dni_normalizado').annotate(n=Count('id')).filter(n__gt=1)
+            .values_list('institucion_id', 'dni_normalizado')
+        ):
+            repetidas.setdefault(institucion_id, (set(), set()))[0].add(dni)
+        for institucion_id, nombre, nacimiento in (
+            fichas.exclude(nombre_normalizado='').filter(fecha_nacimiento__isnull=False).order_by()
+            .values('institucion_id', 'nombre_normalizado', 'fecha_nacimiento').annotate(n=Count('id')).filter(n__gt=1)
+            .values_list('institucion_id', 'nombre_normalizado', 'fecha_nacimiento')
+        ):
+            repetidas.setdefault(institucion_id, (set(), set()))[1].add((nombre, nacimiento))
+        return repetidas
+
+    def agrupar(self, fichas):
+        """
+        Union-find solo sobre las fichas que comparten alguna clave repetida: en
+        memoria quedan los duplicados, no la tabla. Retorna la lista de grupos (ids).
+        """
+        padre = {}
+
+        def raiz(pk):
+            while padre[pk] != pk:
+                padre[pk] = padre[padre[pk]]
+                pk = padre[pk]
+            return pk
+
+        for institucion_id, (dnis, nombres) in self.claves_repetidas(fichas).items():
+            primera = {}
+            # Una consulta por institución con sus dos índices (ver duplicados._criterio)
+            for pk, dni, nombre, nacimiento in fichas.filter(
+                _criterio(institucion_id, dnis, {n for n, _ in nombres})
+            ).order_by('id').values_list('id', 'dni_normalizado', 'nombre_normalizado', 'fecha_nacimiento'):
+                claves = []
+                if dni in dnis:
+                    claves.append(('dni', dni))
+                if (nombre, nacimiento) in nombres:
+                    claves.append(('nombre', nombre, nacimiento))
+                for clave in claves:
+                    otra = primera.setdefault(clave, pk)
+                    padre.setdefault(pk, pk)
+                    if otra != pk:
+                        padre[raiz(pk)] = raiz(otra)
+
+        grupos = {}
+        for pk in padre:
+            grupos.setdefault(raiz(pk), []).append(pk)
+        return [ids for ids in grupos.values() if len(ids) > 1]
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        fichas = FichaEvaluacion.objects.all()
+        if options['institucion']:
+            fichas = fichas.filter(institucion_id=options['institucion'])
+
+        self.stdout.write('--- 🔎 BUSCANDO FICHAS DUPLICADAS ---')
+        corregidas = self.corregir_claves(fichas, options['dry_run'])
+        grupos = self.agrupar(fichas)
+
+        # Los más grandes primero; solo se leen los datos de los grupos que se muestran
+        grupos.sort(key=lambda ids: (-len(ids), min(ids)))
+        mostrados = [sorted(ids) for ids in grupos[:options['limite']]]
+        datos = FichaEvaluacion.objects.in_bulk(
+            [pk for ids in mostrados for pk in ids],
+        ) if mostrados else {}
+        for ids in mostrados:
+            self.stdout.write(self.style.WARNING(f'▶ Institución {datos[ids[0]].institucion_id}: {len(ids)} fichas'))
+            for pk in ids:
+                ficha = datos[pk]
+                self.stdout.write(
+                    f'    N° {pk:<8} DNI {ficha.dni_evaluado:<10} '
+                    f'{ficha.nombres_evaluado} {ficha.apellidos_evaluado}  ({timezone.localtime(ficha.fecha_registro):%d/%m/%Y})'
+                )
+        if len(grupos) > options['limite']:
+            self.stdout.write(f'... y {len(grupos) - options["limite"]} grupos más (use --limite)')
+
+        accion = 'por corregir (--dry-run)' if options['dry_run'] else 'corregidas'
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {len(grupos)} grupos de posibles duplicados ({sum(len(g) for g in grupos)} fichas) | '
+            f'{corregidas} claves {accion} | {time.perf_counter() - inicio:.2f} s'
+        ))
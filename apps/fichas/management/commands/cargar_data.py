@@ -1,513 +1,676 @@
 from django.core.management.base import BaseCommand
 from django.db import transaction
-from apps.fichas.models import Dimension, Pregunta, Opcion
+from apps.fichas.models import Dimension, Pregunta, Opcion, FichaDetalle
+from apps.fichas.catalogo import invalidar_catalogo
 
-class Command(BaseCommand):
-    help = 'Carga los datos maestros de la encuesta SIGERS05'
-
-    def handle(self, *args, **kwargs):
-        self.stdout.write(self.style.WARNING('--- 🚀 INICIANDO CARGA DE DATOS SIGERS ---'))
+# Filas por INSERT/UPDATE en las operaciones bulk
+TAMANO_LOTE = 500
 
-        # Estructura completa basada en SIGERS05
-        estructura_encuesta = [
+# Estructura completa basada en SIGERS05
+ESTRUCTURA_ENCUESTA = [
+    {
+        "nombre": "A. SOCIOECONÓMICAS",
+        "descripcion": "Evaluación de ingresos y condiciones de vida.",
+        "orden": 1,
+        "preguntas": [
             {
-                "nombre": "A. SOCIOECONÓMICAS",
-                "descripcion": "Evaluación de ingresos y condiciones de vida.",
                 "orden": 1,
-                "preguntas": [
-                    {
-                        "orden": 1,
-                        "enunciado": "Ingresos familiares mensuales totales:",
-                        "opciones": [
-                            ("Superior a S/. 3,391 o más de 3 salarios mínimos", 0),
-                            ("Entre S/. 2,261 - S/. 3,390 o 2-3 salarios mínimos", 3),
-                            ("Entre S/. 1,131 - S/. 2,260 o 1-2 salarios mínimos", 6),
-                            ("Entre S/. 500 - S/. 1,130 o menos de 1 salario mínimo", 8),
-                            ("Menor a S/. 500", 10),
-                        ]
-                    },
-                    {
-                        "orden": 2,
-                        "enunciado": "Estabilidad laboral de la mamá:",
-                        "opciones": [
-                            ("Trabajo formal estable con beneficios", 0),
-                            ("Trabajo formal temporal", 2),
-                            ("Trabajo informal con cierta estabilidad", 4),
-                            ("Trabajo informal sin estabilidad/subempleo", 6),
-                            ("Sin empleo", 8),
-                        ]
-                    },
-                    {
-                        "orden": 3,
-                        "enunciado": "Estabilidad laboral del papá:",
-                        "opciones": [
-                            ("Trabajo formal estable con beneficios", 0),
-                            ("Trabajo formal temporal", 2),
-                            ("Trabajo informal con cierta estabilidad", 4),
-                            ("Trabajo informal sin estabilidad/subempleo", 6),
-                            ("Sin empleo", 8),
-                        ]
-                    },
-                    {
-                        "orden": 4,
-                        "enunciado": "Número de personas dependientes económicamente:",
-                        "opciones": [
-                            ("Sin dependientes", 0),
-                            ("1-2 dependientes", 2),
-                            ("3-4 dependientes", 4),
-                            ("Más de 4 dependientes", 6),
-                        ]
-                    },
-                    {
-                        "orden": 5,
-                        "enunciado": "Tipo de vivienda:",
-                        "opciones": [
-                            ("Propia, material noble/condiciones óptimas", 0),
-                            ("Alquilada en zona segura, condiciones adecuadas", 2),
-                            ("Prestada/cedida en condiciones aceptables", 3),
-                            ("Alquilada en zona de riesgo", 5),
-                            ("Precaria/invasión/alquiler de cuarto", 8),
-                        ]
-                    },
-                    {
-                        "orden": 6,
-                        "enunciado": "Servicios básicos:",
-                        "opciones": [
-                            ("Acceso completo (agua, luz, desagüe, internet)", 0),
-                            ("Agua, luz, desagüe", 1),
-                            ("Solo agua y luz", 3),
-                            ("Solo agua", 5),
-                            ("Sin acceso a servicios básicos", 8),
-                        ]
-                    },
-                    {
-                        "orden": 7,
-                        "enunciado": "Condiciones de hacinamiento:",
-                        "opciones": [
-                            ("Condiciones óptimas (menos de 2 personas por dormitorio)", 0),
-                            ("Condiciones aceptables (2-3 personas por dormitorio)", 2),
-                            ("Hacinamiento moderado (3-4 personas por dormitorio)", 4),
-                            ("Hacinamiento severo (5-6 personas por dormitorio)", 6),
-                            ("Hacinamiento crítico (más de 6 personas por dormitorio)", 8),
-                        ]
-                    },
-                ]
-            },
-            {
-                "nombre": "B. ESTRUCTURA Y DINÁMICA FAMILIAR",
-                "descripcion": "Funcionalidad y relaciones.",
+                "enunciado": "Ingresos familiares mensuales totales:",
+                "opciones": [
+                    ("Superior a S/. 3,391 o más de 3 salarios mínimos", 0),
+                    ("Entre S/. 2,261 - S/. 3,390 o 2-3 salarios mínimos", 3),
+                    ("Entre S/. 1,131 - S/. 2,260 o 1-2 salarios mínimos", 6),
+                    ("Entre S/. 500 - S/. 1,130 o menos de 1 salario mínimo", 8),
+                    ("Menor a S/. 500", 10),
+                ]
+            },
+            {
                 "orden": 2,
-                "preguntas": [
-                    {
-                        "orden": 8,
-                        "enunciado": "8a. Estoy satisfecho con la ayuda que recibo de mi familia cuando algo me preocupa:",
-                        "opciones": [
-                            ("Siempre", 0), ("Casi siempre", 1), ("Algunas veces", 3), ("Casi nunca", 4), ("Nunca", 5)
-                        ]
-                    },
-                    {
-                        "orden": 9,
-                        "enunciado": "8b. Estoy satisfecho con la forma en que mi familia discute asuntos de interés común y comparte la solución del problema conmigo:",
-                        "opciones": [
-                            ("Siempre", 0), ("Casi siempre", 1), ("Algunas veces", 3), ("Casi nunca", 4), ("Nunca", 5)
-                        ]
-                    },
-                    {
-                        "orden": 10,
-                        "enunciado": "8c. Mi familia acepta mis deseos para promover nuevas actividades o hacer cambios en mi estilo de vida:",
-                        "opciones": [
-                            ("Siempre", 0), ("Casi siempre", 1), ("Algunas veces", 3), ("Casi nunca", 4), ("Nunca", 5)
-                        ]
-                    },
-                    {
-                        "orden": 11,
-                        "enunciado": "8d. Estoy satisfecho con la forma en que mi familia expresa afecto y responde a mis sentimientos de amor y tristeza:",
-                        "opciones": [
-                            ("Siempre", 0), ("Casi siempre", 1), ("Algunas veces", 3), ("Casi nunca", 4), ("Nunca", 5)
-                        ]
-                    },
-                    {
-                        "orden": 12,
-                        "enunciado": "8e. Estoy satisfecho con la cantidad de tiempo que mi familia y yo compartimos:",
-                        "opciones": [
-                            ("Siempre", 0), ("Casi siempre", 1), ("Algunas veces", 3), ("Casi nunca", 4), ("Nunca", 5)
-                        ]
-                    },
-                    {
-                        "orden": 13,
-                        "enunciado": "9. Estructura familiar:",
-                        "opciones": [
-                            ("Familia nuclear completa funcional", 0),
-                            ("Familia monoparental funcional", 1),
-                            ("Familia extendida funcional", 2),
-                            ("Familia reconstituida funcional", 2),
-                            ("Familia nuclear con disfuncionalidades", 4),
-                            ("Familia monoparental con disfuncionalidades moderadas", 5),
-                            ("Familia extendida con disfuncionalidades", 6),
-                            ("Familia reconstituida con disfuncionalidades", 7),
-                            ("Familia monoparental con múltiples carencias", 8),
-                            ("Vive con otros familiares/terceros sin vínculos sólidos", 9),
-                        ]
-                    },
-                    {
-                        "orden": 14,
-                        "enunciado": "10. Relaciones intrafamiliares:",
-                        "opciones": [
-                            ("Comunicación funcional y relaciones simétricas saludables", 0),
-                            ("Comunicación adecuada con complementariedad flexible", 2),
-                            ("Comunicación con dificultades puntuales", 4),
-                            ("Patrones disfuncionales moderados", 5),
-                            ("Comunicación predominantemente patológica", 6),
-                            ("Comunicación gravemente alterada", 8),
-                        ]
-                    },
-                    {
-                        "orden": 15,
-                        "enunciado": "11. Supervisión y cuidado parental:",
-                        "opciones": [
-                            ("Supervisión constante y adecuada para la edad", 0),
-                            ("Supervisión ocasional pero efectiva", 2),
-                            ("Supervisión insuficiente", 4),
-                            ("Supervisión inadecuada o negligente", 6),
-                            ("Ausencia total de supervisión", 8),
-                        ]
-                    },
-                    {
-                        "orden": 16,
-                        "enunciado": "12. Antecedentes de violencia familiar:",
-                        "opciones": [
-                            ("Sin antecedentes de violencia familiar", 0),
-                            ("Antecedentes de violencia superados con intervención exitosa", 1),
-                            ("Violencia verbal/psicológica leve ocasional", 3),
-                            ("Violencia psicológica moderada", 4),
-                            ("Violencia psicológica grave sistemática", 6),
-                            ("Violencia física menor esporádica", 5),
-                            ("Violencia física menor pero recurrente", 7),
-                            ("Violencia física grave sistemática", 10),
-                            ("Violencia económica/patrimonial", 6),
-                            ("Violencia sexual", 10),
-                            ("Combinación de múltiples tipos de violencia", 10),
-                        ]
-                    },
-                    {
-                        "orden": 17,
-                        "enunciado": "13. Distribución de roles y responsabilidades:",
-                        "opciones": [
-                            ("Distribución equilibrada de roles apropiados para la edad", 0),
-                            ("Algunos desequilibrios menores en roles", 2),
-                            ("Distribución desigual de responsabilidades", 4),
-                            ("Roles invertidos, estudiante con responsabilidades de adulto", 6),
-                        ]
-                    },
-                    {
-                        "orden": 18,
-                        "enunciado": "14. Problemas de salud mental en la familia:",
-                        "opciones": [
-                            ("No presenta problemas significativos de salud mental", 0),
-                            ("Estrés/ansiedad leve manejable", 1),
-                            ("Depresión/ansiedad que afecta funcionamiento", 3),
-                            ("Problemas de conducta en algún miembro", 3),
-                            ("Antecedentes de trastornos graves superados", 2),
-                            ("Trastornos mentales severos actuales", 6),
-                            ("Adicciones activas", 7),
-                            ("Antecedentes recientes de intentos de suicidio", 8),
-                            ("Múltiples casos de trastornos mentales graves", 9),
-                            ("Situación crítica de salud mental", 10),
-                        ]
-                    },
-                ]
-            },
-            {
-                "nombre": "C. INDICADORES EDUCATIVOS",
-                "descripcion": "Rendimiento y soporte educativo.",
+                "enunciado": "Estabilidad laboral de la mamá:",
+                "opciones": [
+                    ("Trabajo formal estable con beneficios", 0),
+                    ("Trabajo formal temporal", 2),
+                    ("Trabajo informal con cierta estabilidad", 4),
+                    ("Trabajo informal sin estabilidad/subempleo", 6),
+                    ("Sin empleo", 8),
+                ]
+            },
+            {
                 "orden": 3,
-                "preguntas": [
-                    {
-                        "orden": 19,
-                        "enunciado": "15. Nivel educativo de los padres/cuidadores (Promedio):",
-                        "opciones": [
-                            ("Educación superior completa", 0),
-                            ("Educación superior incompleta/técnica", 1),
-                            ("Secundaria completa", 2),
-                            ("Secundaria incompleta", 3),
-                            ("Primaria completa", 4),
-                            ("Primaria incompleta", 5),
-                            ("Analfabeta", 6),
-                        ]
-                    },
-                    {
-                        "orden": 20,
-                        "enunciado": "16. Rendimiento académico del estudiante:",
-                        "opciones": [
-                            ("Logro destacado/satisfactorio", 0),
-                            ("Buen rendimiento académico", 1),
-                            ("Rendimiento promedio/en proceso", 3),
-                            ("Rendimiento bajo/en inicio", 5),
-                            ("Rendimiento muy bajo con riesgo de deserción/repitencia", 7),
-                        ]
-                    },
-                    {
-                        "orden": 21,
-                        "enunciado": "17a. Asistencia escolar (EBR - Educación Básica Regular):",
-                        "opciones": [
-                            ("Asistencia regular (menos del 5% de faltas)", 0),
-                            ("Ausencias ocasionales (5-10% de faltas)", 2),
-                            ("Faltas frecuentes (11-15% de faltas)", 4),
-                            ("Ausentismo preocupante (16-25% de faltas)", 6),
-                            ("Ausentismo crónico/riesgo de deserción (más del 25%)", 8),
-                        ]
-                    },
-                    {
-                        "orden": 22,
-                        "enunciado": "17b. Asistencia Estudiantes Universitarios:",
-                        "opciones": [
-                            ("Asistencia regular", 0),
-                            ("Ausencias ocasionales", 2),
-                            ("Faltas frecuentes", 4),
-                            ("Riesgo académico por inasistencia", 6),
-                            ("Patrón de deserción intermitente", 7),
-                            ("Alto riesgo de deserción definitiva", 8),
-                        ]
-                    },
-                    {
-                        "orden": 23,
-                        "enunciado": "18. Apoyo familiar en actividades educativas:",
-                        "opciones": [
-                            ("Apoyo constante y participación activa", 0),
-                            ("Apoyo ocasional pero efectivo", 2),
-                            ("Interés limitado o irregular", 3),
-                            ("Apoyo insuficiente", 4),
-                            ("Desinterés total/sin apoyo familiar", 6),
-                        ]
-                    },
-                    {
-                        "orden": 24,
-                        "enunciado": "19a. Espacio físico en el hogar con adecuada iluminación, ventilación y mobiliario:",
-                        "opciones": [
-                            ("Siempre", 0), ("Casi siempre", 1), ("A veces", 2), ("Casi nunca", 3), ("Nunca", 4)
-                        ]
-                    },
-                    {
-                        "orden": 25,
-                        "enunciado": "19b. Material educativo adecuado y oportuno (libros, uniformes, útiles):",
-                        "opciones": [
-                            ("Siempre", 0), ("Casi siempre", 1), ("A veces", 2), ("Casi nunca", 3), ("Nunca", 4)
-                        ]
-                    },
-                    {
-                        "orden": 26,
-                        "enunciado": "19c. Dispositivos electrónicos disponibles en el hogar (Laptop, tablet, celular):",
-                        "opciones": [
-                            ("Siempre", 0), ("Casi siempre", 1), ("A veces", 2), ("Casi nunca", 3), ("Nunca", 4)
-                        ]
-                    },
-                    {
-                        "orden": 27,
-                        "enunciado": "19d. Conexión a internet suficiente en el hogar:",
-                        "opciones": [
-                            ("Siempre", 0), ("Casi siempre", 1), ("A veces", 2), ("Casi nunca", 3), ("Nunca", 4)
-                        ]
-                    },
-                ]
-            },
-            {
-                "nombre": "D. PSICOSOCIALES",
-                "descripcion": "Estado emocional y conductual.",
+                "enunciado": "Estabilidad laboral del papá:",
+                "opciones": [
+                    ("Trabajo formal estable con beneficios", 0),
+                    ("Trabajo formal temporal", 2),
+                    ("Trabajo informal con cierta estabilidad", 4),
+                    ("Trabajo informal sin estabilidad/subempleo", 6),
+                    ("Sin empleo", 8),
+                ]
+            },
+            {
                 "orden": 4,
-                "preguntas": [
-                    {
-                        "orden": 28,
-                        "enunciado": "20. Estado emocional del estudiante:",
-                        "opciones": [
-                            ("Estable y adecuado para la edad", 0),
-                            ("Tristeza/ansiedad ocasional normal", 2),
-                            ("Cambios emocionales frecuentes", 4),
-                            ("Síntomas depresivos/ansiosos persistentes", 6),
-                            ("Indicadores de riesgo emocional severo", 8),
-                        ]
-                    },
-                    {
-                        "orden": 29,
-                        "enunciado": "21. Comportamiento y habilidades sociales:",
-                        "opciones": [
-                            ("Conducta adecuada, relaciones interpersonales positivas", 0),
-                            ("Participación social y relaciones formales", 2),
-                            ("Problemas leves de conducta/socialización", 3),
-                            ("Conductas disruptivas frecuentes/conflictos con pares", 5),
-                            ("Aislamiento social severo/conductas agresivas", 7),
-                        ]
-                    },
-                    {
-                        "orden": 30,
-                        "enunciado": "22. Participación en actividades escolares/universitarias:",
-                        "opciones": [
-                            ("Participación activa en actividades", 0),
-                            ("Participación ocasional", 1),
-                            ("Participación mínima", 3),
-                            ("No participa/se aísla", 5),
-                        ]
-                    },
-                    {
-                        "orden": 31,
-                        "enunciado": "23. Presencia de conductas de riesgo:",
-                        "opciones": [
-                            ("No presenta conductas de riesgo", 0),
-                            ("Mentiras/faltas menores ocasionales", 2),
-                            ("Conductas desafiantes frecuentes", 4),
-                            ("Conductas autodestructivas/consumo de sustancias", 6),
-                            ("Conductas delictivas/riesgo severo", 8),
-                        ]
-                    },
-                    {
-                        "orden": 32,
-                        "enunciado": "24. Exposición a factores de riesgo del entorno:",
-                        "opciones": [
-                            ("Entorno seguro y protector", 0),
-                            ("Exposición mínima a factores de riesgo", 2),
-                            ("Exposición ocasional a situaciones de riesgo", 4),
-                            ("Entorno de riesgo moderado", 6),
-                            ("Alto riesgo (pandillaje, drogas, violencia)", 8),
-                        ]
-                    },
-                ]
-            },
-            {
-                "nombre": "E. ACCESO A SERVICIOS",
-                "descripcion": "Salud y redes de apoyo.",
+                "enunciado": "Número de personas dependientes económicamente:",
+                "opciones": [
+                    ("Sin dependientes", 0),
+                    ("1-2 dependientes", 2),
+                    ("3-4 dependientes", 4),
+                    ("Más de 4 dependientes", 6),
+                ]
+            },
+            {
                 "orden": 5,
-                "preguntas": [
-                    {
-                        "orden": 33,
-                        "enunciado": "25. Acceso a servicios de salud:",
-                        "opciones": [
-                            ("Acceso completo y oportuno", 0),
-                            ("Acceso a servicios básicos", 2),
-                            ("Acceso limitado, solo emergencias", 4),
-                            ("Sin acceso a servicios de salud", 6),
-                        ]
-                    },
-                    {
-                        "orden": 34,
-                        "enunciado": "26. Seguro de salud:",
-                        "opciones": [
-                            ("Sí (SIS, EsSalud, Fuerzas Armadas, EPS)", 0),
-                            ("No", 4),
-                        ]
-                    },
-                    {
-                        "orden": 35,
-                        "enunciado": "27. Estado de salud general de la familia:",
-                        "opciones": [
-                            ("Estado de salud general bueno", 0),
-                            ("Problemas de salud menores o controlados", 2),
-                            ("Algún miembro con problemas graves", 3),
-                            ("Múltiples miembros con enfermedades crónicas graves", 5),
-                        ]
-                    },
-                    {
-                        "orden": 36,
-                        "enunciado": "28. Participación en programas sociales:",
-                        "opciones": [
-                            ("Sin necesidad de programas sociales", 0),
-                            ("Sin programas pero elegible", 2),
-                            ("Beneficiario de 1-2 programas", 1),
-                            ("Requiere programas pero no accede", 4),
-                            ("Múltiples carencias no atendidas", 5),
-                            ("Beneficiario de múltiples programas por necesidad extrema", 4),
-                        ]
-                    },
-                    {
-                        "orden": 37,
-                        "enunciado": "29. Redes de apoyo social y comunitario:",
-                        "opciones": [
-                            ("Sólidas redes de apoyo", 0),
-                            ("Algunas redes funcionales", 1),
-                            ("Redes limitadas pero funcionales", 2),
-                            ("Redes débiles o conflictivas", 4),
-                            ("Ausencia de redes de apoyo", 6),
-                        ]
-                    },
-                ]
-            },
-            {
-                "nombre": "F. FACTORES PROTECTORES",
-                "descripcion": "Puntos que restan riesgo.",
+                "enunciado": "Tipo de vivienda:",
+                "opciones": [
+                    ("Propia, material noble/condiciones óptimas", 0),
+                    ("Alquilada en zona segura, condiciones adecuadas", 2),
+                    ("Prestada/cedida en condiciones aceptables", 3),
+                    ("Alquilada en zona de riesgo", 5),
+                    ("Precaria/invasión/alquiler de cuarto", 8),
+                ]
+            },
+            {
                 "orden": 6,
-                "preguntas": [
-                    {
-                        "orden": 38,
-                        "enunciado": "30. Participación en organizaciones/actividades comunitarias:",
-                        "opciones": [
-                            ("Liderazgo activo", -3),
-                            ("Participación activa", -2),
-                            ("Participación ocasional/mínima", 0),
-                            ("Sin participación", 1),
-                        ]
-                    },
-                    {
-                        "orden": 39,
-                        "enunciado": "31. Prácticas religiosas/espirituales como soporte:",
-                        "opciones": [
-                            ("Prácticas regulares que brindan soporte", -2),
-                            ("Prácticas ocasionales", -1),
-                            ("Sin prácticas que brinden soporte", 0),
-                        ]
-                    },
-                    {
-                        "orden": 40,
-                        "enunciado": "32. Proyectos de vida y resiliencia familiar:",
-                        "opciones": [
-                            ("Proyectos claros, alta resiliencia", -3),
-                            ("Algunos proyectos, buena adaptación", -2),
-                            ("Proyectos vagos o poco realizables", 0),
-                            ("Sin proyectos claros, baja capacidad", 2),
-                        ]
-                    },
-                    {
-                        "orden": 41,
-                        "enunciado": "33. Apoyo profesional actual:",
-                        "opciones": [
-                            ("Apoyo integral de múltiples profesionales", -3),
-                            ("Apoyo profesional adecuado", -2),
-                            ("Apoyo insuficiente", 1),
-                            ("Sin apoyo profesional necesario", 3),
-                        ]
-                    },
-                ]
-            }
+                "enunciado": "Servicios básicos:",
+                "opciones": [
+                    ("Acceso completo (agua, luz, desagüe, internet)", 0),
+                    ("Agua, luz, desagüe", 1),
+                    ("Solo agua y luz", 3),
+                    ("Solo agua", 5),
+                    ("Sin acceso a servicios básicos", 8),
+                ]
+            },
+            {
+                "orden": 7,
+                "enunciado": "Condiciones de hacinamiento:",
+                "opciones": [
+                    ("Condiciones óptimas (menos de 2 personas por dormitorio)", 0),
+                    ("Condiciones aceptables (2-3 personas por dormitorio)", 2),
+                    ("Hacinamiento moderado (3-4 personas por dormitorio)", 4),
+                    ("Hacinamiento severo (5-6 personas por dormitorio)", 6),
+                    ("Hacinamiento crítico (más de 6 personas por dormitorio)", 8),
+                ]
+            },
+        ]
+    },
+    {
+        "nombre": "B. ESTRUCTURA Y DINÁMICA FAMILIAR",
+        "descripcion": "Funcionalidad y relaciones.",
+        "orden": 2,
+        "preguntas": [
+            {
+                "orden": 8,
+                "enunciado": "8a. Estoy satisfecho con la ayuda que recibo de mi familia cuando algo me preocupa:",
+                "opciones": [
+                    ("Siempre", 0), ("Casi siempre", 1), ("Algunas veces", 3), ("Casi nunca", 4), ("Nunca", 5)
+                ]
+            },
+            {
+                "orden": 9,
+                "enunciado": "8b. Estoy satisfecho con la forma en que mi familia discute asuntos de interés común y comparte la solución del problema conmigo:",
+                "opciones": [
+                    ("Siempre", 0), ("Casi siempre", 1), ("Algunas veces", 3), ("Casi nunca", 4), ("Nunca", 5)
+                ]
+            },
+            {
+                "orden": 10,
+                "enunciado": "8c. Mi familia acepta mis deseos para promover nuevas actividades o hacer cambios en mi estilo de vida:",
+                "opciones": [
+                    ("Siempre", 0), ("Casi siempre", 1), ("Algunas veces", 3), ("Casi nunca", 4), ("Nunca", 5)
+                ]
+            },
+            {
+                "orden": 11,
+                "enunciado": "8d. Estoy satisfecho con la forma en que mi familia expresa afecto y responde a mis sentimientos de amor y tristeza:",
+                "opciones": [
+                    ("Siempre", 0), ("Casi siempre", 1), ("Algunas veces", 3), ("Casi nunca", 4), ("Nunca", 5)
+                ]
+            },
+            {
+                "orden": 12,
+                "enunciado": "8e. Estoy satisfecho con la cantidad de tiempo que mi familia y yo compartimos:",
+                "opciones": [
+                    ("Siempre", 0), ("Casi siempre", 1), ("Algunas veces", 3), ("Casi nunca", 4), ("Nunca", 5)
+                ]
+            },
+            {
+                "orden": 13,
+                "enunciado": "9. Estructura familiar:",
+                "opciones": [
+                    ("Familia nuclear completa funcional", 0),
+                    ("Familia monoparental funcional", 1),
+                    ("Familia extendida funcional", 2),
+                    ("Familia reconstituida funcional", 2),
+                    ("Familia nuclear con disfuncionalidades", 4),
+                    ("Familia monoparental con disfuncionalidades moderadas", 5),
+                    ("Familia extendida con disfuncionalidades", 6),
+                    ("Familia reconstituida con disfuncionalidades", 7),
+                    ("Familia monoparental con múltiples carencias", 8),
+                    ("Vive con otros familiares/terceros sin vínculos sólidos", 9),
+                ]
+            },
+            {
+                "orden": 14,
+                "enunciado": "10. Relaciones intrafamiliares:",
+                "opciones": [
+                    ("Comunicación funcional y relaciones simétricas saludables", 0),
+                    ("Comunicación adecuada con complementariedad flexible", 2),
+                    ("Comunicación con dificultades puntuales", 4),
+                    ("Patrones disfuncionales moderados", 5),
+                    ("Comunicación predominantemente patológica", 6),
+                    ("Comunicación gravemente alterada", 8),
+                ]
+            },
+            {
+                "orden": 15,
+                "enunciado": "11. Supervisión y cuidado parental:",
+                "opciones": [
+                    ("Supervisión constante y adecuada para la edad", 0),
+                    ("Supervisión ocasional pero efectiva", 2),
+                    ("Supervisión insuficiente", 4),
+                    ("Supervisión inadecuada o negligente", 6),
+                    ("Ausencia total de supervisión", 8),
+                ]
+            },
+            {
+                "orden": 16,
+                "enunciado": "12. Antecedentes de violencia familiar:",
+                "opciones": [
+                    ("Sin antecedentes de violencia familiar", 0),
+                    ("Antecedentes de violencia superados con intervención exitosa", 1),
+                    ("Violencia verbal/psicológica leve ocasional", 3),
+                    ("Violencia psicológica moderada", 4),
+                    ("Violencia psicológica grave sistemática", 6),
+                    ("Violencia física menor esporádica", 5),
+                    ("Violencia física menor pero recurrente", 7),
+                    ("Violencia física grave sistemática", 10),
+                    ("Violencia económica/patrimonial", 6),
+                    ("Violencia sexual", 10),
+                    ("Combinación de múltiples tipos de violencia", 10),
+                ]
+            },
+            {
+                "orden": 17,
+                "enunciado": "13. Distribución de roles y responsabilidades:",
+                "opciones": [
+                    ("Distribución equilibrada de roles apropiados para la edad", 0),
+                    ("Algunos desequilibrios menores en roles", 2),
+                    ("Distribución desigual de responsabilidades", 4),
+                    ("Roles invertidos, estudiante con responsabilidades de adulto", 6),
+                ]
+            },
+            {
+                "orden": 18,
+                "enunciado": "14. Problemas de salud mental en la familia:",
+                "opciones": [
+                    ("No presenta problemas significativos de salud mental", 0),
+                    ("Estrés/ansiedad leve manejable", 1),
+                    ("Depresión/ansiedad que afecta funcionamiento", 3),
+                    ("Problemas de conducta en algún miembro", 3),
+                    ("Antecedentes de trastornos graves superados", 2),
+                    ("Trastornos mentales severos actuales", 6),
+                    ("Adicciones activas", 7),
+                    ("Antecedentes recientes de intentos de suicidio", 8),
+                    ("Múltiples casos de trastornos mentales graves", 9),
+                    ("Situación crítica de salud mental", 10),
+                ]
+            },
         ]
+    },
+    {
+        "nombre": "C. INDICADORES EDUCATIVOS",
+        "descripcion": "Rendimiento y soporte educativo.",
+        "orden": 3,
+        "preguntas": [
+            {
+                "orden": 19,
+                "enunciado": "15. Nivel educativo de los padres/cuidadores (Promedio):",
+                "opciones": [
+                    ("Educación superior completa", 0),
+                    ("Educación superior incompleta/técnica", 1),
+                    ("Secundaria completa", 2),
+                    ("Secundaria incompleta", 3),
+                    ("Primaria completa", 4),
+                    ("Primaria incompleta", 5),
+                    ("Analfabeta", 6),
+                ]
+            },
+            {
+                "orden": 20,
+                "enunciado": "16. Rendimiento académico del estudiante:",
+                "opciones": [
+                    ("Logro destacado/satisfactorio", 0),
+                    ("Buen rendimiento académico", 1),
+                    ("Rendimiento promedio/en proceso", 3),
+                    ("Rendimiento bajo/en inicio", 5),
+                    ("Rendimiento muy bajo con riesgo de deserción/repitencia", 7),
+                ]
+            },
+            {
+                "orden": 21,
+                "enunciado": "17a. Asistencia escolar (EBR - Educación Básica Regular):",
+                "opciones": [
+                    ("Asistencia regular (menos del 5% de faltas)", 0),
+                    ("Ausencias ocasionales (5-10% de faltas)", 2),
+                    ("Faltas frecuentes (11-15% de faltas)", 4),
+                    ("Ausentismo preocupante (16-25% de faltas)", 6),
+                    ("Ausentismo crónico/riesgo de deserción (más del 25%)", 8),
+                ]
+            },
+            {
+                "orden": 22,
+                "enunciado": "17b. Asistencia Estudiantes Universitarios:",
+                "opciones": [
+                    ("Asistencia regular", 0),
+                    ("Ausencias ocasionales", 2),
+                    ("Faltas frecuentes", 4),
+                    ("Riesgo académico por inasistencia", 6),
+                    ("Patrón de deserción intermitente", 7),
+                    ("Alto riesgo de deserción definitiva", 8),
+                ]
+            },
+            {
+                "orden": 23,
+                "enunciado": "18. Apoyo familiar en actividades educativas:",
+                "opciones": [
+                    ("Apoyo constante y participación activa", 0),
+                    ("Apoyo ocasional pero efectivo", 2),
+                    ("Interés limitado o irregular", 3),
+                    ("Apoyo insuficiente", 4),
+                    ("Desinterés total/sin apoyo familiar", 6),
+                ]
+            },
+            {
+                "orden": 24,
+                "enunciado": "19a. Espacio físico en el hogar con adecuada iluminación, ventilación y mobiliario:",
+                "opciones": [
+                    ("Siempre", 0), ("Casi siempre", 1), ("A veces", 2), ("Casi nunca", 3), ("Nunca", 4)
+                ]
+            },
+            {
+                "orden": 25,
+                "enunciado": "19b. Material educativo adecuado y oportuno (libros, uniformes, útiles):",
+                "opciones": [
+                    ("Siempre", 0), ("Casi siempre", 1), ("A veces", 2), ("Casi nunca", 3), ("Nunca", 4)
+                ]
+            },
+            {
+                "orden": 26,
+                "enunciado": "19c. Dispositivos electrónicos disponibles en el hogar (Laptop, tablet, celular):",
+                "opciones": [
+                    ("Siempre", 0), ("Casi siempre", 1), ("A veces", 2), ("Casi nunca", 3), ("Nunca", 4)
+                ]
+            },
+            {
+                "orden": 27,
+                "enunciado": "19d. Conexión a internet suficiente en el hogar:",
+                "opciones": [
+                    ("Siempre", 0), ("Casi siempre", 1), ("A veces", 2), ("Casi nunca", 3), ("Nunca", 4)
+                ]
+            },
+        ]
+    },
+    {
+        "nombre": "D. PSICOSOCIALES",
+        "descripcion": "Estado emocional y conductual.",
+        "orden": 4,
+        "preguntas": [
+            {
+                "orden": 28,
+                "enunciado": "20. Estado emocional del estudiante:",
+                "opciones": [
+                    ("Estable y adecuado para la edad", 0),
+                    ("Tristeza/ansiedad ocasional normal", 2),
+                    ("Cambios emocionales frecuentes", 4),
+                    ("Síntomas depresivos/ansiosos persistentes", 6),
+                    ("Indicadores de riesgo emocional severo", 8),
+                ]
+            },
+            {
+                "orden": 29,
+                "enunciado": "21. Comportamiento y habilidades sociales:",
+                "opciones": [
+                    ("Conducta adecuada, relaciones interpersonales positivas", 0),
+                    ("Participación social y relaciones formales", 2),
+                    ("Problemas leves de conducta/socialización", 3),
+                    ("Conductas disruptivas frecuentes/conflictos con pares", 5),
+                    ("Aislamiento social severo/conductas agresivas", 7),
+                ]
+            },
+            {
+                "orden": 30,
+                "enunciado": "22. Participación en actividades escolares/universitarias:",
+                "opciones": [
+                    ("Participación activa en actividades", 0),
+                    ("Participación ocasional", 1),
+                    ("Participación mínima", 3),
+                    ("No participa/se aísla", 5),
+                ]
+            },
+            {
+                "orden": 31,
+                "enunciado": "23. Presencia de conductas de riesgo:",
+                "opciones": [
+                    ("No presenta conductas de riesgo", 0),
+                    ("Mentiras/faltas menores ocasionales", 2),
+                    ("Conductas desafiantes frecuentes", 4),
+                    ("Conductas autodestructivas/consumo de sustancias", 6),
+                    ("Conductas delictivas/riesgo severo", 8),
+                ]
+            },
+            {
+                "orden": 32,
+                "enunciado": "24. Exposición a factores de riesgo del entorno:",
+                "opciones": [
+                    ("Entorno seguro y protector", 0),
+                    ("Exposición mínima a factores de riesgo", 2),
+                    ("Exposición ocasional a situaciones de riesgo", 4),
+                    ("Entorno de riesgo moderado", 6),
+                    ("Alto riesgo (pandillaje, drogas, violencia)", 8),
+                ]
+            },
+        ]
+    },
+    {
+        "nombre": "E. ACCESO A SERVICIOS",
+        "descripcion": "Salud y redes de apoyo.",
+        "orden": 5,
+        "preguntas": [
+            {
+                "orden": 33,
+                "enunciado": "25. Acceso a servicios de salud:",
+                "opciones": [
+                    ("Acceso completo y oportuno", 0),
+                    ("Acceso a servicios básicos", 2),
+                    ("Acceso limitado, solo emergencias", 4),
+                    ("Sin acceso a servicios de salud", 6),
+                ]
+            },
+            {
+                "orden": 34,
+                "enunciado": "26. Seguro de salud:",
+                "opciones": [
+                    ("Sí (SIS, EsSalud, Fuerzas Armadas, EPS)", 0),
+                    ("No", 4),
+                ]
+            },
+            {
+                "orden": 35,
+                "enunciado": "27. Estado de salud general de la familia:",
+                "opciones": [
+                    ("Estado de salud general bueno", 0),
+                    ("Problemas de salud menores o controlados", 2),
+                    ("Algún miembro con problemas graves", 3),
+                    ("Múltiples miembros con enfermedades crónicas graves", 5),
+                ]
+            },
+            {
+                "orden": 36,
+                "enunciado": "28. Participación en programas sociales:",
+                "opciones": [
+                    ("Sin necesidad de programas sociales", 0),
+                    ("Sin programas pero elegible", 2),
+                    ("Beneficiario de 1-2 programas", 1),
+                    ("Requiere programas pero no accede", 4),
+                    ("Múltiples carencias no atendidas", 5),
+                    ("Beneficiario de múltiples programas por necesidad extrema", 4),
+                ]
+            },
+            {
+                "orden": 37,
+                "enunciado": "29. Redes de apoyo social y comunitario:",
+                "opciones": [
+                    ("Sólidas redes de apoyo", 0),
+                    ("Algunas redes funcionales", 1),
+                    ("Redes limitadas pero funcionales", 2),
+                    ("Redes débiles o conflictivas", 4),
+                    ("Ausencia de redes de apoyo", 6),
+                ]
+            },
+        ]
+    },
+    {
+        "nombre": "F. FACTORES PROTECTORES",
+        "descripcion": "Puntos que restan riesgo.",
+        "orden": 6,
+        "preguntas": [
+            {
+                "orden": 38,
+                "enunciado": "30. Participación en organizaciones/actividades comunitarias:",
+                "opciones": [
+                    ("Liderazgo activo", -3),
+                    ("Participación activa", -2),
+                    ("Participación ocasional/mínima", 0),
+                    ("Sin participación", 1),
+                ]
+            },
+            {
+                "orden": 39,
+                "enunciado": "31. Prácticas religiosas/espirituales como soporte:",
+                "opciones": [
+                    ("Prácticas regulares que brindan soporte", -2),
+                    ("Prácticas ocasionales", -1),
+                    ("Sin prácticas que brinden soporte", 0),
+                ]
+            },
+            {
+                "orden": 40,
+                "enunciado": "32. Proyectos de vida y resiliencia familiar:",
+                "opciones": [
+                    ("Proyectos claros, alta resiliencia", -3),
+                    ("Algunos proyectos, buena adaptación", -2),
+                    ("Proyectos vagos o poco realizables", 0),
+                    ("Sin proyectos claros, baja capacidad", 2),
+                ]
+            },
+            {
+                "orden": 41,
+                "enunciado": "33. Apoyo profesional actual:",
+                "opciones": [
+                    ("Apoyo integral de múltiples profesionales", -3),
+                    ("Apoyo profesional adecuado", -2),
+                    ("Apoyo insuficiente", 1),
+                    ("Sin apoyo profesional necesario", 3),
+                ]
+            },
+        ]
+    }
+]
+
+
+class Plan:
+    """
+    Diferencia entre ESTRUCTURA_ENCUESTA y la base de datos.
+
+    Identidad de cada registro (lo que se conserva entre cargas):
+      - Dimensión: por nombre.
+      - Pregunta: por enunciado dentro de su dimensión; si el enunciado cambió,
+        por su número de orden (se corrige el texto y se conserva el id).
+      - Opción: por texto dentro de su pregunta (se actualiza solo el puntaje).
+    Así los ids de las opciones ya respondidas nunca cambian.
+    """
+
+    def __init__(self):
+        self.dimensiones_nuevas = []       # Dimension sin guardar
+        self.dimensiones_cambiadas = []    # Dimension con campos corregidos
+        self.preguntas_nuevas = []         # (nombre_dimension, Pregunta sin dimension, [(texto, puntaje)])
+        self.preguntas_cambiadas = []
+        self.opciones_nuevas = []          # Opcion de preguntas que ya existen
+        self.opciones_cambiadas = []
+        self.opciones_sobrantes = []       # Opcion que ya no está en la estructura
+        self.detalle = []                  # líneas legibles para --dry-run
+
+    def hay_cambios(self):
+        return any([
+            self.dimensiones_nuevas, self.dimensiones_cambiadas,
+            self.preguntas_nuevas, self.preguntas_cambiadas,
+            self.opciones_nuevas, self.opciones_cambiadas, self.opciones_sobrantes,
+        ])
+
+
+def _corregir(objeto, valores):
+    """Asigna los valores que difieren; retorna True si hubo alguno."""
+    cambio = False
+    for campo, valor in valores.items():
+        if getattr(objeto, campo) != valor:
+            setattr(objeto, campo, valor)
+            cambio = True
+    return cambio
+
+
+def calcular_plan(estructura):
+    """Lee el banco actual en tres consultas y arma el Plan (no escribe nada)."""
+    plan = Plan()
+
+    dimensiones = {d.nombre: d for d in Dimension.objects.all()}
+    preguntas_por_dimension = {}
+    for pregunta in Pregunta.objects.order_by('id'):
+        preguntas_por_dimension.setdefault(pregunta.dimension_id, []).append(pregunta)
+    opciones_por_pregunta = {}
+    for opcion in Opcion.objects.order_by('id'):
+        opciones_por_pregunta.setdefault(opcion.pregunta_id, []).append(opcion)
+
+    for dim_data in estructura:
+        valores_dim = {'descripcion': dim_data['descripcion'], 'orden': dim_data['orden']}
+        dimension = dimensiones.get(dim_data['nombre'])
+
+        if dimension is None:
+            plan.dimensiones_nuevas.append(Dimension(nombre=dim_data['nombre'], **valores_dim))
+            plan.detalle.append(f"+ Dimensión '{dim_data['nombre']}'")
+            existentes = []
+        else:
+            if _corregir(dimension, valores_dim):
+                plan.dimensiones_cambiadas.append(dimension)
+                plan.detalle.append(f"~ Dimensión '{dimension.nombre}'")
+            existentes = preguntas_por_dimension.get(dimension.pk, [])
+
+        por_enunciado = {p.enunciado: p for p in existentes}
+        libres = [p for p in existentes if p.enunciado not in {d['enunciado'] for d in dim_data['preguntas']}]
+
+        for preg_data in dim_data['preguntas']:
+            pregunta = por_enunciado.get(preg_data['enunciado'])
+            if pregunta is None:
+                pregunta = next((p for p in libres if p.orden == preg_data['orden']), None)
+                if pregunta is not None:
+                    libres.remove(pregunta)
+
+            if pregunta is None:
+                plan.preguntas_nuevas.append((
+                    dim_data['nombre'],
+                    Pregunta(enunciado=preg_data['enunciado'], orden=preg_data['orden']),
+                    preg_data['opciones'],
+                ))
+                plan.detalle.append(
+                    f"+ Pregunta {preg_data['orden']} '{preg_data['enunciado'][:50]}' ({len(preg_data['opciones'])} opciones)"
+                )
+                continue
+
+            if _corregir(pregunta, {'enunciado': preg_data['enunciado'], 'orden': preg_data['orden']}):
+                plan.preguntas_cambiadas.append(pregunta)
+                plan.detalle.append(f"~ Pregunta {pregunta.orden} '{pregunta.enunciado[:50]}'")
+
+            opciones = {o.texto: o for o in opciones_por_pregunta.get(pregunta.pk, [])}
+            for texto, puntaje in preg_data['opciones']:
+                opcion = opciones.pop(texto, None)
+                if opcion is None:
+                    plan.opciones_nuevas.append(Opcion(pregunta_id=pregunta.pk, texto=texto, puntaje=puntaje))
+                    plan.detalle.append(f"  + Opción '{texto}' ({puntaje} pts) en pregunta {pregunta.orden}")
+                elif _corregir(opcion, {'puntaje': puntaje}):
+                    plan.opciones_cambiadas.append(opcion)
+                    plan.detalle.append(f"  ~ Opción '{texto}' -> {puntaje} pts en pregunta {pregunta.orden}")
+            for opcion in opciones.values():
+                plan.opciones_sobrantes.append(opcion)
+                plan.detalle.append(f"  - Opción '{opcion.texto}' en pregunta {pregunta.orden}")
+
+    return plan
+
+
+def aplicar_plan(plan):
+    """
+    Escribe el Plan con operaciones bulk (cantidad de consultas constante).
+    Las opciones sobrantes que ya tienen respuestas se conservan (PROTECT);
+    retorna cuántas quedaron así.
+    """
+    Dimension.objects.bulk_create(plan.dimensiones_nuevas, batch_size=TAMANO_LOTE)
+    Dimension.objects.bulk_update(plan.dimensiones_cambiadas, ['descripcion', 'orden'], batch_size=TAMANO_LOTE)
+
+    if plan.preguntas_nuevas:
+        # bulk_create no devuelve ids en todos los motores (MySQL): releemos por nombre
+        ids_dimension = dict(Dimension.objects.values_list('nombre', 'id'))
+        nuevas = []
+        for nombre_dimension, pregunta, _ in plan.preguntas_nuevas:
+            pregunta.dimension_id = ids_dimension[nombre_dimension]
+            nuevas.append(pregunta)
+        Pregunta.objects.bulk_create(nuevas, batch_size=TAMANO_LOTE)
+
+        ids_pregunta = {
+            (dimension_id, enunciado): pk
+            for pk, dimension_id, enunciado in Pregunta.objects.values_list('id', 'dimension_id', 'enunciado')
+        }
+        for _, pregunta, opciones in plan.preguntas_nuevas:
+            pregunta_id = ids_pregunta[(pregunta.dimension_id, pregunta.enunciado)]
+            plan.opciones_nuevas.extend(
+                Opcion(pregunta_id=pregunta_id, texto=texto, puntaje=puntaje) for texto, puntaje in opciones
+            )
+
+    Pregunta.objects.bulk_update(plan.preguntas_cambiadas, ['enunciado', 'orden'], batch_size=TAMANO_LOTE)
+    Opcion.objects.bulk_create(plan.opciones_nuevas, batch_size=TAMANO_LOTE)
+    Opcion.objects.bulk_update(plan.opciones_cambiadas, ['puntaje'], batch_size=TAMANO_LOTE)
+
+    protegidas = 0
+    if plan.opciones_sobrantes:
+        ids_sobrantes = [o.pk for o in plan.opciones_sobrantes]
+        respondidas = set(
+            FichaDetalle.objects.filter(opcion_seleccionada_id__in=ids_sobrantes)
+            .values_list('opcion_seleccionada_id', flat=True).distinct()
+        )
+        Opcion.objects.filter(pk__in=set(ids_sobrantes) - respondidas).delete()
+        protegidas = len(respondidas)
+
+    return protegidas
+
+
+class Command(BaseCommand):
+    help = (
+        'Carga o actualiza los datos maestros de la encuesta SIGERS05. '
+        'Solo aplica la diferencia con la base de datos y conserva los ids de las opciones.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Muestra el plan de cambios sin escribir nada')
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.WARNING('--- 🚀 INICIANDO CARGA DE DATOS SIGERS ---'))
 
         try:
             with transaction.atomic():
-                for dim_data in estructura_encuesta:
-                    dimension, created = Dimension.objects.get_or_create(
-                        nombre=dim_data["nombre"],
-                        defaults={
-                            "descripcion": dim_data["descripcion"],
-                            "orden": dim_data["orden"]
-                        }
-                    )
-                    
-                    self.stdout.write(self.style.SUCCESS(f'Procesando: {dimension.nombre}'))
-
-                    for preg_data in dim_data["preguntas"]:
-                        pregunta, created_preg = Pregunta.objects.get_or_create(
-                            enunciado=preg_data["enunciado"],
-                            dimension=dimension,
-                            defaults={"orden": preg_data["orden"]}
-                        )
-                        
-                        if not created_preg:
-                            pregunta.opciones.all().delete()
-                            
-                        for texto_opcion, puntaje in preg_data["opciones"]:
-                            Opcion.objects.create(
-                                pregunta=pregunta,
-                                texto=texto_opcion,
-                                puntaje=puntaje
-                            )
-            
+                plan = calcular_plan(ESTRUCTURA_ENCUESTA)
+
+                self.stdout.write(
+                    f"Dimensiones: {len(plan.dimensiones_nuevas)} nuevas, {len(plan.dimensiones_cambiadas)} actualizadas\n"
+                    f"Preguntas:   {len(plan.preguntas_nuevas)} nuevas, {len(plan.preguntas_cambiadas)} actualizadas\n"
+                    f"Opciones:    {len(plan.opciones_nuevas)} nuevas (en preguntas existentes), "
+                    f"{len(plan.opciones_cambiadas)} actualizadas, {len(plan.opciones_sobrantes)} sobrantes"
+                )
+
+                if options['dry_run']:
+                    for linea in plan.detalle:
+                        self.stdout.write(linea)
+                    self.stdout.write(self.style.WARNING('🔎 Modo --dry-run: no se escribió nada.'))
+                    return
+
+                if not plan.hay_cambios():
+                    self.stdout.write(self.style.SUCCESS('✅ El banco de preguntas ya está al día.'))
+                    return
+
+                protegidas = aplicar_plan(plan)
+
+                # Los workers en ejecución recargan el catálogo en su próximo request
+                invalidar_catalogo()
+
+            if protegidas:
+                self.stdout.write(self.style.WARNING(
+                    f'⚠️ {protegidas} opción(es) sobrante(s) se conservaron porque ya tienen respuestas registradas.'
+                ))
             self.stdout.write(self.style.SUCCESS('✅ ¡CARGA EXITOSA! Base de datos poblada correctamente.'))
 
         except Exception as e:
-            self.stdout.write(self.style.ERROR(f'❌ ERROR: {e}'))
\ No newline at end of file
+            self.stdout.write(self.style.ERROR(f'❌ ERROR: {e}'))
@@ -0,0 +1,105 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from apps.fichas.models import FichaEvaluacion, FichaDetalle
+from apps.fichas.busqueda import filtrar_por_dni
+from apps.fichas.filtros import rango_de_preset
+
+
+class Command(BaseCommand):
+    help = (
+        'Muestra el plan (EXPLAIN) y el tiempo de las consultas frecuentes de listados y dashboards. '
+        'Para comparar con/sin índices: ejecutar normal y luego con --sin-indices.'
+    )
+
+    # Marca para deshacer la transacción de --sin-indices después de medir
+    class _Deshacer(Exception):
+        pass
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=20, help='Ejecuciones por consulta para medir (default: 20)')
+        parser.add_argument('--sin-plan', action='store_true', help='Solo tiempos, sin imprimir el EXPLAIN')
+        parser.add_argument(
+            '--sin-indices', action='store_true',
+            help='Mide sin los índices compuestos de FichaEvaluacion: los borra dentro de una transacción '
+                 'que se deshace al terminar (solo motores con DDL transaccional: PostgreSQL, SQLite)',
+        )
+
+    def consultas(self):
+        """Consultas representativas armadas con datos reales de la base."""
+        muestra = (
+            FichaEvaluacion.objects.order_by('-id')
+            .values('id', 'usuario_registra_id', 'usuario_registra__supervisor_asignado_id',
+                    'institucion_id', 'dni_evaluado', 'nivel_riesgo')
+            .first()
+        )
+        if not muestra:
+            return []
+
+        fichas = FichaEvaluacion.objects.all()
+        ultimo_mes = rango_de_preset('mes').filtro()
+        return [
+            ('mis_encuestas (encuestador, más recientes)',
+             fichas.filter(usuario_registra_id=muestra['usuario_registra_id']).order_by('-fecha_registro')[:20]),
+            ('detalle encuestador (rango de fechas)',
+             fichas.filter(usuario_registra_id=muestra['usuario_registra_id'], **ultimo_mes)
+             .order_by('-fecha_registro')),
+            ('listar_mis_fichas (sin filtros)',
+             fichas.order_by('-fecha_registro')[:10]),
+            ('listar_mis_fichas (por institución)',
+             fichas.filter(institucion_id=muestra['institucion_id']).order_by('-fecha_registro')[:10]),
+            ('dashboard supervisor (fichas del equipo)',
+             fichas.filter(usuario_registra__supervisor_asignado_id=muestra['usuario_registra__supervisor_asignado_id'])
+             .order_by('-fecha_registro')[:8]),
+            ('conteo por nivel de riesgo en rango',
+             fichas.filter(nivel_riesgo=muestra['nivel_riesgo'], **ultimo_mes).values('id')),
+            ('búsqueda por DNI (prefijo)',
+             filtrar_por_dni(fichas, muestra['dni_evaluado'][:4]).order_by('-fecha_registro')[:20]),
+            ('respuestas de una ficha (ver/editar)',
+             FichaDetalle.objects.filter(ficha_id=muestra['id']).order_by('pregunta_id')),
+        ]
+
+    def handle(self, *args, **options):
+        if not options['sin_indices']:
+            self.medir(options)
+            return
+
+        # En MySQL el DDL hace commit implícito: el índice borrado no volvería con el rollback
+        if not connection.features.can_rollback_ddl:
+            raise CommandError(
+                f'{connection.vendor} no puede deshacer DDL: use --sin-indices contra una copia '
+                'descartable de la base (nunca contra la de producción).'
+            )
+        try:
+            with transaction.atomic():
+                # DROP INDEX directo: el schema editor de SQLite no se puede abrir dentro de atomic
+                with connection.cursor() as cursor:
+                    for indice in FichaEvaluacion._meta.indexes:
+                        cursor.execute(f'DROP INDEX {connection.ops.quote_name(indice.name)}')
+                self.stdout.write(self.style.WARNING('(sin índices compuestos: se restauran al terminar)'))
+                self.medir(options)
+                raise self._Deshacer
+        except self._Deshacer:
+            pass
+
+    def medir(self, options):
+        self.stdout.write(self.style.WARNING(f'--- 🔎 PLANES DE CONSULTA ({connection.vendor}) ---'))
+
+        consultas = self.consultas()
+        if not consultas:
+            self.stdout.write(self.style.ERROR('❌ No hay fichas registradas para armar las consultas.'))
+            return
+
+        for nombre, queryset in consultas:
+            tiempos = []
+            for _ in range(options['repeticiones']):
+                inicio = time.perf_counter()
+                list(queryset.all())  # .all() clona: evita el caché del queryset
+                tiempos.append(time.perf_counter() - inicio)
+            tiempos.sort()
+            mediana_ms = tiempos[len(tiempos) // 2] * 1000
+
+            self.stdout.write(self.style.SUCCESS(f'\n▶ {nombre}: mediana {mediana_ms:.2f} ms'))
+            if not options['sin_plan']:
+                self.stdout.write(queryset.explain())
@@ -0,0 +1,81 @@
+import copy
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.utils import load_backend
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide la latencia por request de la base de datos abriendo una conexión por request, '
+        'con conexiones persistentes (CONN_MAX_AGE) y, en PostgreSQL con psycopg 3, con el pool nativo.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Requests simulados por modo (default: 200)')
+        parser.add_argument('--consultas', type=int, default=3, help='Consultas por request (default: 3)')
+
+    def modos(self, base):
+        """(nombre, settings de la conexión) de cada modo a comparar, a partir del DATABASES actual."""
+        opciones = {k: v for k, v in base.get('OPTIONS', {}).items() if k != 'pool'}
+        modos = [
+            ('una conexión por request (CONN_MAX_AGE=0)', {**base, 'OPTIONS': opciones, 'CONN_MAX_AGE': 0}),
+            ('persistente (CONN_MAX_AGE=60 + health checks)',
+             {**base, 'OPTIONS': opciones, 'CONN_MAX_AGE': 60, 'CONN_HEALTH_CHECKS': True}),
+        ]
+
+        if base['ENGINE'] == 'django.db.backends.postgresql':
+            from django.db.backends.postgresql.psycopg_any import is_psycopg3
+            if is_psycopg3:
+                modos.append(('pool nativo (psycopg 3)', {
+                    **base, 'CONN_MAX_AGE': 0,
+                    'OPTIONS': {**opciones, 'pool': {'min_size': 1, 'max_size': 4}},
+                }))
+            else:
+                self.stdout.write(self.style.WARNING(
+                    '⚠️ El pool nativo necesita psycopg 3 (psycopg[pool]); con psycopg2 se omite ese modo.'
+                ))
+        return modos
+
+    def medir(self, settings_dict, requests, consultas):
+        """Latencias (segundos) de cada request simulado con una conexión propia."""
+        conexion = load_backend(settings_dict['ENGINE']).DatabaseWrapper(settings_dict, DEFAULT_DB_ALIAS)
+        tiempos = []
+        try:
+            for _ in range(requests):
+                inicio = time.perf_counter()
+                # Lo mismo que hace Django en request_started / request_finished (close_old_connections)
+                conexion.close_if_unusable_or_obsolete()
+                with conexion.cursor() as cursor:
+                    for _ in range(consultas):
+                        cursor.execute('SELECT 1')
+                        cursor.fetchone()
+                conexion.close_if_unusable_or_obsolete()
+                tiempos.append(time.perf_counter() - inicio)
+        finally:
+            conexion.close()
+            if hasattr(conexion, 'close_pool'):
+                conexion.close_pool()
+        return tiempos
+
+    def handle(self, *args, **options):
+        base = copy.deepcopy(connections.settings[DEFAULT_DB_ALIAS])
+        self.stdout.write(self.style.WARNING(
+            f"--- ⏱️ LATENCIA POR REQUEST ({base['ENGINE'].rsplit('.', 1)[-1]}, "
+            f"{options['requests']} requests x {options['consultas']} consultas) ---"
+        ))
+
+        for nombre, settings_dict in self.modos(base):
+            try:
+                tiempos = sorted(self.medir(settings_dict, options['requests'], options['consultas']))
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f'❌ {nombre}: {e}'))
+                continue
+            mediana = statistics.median(tiempos) * 1000
+            p95 = tiempos[int(len(tiempos) * 0.95) - 1] * 1000
+            promedio = statistics.mean(tiempos) * 1000
+            self.stdout.write(self.style.SUCCESS(
+                f'▶ {nombre}: mediana {mediana:.3f} ms | p95 {p95:.3f} ms | promedio {promedio:.3f} ms'
+            ))
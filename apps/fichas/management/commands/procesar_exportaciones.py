@@ -0,0 +1,49 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from apps.fichas.trabajos import tomar_siguiente, procesar, reencolar_colgados, purgar_vencidos
+
+
+class Command(BaseCommand):
+    help = 'Worker de exportaciones: genera los archivos XLSX/CSV pendientes en MEDIA_ROOT'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--una-vez', action='store_true', help='Procesa la cola pendiente y termina')
+        parser.add_argument('--intervalo', type=float, default=3, help='Segundos de espera cuando la cola está vacía (default: 3)')
+        parser.add_argument('--colgado-minutos', type=int, default=60,
+                            help='Reencola trabajos PROCESANDO con más de N minutos (default: 60)')
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.WARNING('--- 🚀 WORKER DE EXPORTACIONES ---'))
+
+        reencolados = reencolar_colgados(options['colgado_minutos'])
+        if reencolados:
+            self.stdout.write(self.style.WARNING(f'⚠️ {reencolados} trabajos colgados vueltos a la cola.'))
+
+        try:
+            while True:
+                trabajo = tomar_siguiente()
+                if trabajo is None:
+                    purgados = purgar_vencidos(settings.EXPORTACION_RETENCION_DIAS)
+                    if purgados:
+                        self.stdout.write(f'🧹 {purgados} exportaciones vencidas eliminadas.')
+                    if options['una_vez']:
+                        break
+                    # Conexión fresca en cada vuelta: el worker vive mucho más que CONN_MAX_AGE
+                    close_old_connections()
+                    time.sleep(options['intervalo'])
+                    continue
+
+                inicio = time.monotonic()
+                procesar(trabajo)
+                segundos = time.monotonic() - inicio
+                if trabajo.estado == trabajo.TERMINADO:
+                    self.stdout.write(self.style.SUCCESS(
+                        f'✅ Exportación {trabajo.pk}: {trabajo.total_filas} filas en {segundos:.1f}s'
+                    ))
+                else:
+                    self.stdout.write(self.style.ERROR(f'❌ Exportación {trabajo.pk}: {trabajo.error}'))
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('Worker detenido.'))
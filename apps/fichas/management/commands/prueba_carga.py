@@ -0,0 +1,158 @@
+import http.client
+import os
+import socket
+import statistics
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+RUTAS_POR_DEFECTO = [
+    '/ubigeo/api/arbol/',
+    '/ubigeo/api/provincias/?dep_id=15',
+    '/fichas/mis-fichas/',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Prueba de carga HTTP. Con --modos levanta gunicorn en cada modo (sync, gthread, uvicorn) '
+        'y compara throughput y latencia; con --url mide un servidor ya levantado.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modos', default='sync,gthread,uvicorn', help='Modos de gunicorn.conf.py a comparar')
+        parser.add_argument('--url', help='Medir este servidor en lugar de levantar gunicorn (ej: http://localhost:8001)')
+        parser.add_argument('--puerto', type=int, default=8765, help='Puerto local para gunicorn (default: 8765)')
+        parser.add_argument('--workers', type=int, help='Fija GUNICORN_WORKERS para que la comparación sea pareja')
+        parser.add_argument('--ruta', action='append', dest='rutas', help='Ruta a pedir (repetible)')
+        parser.add_argument('--concurrencia', type=int, default=20, help='Clientes simultáneos (default: 20)')
+        parser.add_argument('--duracion', type=float, default=10, help='Segundos por modo (default: 10)')
+        parser.add_argument('--usuario', help='Email de un usuario existente para pedir páginas con login')
+
+    # ------------------------------------------------------------------
+    # Sesión y servidor
+    # ------------------------------------------------------------------
+
+    def crear_sesion(self, email):
+        """Sesión autenticada creada en la BD (igual que Client.force_login) para usar como cookie."""
+        usuario = get_user_model().objects.filter(email=email).first()
+        if usuario is None:
+            raise CommandError(f"No existe el usuario '{email}'.")
+        sesion = import_module(settings.SESSION_ENGINE).SessionStore()
+        sesion[SESSION_KEY] = str(usuario.pk)
+        sesion[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+        sesion[HASH_SESSION_KEY] = usuario.get_session_auth_hash()
+        sesion.create()
+        return f'{settings.SESSION_COOKIE_NAME}={sesion.session_key}'
+
+    def levantar_gunicorn(self, modo, puerto, workers):
+        entorno = {**os.environ, 'GUNICORN_WORKER_CLASS': modo, 'GUNICORN_BIND': f'127.0.0.1:{puerto}'}
+        if workers:
+            entorno['GUNICORN_WORKERS'] = str(workers)
+        proceso = subprocess.Popen(
+            ['gunicorn', '--access-logfile', '/dev/null'],
+            cwd=settings.BASE_DIR, env=entorno,
+            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+        )
+        limite = time.monotonic() + 30
+        while time.monotonic() < limite:
+            if proceso.poll() is not None:
+                raise CommandError(f'gunicorn ({modo}) terminó al arrancar:\n{proceso.stderr.read().decode()[-2000:]}')
+            try:
+                socket.create_connection(('127.0.0.1', puerto), timeout=0.5).close()
+                return proceso
+            except OSError:
+                time.sleep(0.2)
+        proceso.kill()
+        raise CommandError(f'gunicorn ({modo}) no respondió en 30 s.')
+
+    def detener(self, proceso):
+        proceso.terminate()
+        try:
+            proceso.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            proceso.kill()
+
+    # ------------------------------------------------------------------
+    # Carga
+    # ------------------------------------------------------------------
+
+    def cliente(self, host, puerto, rutas, cookie, fin, resultados, lock):
+        """Un cliente con conexión keep-alive que pide las rutas en ronda hasta 'fin'."""
+        cabeceras = {'Accept-Encoding': 'gzip'}
+        if cookie:
+            cabeceras['Cookie'] = cookie
+        latencias, errores = [], 0
+        conexion = http.client.HTTPConnection(host, puerto, timeout=30)
+        i = 0
+        while time.monotonic() < fin:
+            ruta = rutas[i % len(rutas)]
+            i += 1
+            inicio = time.perf_counter()
+            try:
+                conexion.request('GET', ruta, headers=cabeceras)
+                respuesta = conexion.getresponse()
+                respuesta.read()
+                if respuesta.status >= 400:
+                    errores += 1
+                latencias.append(time.perf_counter() - inicio)
+            except (OSError, http.client.HTTPException):
+                errores += 1
+                conexion.close()
+                conexion = http.client.HTTPConnection(host, puerto, timeout=30)
+        conexion.close()
+        with lock:
+            resultados['latencias'].extend(latencias)
+            resultados['errores'] += errores
+
+    def medir(self, host, puerto, rutas, cookie, concurrencia, duracion):
+        resultados = {'latencias': [], 'errores': 0}
+        lock = threading.Lock()
+        fin = time.monotonic() + duracion
+        with ThreadPoolExecutor(max_workers=concurrencia) as pool:
+            for _ in range(concurrencia):
+                pool.submit(self.cliente, host, puerto, rutas, cookie, fin, resultados, lock)
+        return resultados
+
+    def reportar(self, nombre, resultados, duracion):
+        latencias = sorted(resultados['latencias'])
+        if not latencias:
+            self.stdout.write(self.style.ERROR(f'❌ {nombre}: sin respuestas ({resultados["errores"]} errores)'))
+            return
+        p95 = latencias[max(int(len(latencias) * 0.95) - 1, 0)] * 1000
+        self.stdout.write(self.style.SUCCESS(
+            f'▶ {nombre}: {len(latencias) / duracion:.1f} req/s | '
+            f'mediana {statistics.median(latencias) * 1000:.1f} ms | p95 {p95:.1f} ms | '
+            f'{len(latencias)} respuestas, {resultados["errores"]} errores'
+        ))
+
+    def handle(self, *args, **options):
+        rutas = options['rutas'] or RUTAS_POR_DEFECTO
+        cookie = self.crear_sesion(options['usuario']) if options['usuario'] else None
+        concurrencia, duracion = options['concurrencia'], options['duracion']
+
+        self.stdout.write(self.style.WARNING(
+            f'--- 🚦 PRUEBA DE CARGA ({concurrencia} clientes, {duracion:.0f} s por modo) ---'
+        ))
+        self.stdout.write('Rutas: ' + ', '.join(rutas))
+
+        if options['url']:
+            destino = urlsplit(options['url'])
+            resultados = self.medir(destino.hostname, destino.port or 80, rutas, cookie, concurrencia, duracion)
+            self.reportar(options['url'], resultados, duracion)
+            return
+
+        for modo in [m.strip() for m in options['modos'].split(',') if m.strip()]:
+            proceso = self.levantar_gunicorn(modo, options['puerto'], options['workers'])
+            try:
+                resultados = self.medir('127.0.0.1', options['puerto'], rutas, cookie, concurrencia, duracion)
+            finally:
+                self.detener(proceso)
+            self.reportar(modo, resultados, duracion)
@@ -0,0 +1,68 @@
+from itertools import groupby
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from apps.fichas.models import FichaEvaluacion, FichaDetalle
+from apps.fichas.catalogo import obtener_catalogo, obtener_version
+from apps.fichas.puntaje import calcular_puntaje, CAMPOS_PUNTAJE
+from apps.fichas.estadisticas import reconstruir_estadisticas
+
+
+class Command(BaseCommand):
+    help = 'Recalcula puntaje total, puntajes por dimensión y nivel de riesgo de las fichas existentes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=1000, help='Fichas procesadas por lote (default: 1000)')
+
+    def handle(self, *args, **options):
+        lote = options['lote']
+        vigente = obtener_catalogo()
+        ultimo_id = 0
+        total = 0
+
+        self.stdout.write(self.style.WARNING('--- 🚀 RECALCULANDO PUNTAJES ---'))
+
+        while True:
+            # Recorremos por rangos de id (keyset) para no cargar toda la tabla
+            versiones = dict(
+                FichaEvaluacion.objects.filter(id__gt=ultimo_id)
+                .order_by('id').values_list('id', 'version_cuestionario_id')[:lote]
+            )
+            if not versiones:
+                break
+            ids = list(versiones)
+
+            # Cada ficha se puntúa con la versión del cuestionario con la que se llenó
+            # (umbrales incluidos); las anteriores al versionado usan el vigente
+            def catalogo_de(ficha_id):
+                version_id = versiones[ficha_id]
+                return obtener_version(version_id) if version_id else vigente
+
+            # Usamos el puntaje_obtenido guardado (snapshot) y no el puntaje vigente de la opción
+            detalles = (
+                FichaDetalle.objects.filter(ficha_id__in=ids)
+                .order_by('ficha_id')
+                .values_list('ficha_id', 'pregunta_id', 'puntaje_obtenido')
+            )
+            resultados = {
+                ficha_id: calcular_puntaje(((p, pts) for _, p, pts in filas), catalogo_de(ficha_id))
+                for ficha_id, filas in groupby(detalles, key=lambda d: d[0])
+            }
+
+            fichas = []
+            for ficha_id in ids:
+                ficha = FichaEvaluacion(id=ficha_id)
+                resultado = resultados.get(ficha_id) or calcular_puntaje((), catalogo_de(ficha_id))
+                fichas.append(resultado.aplicar(ficha))
+
+            with transaction.atomic():
+                FichaEvaluacion.objects.bulk_update(fichas, CAMPOS_PUNTAJE, batch_size=lote)
+
+            total += len(ids)
+            ultimo_id = ids[-1]
+            self.stdout.write(f'Procesadas {total} fichas (hasta id {ultimo_id})...')
+
+        # bulk_update no dispara signals: el resumen diario se rehace al final
+        reconstruir_estadisticas(lote=lote)
+
+        self.stdout.write(self.style.SUCCESS(f'✅ ¡RECÁLCULO EXITOSO! {total} fichas actualizadas.'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from apps.fichas.estadisticas import reconstruir_estadisticas
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye desde cero la tabla resumen EstadisticaDiaria'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=1000, help='Filas insertadas por lote (default: 1000)')
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.WARNING('--- 🚀 RECONSTRUYENDO ESTADÍSTICAS DIARIAS ---'))
+        total = reconstruir_estadisticas(lote=options['lote'])
+        self.stdout.write(self.style.SUCCESS(f'✅ ¡RECONSTRUCCIÓN EXITOSA! {total} grupos generados.'))
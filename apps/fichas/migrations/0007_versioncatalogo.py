@@ -0,0 +1,27 @@
+# Generated by Django 6.0.2 on 2026-10-18 06:44
+
+from django.db import migrations, models
+
+
+def sembrar_version(apps, schema_editor):
+    # Fila única del contador (pk=1, ver catalogo.FILA_VERSION): invalidar_catalogo solo la actualiza
+    apps.get_model('fichas', 'VersionCatalogo').objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fichas', '0006_alter_fichaevaluacion_usuario_registra'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionCatalogo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('numero', models.PositiveIntegerField(default=0)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(sembrar_version, migrations.RunPython.noop),
+    ]
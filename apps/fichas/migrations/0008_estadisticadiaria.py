@@ -0,0 +1,33 @@
+# Generated by Django 6.0.2 on 2026-10-18 06:47
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fichas', '0007_versioncatalogo'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadisticaDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.DateField(verbose_name='Día (hora local)')),
+                ('nivel_riesgo', models.CharField(blank=True, max_length=50)),
+                ('cantidad', models.PositiveIntegerField(default=0)),
+                ('suma_puntaje', models.IntegerField(default=0)),
+                ('puntaje_min', models.IntegerField(default=0)),
+                ('puntaje_max', models.IntegerField(default=0)),
+                ('encuestador', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='estadisticas_diarias', to=settings.AUTH_USER_MODEL)),
+                ('institucion', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='estadisticas_diarias', to='fichas.institucion')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('dia', 'encuestador', 'institucion', 'nivel_riesgo'), name='estadistica_diaria_unica')],
+            },
+        ),
+    ]
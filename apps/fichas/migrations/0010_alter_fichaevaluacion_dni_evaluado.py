@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-18 06:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fichas', '0009_trabajoexportacion'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='fichaevaluacion',
+            name='dni_evaluado',
+            field=models.CharField(db_index=True, max_length=8, verbose_name='DNI'),
+        ),
+    ]
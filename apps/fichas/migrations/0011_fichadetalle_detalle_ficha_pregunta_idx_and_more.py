@@ -0,0 +1,36 @@
+# Generated by Django 6.0.2 on 2026-10-18 06:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fichas', '0010_alter_fichaevaluacion_dni_evaluado'),
+        ('ubigeo', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='fichadetalle',
+            index=models.Index(fields=['ficha', 'pregunta'], name='detalle_ficha_pregunta_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fichaevaluacion',
+            index=models.Index(fields=['usuario_registra', '-fecha_registro'], name='ficha_usuario_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fichaevaluacion',
+            index=models.Index(fields=['institucion', '-fecha_registro'], name='ficha_institucion_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fichaevaluacion',
+            index=models.Index(fields=['nivel_riesgo', 'fecha_registro'], name='ficha_riesgo_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fichaevaluacion',
+            index=models.Index(fields=['-fecha_registro'], name='ficha_fecha_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.2 on 2026-10-18 07:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fichas', '0011_fichadetalle_detalle_ficha_pregunta_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionCuestionario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('huella', models.CharField(max_length=64, unique=True)),
+                ('contenido', models.JSONField()),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='fichaevaluacion',
+            name='version_cuestionario',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='fichas', to='fichas.versioncuestionario'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 6.0.2 on 2026-10-18 07:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fichas', '0012_versioncuestionario_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CambioFicha',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha_edicion', models.DateTimeField()),
+                ('campo', models.CharField(max_length=60)),
+                ('pregunta_id', models.IntegerField(blank=True, null=True)),
+                ('valor_anterior', models.TextField(blank=True)),
+                ('valor_nuevo', models.TextField(blank=True)),
+            ],
+            options={
+                'ordering': ['-fecha_edicion', '-id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='fichahistorial',
+            index=models.Index(fields=['ficha', '-fecha_edicion'], name='historial_ficha_fecha_idx'),
+        ),
+        migrations.AddField(
+            model_name='cambioficha',
+            name='ficha',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cambios_auditados', to='fichas.fichaevaluacion'),
+        ),
+        migrations.AddField(
+            model_name='cambioficha',
+            name='historial',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cambios', to='fichas.fichahistorial'),
+        ),
+        migrations.AddIndex(
+            model_name='cambioficha',
+            index=models.Index(fields=['ficha', '-fecha_edicion'], name='cambio_ficha_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cambioficha',
+            index=models.Index(fields=['campo', '-fecha_edicion'], name='cambio_campo_fecha_idx'),
+        ),
+    ]
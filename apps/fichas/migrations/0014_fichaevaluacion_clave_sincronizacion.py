@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-18 07:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fichas', '0013_cambioficha_fichahistorial_historial_ficha_fecha_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fichaevaluacion',
+            name='clave_sincronizacion',
+            field=models.UUIDField(blank=True, editable=False, null=True, unique=True),
+        ),
+    ]
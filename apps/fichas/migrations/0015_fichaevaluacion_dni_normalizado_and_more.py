@@ -0,0 +1,34 @@
+# Generated by Django 6.0.2 on 2026-10-18 07:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fichas', '0014_fichaevaluacion_clave_sincronizacion'),
+        ('ubigeo', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fichaevaluacion',
+            name='dni_normalizado',
+            field=models.CharField(blank=True, default='', editable=False, max_length=8),
+        ),
+        migrations.AddField(
+            model_name='fichaevaluacion',
+            name='nombre_normalizado',
+            field=models.CharField(blank=True, default='', editable=False, max_length=200),
+        ),
+        migrations.AddIndex(
+            model_name='fichaevaluacion',
+            index=models.Index(fields=['institucion', 'dni_normalizado'], name='ficha_inst_dni_norm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fichaevaluacion',
+            index=models.Index(fields=['institucion', 'nombre_normalizado', 'fecha_nacimiento'], name='ficha_inst_nombre_norm_idx'),
+        ),
+    ]
@@ -0,0 +1,69 @@
+import re
+import unicodedata
+
+from django.db import migrations
+
+# Fichas leídas y actualizadas por lote
+TAMANO_LOTE = 2000
+
+# Copia de las reglas de apps/fichas/duplicados.py al crear esta migración: si
+# esas reglas cambian, la migración sigue escribiendo lo mismo (y agrupar_duplicados
+# corrige las claves con las reglas nuevas).
+LARGO_DNI = 8
+_NO_ALFANUMERICO = re.compile(r'[^0-9a-z]+')
+
+
+def normalizar_dni(dni):
+    digitos = ''.join(c for c in (dni or '') if c.isdigit())
+    return digitos.zfill(LARGO_DNI) if digitos else ''
+
+
+def normalizar_nombre(*partes):
+    texto = unicodedata.normalize('NFKD', ' '.join(p or '' for p in partes))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c)).casefold()
+    return ' '.join(sorted(_NO_ALFANUMERICO.sub(' ', texto).split()))
+
+
+def rellenar_claves(apps, schema_editor):
+    """
+    Calcula dni_normalizado y nombre_normalizado de las fichas existentes (0015
+    agregó los campos vacíos). Recorre la tabla en lotes por id: cada lote es una
+    consulta acotada y un bulk_update, sin cargar la tabla en memoria.
+    """
+    FichaEvaluacion = apps.get_model('fichas', 'FichaEvaluacion')
+    largo_nombre = FichaEvaluacion._meta.get_field('nombre_normalizado').max_length
+
+    ultimo_id = 0
+    while True:
+        filas = list(
+            FichaEvaluacion.objects.filter(pk__gt=ultimo_id).order_by('pk').values_list(
+                'pk', 'dni_evaluado', 'nombres_evaluado', 'apellidos_evaluado',
+                'dni_normalizado', 'nombre_normalizado',
+            )[:TAMANO_LOTE]
+        )
+        if not filas:
+            break
+
+        cambiadas = []
+        for pk, dni, nombres, apellidos, dni_guardado, nombre_guardado in filas:
+            dni_norm = normalizar_dni(dni)
+            nombre_norm = normalizar_nombre(nombres, apellidos)[:largo_nombre]
+            if (dni_norm, nombre_norm) != (dni_guardado, nombre_guardado):
+                cambiadas.append(FichaEvaluacion(pk=pk, dni_normalizado=dni_norm, nombre_normalizado=nombre_norm))
+        if cambiadas:
+            FichaEvaluacion.objects.bulk_update(cambiadas, ['dni_normalizado', 'nombre_normalizado'])
+        ultimo_id = filas[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    # Cada lote se confirma por separado: en tablas grandes no queda una transacción abierta por minutos
+    atomic = False
+
+    dependencies = [
+        ('fichas', '0015_fichaevaluacion_dni_normalizado_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(rellenar_claves, migrations.RunPython.noop),
+    ]
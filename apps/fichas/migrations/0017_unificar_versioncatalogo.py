@@ -0,0 +1,24 @@
+from django.db import migrations
+from django.db.models import Max
+
+
+def unificar_version(apps, schema_editor):
+    """
+    Bases migradas antes de que 0007 sembrara la fila: deja una sola fila con
+    pk=1 (ver catalogo.FILA_VERSION) y el mayor número registrado.
+    """
+    VersionCatalogo = apps.get_model('fichas', 'VersionCatalogo')
+    numero = VersionCatalogo.objects.aggregate(numero=Max('numero'))['numero'] or 0
+    VersionCatalogo.objects.exclude(pk=1).delete()
+    VersionCatalogo.objects.update_or_create(pk=1, defaults={'numero': numero})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fichas', '0016_rellenar_claves_duplicado'),
+    ]
+
+    operations = [
+        migrations.RunPython(unificar_version, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,60 @@
+from django.db import migrations
+from django.db.models import Count, Max, Min, Sum
+from django.db.models.functions import TruncDate
+
+# Grupos leídos e insertados por lote
+TAMANO_LOTE = 1000
+
+
+def rellenar_estadisticas(apps, schema_editor):
+    """
+    Llena EstadisticaDiaria con las fichas existentes (0008 creó la tabla vacía y
+    los signals solo suman las fichas guardadas después). Es el mismo GROUP BY de
+    estadisticas.reconstruir_estadisticas(), copiado aquí con los modelos
+    históricos: borra y recalcula, así que también corrige bases que ya tenían
+    el resumen a medias.
+    """
+    FichaEvaluacion = apps.get_model('fichas', 'FichaEvaluacion')
+    EstadisticaDiaria = apps.get_model('fichas', 'EstadisticaDiaria')
+
+    grupos = (
+        FichaEvaluacion.objects
+        .annotate(dia=TruncDate('fecha_registro'))
+        .values('dia', 'usuario_registra_id', 'institucion_id', 'nivel_riesgo')
+        .annotate(
+            cantidad=Count('id'),
+            suma_puntaje=Sum('puntaje_total'),
+            puntaje_min=Min('puntaje_total'),
+            puntaje_max=Max('puntaje_total'),
+        )
+        .order_by()
+    )
+
+    EstadisticaDiaria.objects.all().delete()
+    filas = []
+    for g in grupos.iterator(chunk_size=TAMANO_LOTE):
+        filas.append(EstadisticaDiaria(
+            dia=g['dia'],
+            encuestador_id=g['usuario_registra_id'],
+            institucion_id=g['institucion_id'],
+            nivel_riesgo=g['nivel_riesgo'],
+            cantidad=g['cantidad'],
+            suma_puntaje=g['suma_puntaje'],
+            puntaje_min=g['puntaje_min'],
+            puntaje_max=g['puntaje_max'],
+        ))
+        if len(filas) >= TAMANO_LOTE:
+            EstadisticaDiaria.objects.bulk_create(filas)
+            filas = []
+    EstadisticaDiaria.objects.bulk_create(filas)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fichas', '0017_unificar_versioncatalogo'),
+    ]
+
+    operations = [
+        migrations.RunPython(rellenar_estadisticas, migrations.RunPython.noop),
+    ]
@@ -52,6 +52,33 @@ class Opcion(models.Model):
     def __str__(self):
         return f"{self.texto} ({self.puntaje} pts)"
 
+class VersionCatalogo(models.Model):
+    """
+    Contador global del banco de preguntas (una sola fila).
+    Cada cambio en Dimensiones/Preguntas/Opciones lo incrementa para que todos
+    los workers invaliden su copia en memoria del catálogo (ver catalogo.py).
+    """
+    numero = models.PositiveIntegerField(default=0)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Catálogo v{self.numero}"
+
+class VersionCuestionario(models.Model):
+    """
+    Foto inmutable del cuestionario (dimensiones, preguntas, opciones y umbrales
+    de riesgo) guardada como un solo JSON. Cada ficha apunta a la versión con la
+    que se llenó, así editar el banco no cambia cómo se ven ni cómo se puntúan
+    las fichas antiguas. Se identifica por el hash del contenido: si el banco
+    vuelve a un estado anterior se reutiliza la misma versión.
+    """
+    huella = models.CharField(max_length=64, unique=True)  # sha256 del contenido
+    contenido = models.JSONField()
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Cuestionario v{self.pk} ({self.fecha_creacion:%d/%m/%Y})"
+
 # =======================================================
 # PARTE 2: LA FICHA SOCIOFAMILIAR (Operación)
 # =======================================================
@@ -75,13 +102,23 @@ class FichaEvaluacion(models.Model):
         verbose_name='Agente_de_campo'
     )
     institucion = models.ForeignKey(Institucion, on_delete=models.PROTECT, verbose_name='Institución Evaluada')
+    # Versión del cuestionario con la que se llenó (null: fichas anteriores al versionado)
+    version_cuestionario = models.ForeignKey(
+        VersionCuestionario, on_delete=models.PROTECT, null=True, blank=True, related_name='fichas'
+    )
     fecha_registro = models.DateTimeField('Fecha de Aplicación', auto_now_add=True)
     fecha_modificacion = models.DateTimeField(auto_now=True)
+    # Clave que genera el dispositivo al llenar la ficha sin conexión (ver sincronizacion.py):
+    # reenviar el mismo lote no duplica fichas. Null en las fichas del formulario web.
+    clave_sincronizacion = models.UUIDField(null=True, blank=True, unique=True, editable=False)
 
     # --- 1. DATOS GENERALES DEL ESTUDIANTE ---
     nombres_evaluado = models.CharField('Nombres', max_length=100)
     apellidos_evaluado = models.CharField('Apellidos', max_length=100)
-    dni_evaluado = models.CharField('DNI', max_length=8)
+    dni_evaluado = models.CharField('DNI', max_length=8, db_index=True)
+    # Claves normalizadas para detectar duplicados (ver duplicados.py); se calculan en pre_save
+    dni_normalizado = models.CharField(max_length=8, blank=True, default='', editable=False)
+    nombre_normalizado = models.CharField(max_length=200, blank=True, default='', editable=False)
     fecha_nacimiento = models.DateField('Fecha de Nacimiento')
     edad_evaluado = models.IntegerField('Edad')
     sexo_evaluado = models.CharField('Sexo', max_length=10, choices=(('M', 'Masculino'), ('F', 'Femenino')))
@@ -120,6 +157,22 @@ class FichaEvaluacion(models.Model):
     conclusion = models.TextField('Conclusión Diagnóstica', blank=True)
     plan_intervencion = models.TextField('Plan de Intervención Recomendado', blank=True)
 
+    class Meta:
+        # Rutas de acceso de los listados y dashboards (ver 'python manage.py explicar_consultas')
+        indexes = [
+            # mis_encuestas, detalle_usuario, ver_detalle_equipo, exportaciones por encuestador
+            models.Index(fields=['usuario_registra', '-fecha_registro'], name='ficha_usuario_fecha_idx'),
+            # listar_mis_fichas filtrado por institución
+            models.Index(fields=['institucion', '-fecha_registro'], name='ficha_institucion_fecha_idx'),
+            # conteos por nivel de riesgo dentro de un rango de fechas
+            models.Index(fields=['nivel_riesgo', 'fecha_registro'], name='ficha_riesgo_fecha_idx'),
+            # listar_mis_fichas sin filtros y "últimas fichas" del dashboard
+            models.Index(fields=['-fecha_registro'], name='ficha_fecha_idx'),
+            # posibles duplicados de un estudiante dentro de la institución (duplicados.py)
+            models.Index(fields=['institucion', 'dni_normalizado'], name='ficha_inst_dni_norm_idx'),
+            models.Index(fields=['institucion', 'nombre_normalizado', 'fecha_nacimiento'], name='ficha_inst_nombre_norm_idx'),
+        ]
+
     def __str__(self):
         return f"Ficha {self.id}: {self.nombres_evaluado} {self.apellidos_evaluado}"
     
@@ -143,10 +196,45 @@ class FichaHistorial(models.Model):
 
     class Meta:
         ordering = ['-fecha_edicion']
+        indexes = [
+            # historial paginado en ver_ficha
+            models.Index(fields=['ficha', '-fecha_edicion'], name='historial_ficha_fecha_idx'),
+        ]
 
     def __str__(self):
         return f"{self.usuario.username} editó la ficha {self.ficha.id} el {self.fecha_edicion}"
 
+
+class CambioFicha(models.Model):
+    """
+    Un cambio puntual dentro de una edición (FichaHistorial): qué campo o
+    pregunta cambió y sus valores antes/después. 'ficha' y 'fecha_edicion' se
+    copian de la edición para que la búsqueda de auditoría filtre sin joins.
+    """
+    # Valor de 'campo' para los cambios de respuesta (el resto usa el nombre del campo de la ficha)
+    CAMPO_PREGUNTA = 'pregunta'
+
+    historial = models.ForeignKey(FichaHistorial, on_delete=models.CASCADE, related_name='cambios')
+    ficha = models.ForeignKey(FichaEvaluacion, on_delete=models.CASCADE, related_name='cambios_auditados')
+    fecha_edicion = models.DateTimeField()
+    campo = models.CharField(max_length=60)
+    # Id de la pregunta cuando campo == 'pregunta' (sin FK: la pregunta puede borrarse del banco)
+    pregunta_id = models.IntegerField(null=True, blank=True)
+    valor_anterior = models.TextField(blank=True)
+    valor_nuevo = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['-fecha_edicion', '-id']
+        indexes = [
+            # cambios de una ficha en el tiempo
+            models.Index(fields=['ficha', '-fecha_edicion'], name='cambio_ficha_fecha_idx'),
+            # "qué fichas cambiaron de nivel_riesgo el mes pasado"
+            models.Index(fields=['campo', '-fecha_edicion'], name='cambio_campo_fecha_idx'),
+        ]
+
+    def __str__(self):
+        return f"Ficha {self.ficha_id} · {self.campo}: {self.valor_anterior} ➔ {self.valor_nuevo}"
+
 # =======================================================
 # PARTE 3: DETALLES DE LA FICHA
 # =======================================================
@@ -181,4 +269,91 @@ class FichaDetalle(models.Model):
     
     # Snapshot: Guardamos el puntaje aquí para mantener el histórico
     # aunque cambien los valores maestros en el futuro.
-    puntaje_obtenido = models.IntegerField()
\ No newline at end of file
+    puntaje_obtenido = models.IntegerField()
+
+    class Meta:
+        indexes = [
+            # Respuestas de una ficha (ver/editar) y la respuesta a una pregunta concreta
+            models.Index(fields=['ficha', 'pregunta'], name='detalle_ficha_pregunta_idx'),
+        ]
+
+# =======================================================
+# PARTE 4: ESTADÍSTICAS (Tablas resumen para dashboards)
+# =======================================================
+
+class EstadisticaDiaria(models.Model):
+    """
+    Resumen materializado de fichas por (día, encuestador, institución, nivel de riesgo).
+    Se mantiene incrementalmente desde signals.py y se reconstruye con
+    'python manage.py reconstruir_estadisticas'. Los dashboards leen de aquí
+    en lugar de agregar FichaEvaluacion completa.
+    """
+    dia = models.DateField('Día (hora local)')
+    encuestador = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='estadisticas_diarias')
+    institucion = models.ForeignKey(Institucion, on_delete=models.CASCADE, related_name='estadisticas_diarias')
+    nivel_riesgo = models.CharField(max_length=50, blank=True)
+
+    cantidad = models.PositiveIntegerField(default=0)
+    suma_puntaje = models.IntegerField(default=0)
+    puntaje_min = models.IntegerField(default=0)
+    puntaje_max = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dia', 'encuestador', 'institucion', 'nivel_riesgo'],
+                name='estadistica_diaria_unica'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.dia} {self.encuestador_id}/{self.institucion_id} {self.nivel_riesgo}: {self.cantidad}"
+
+# =======================================================
+# PARTE 5: EXPORTACIONES EN SEGUNDO PLANO
+# =======================================================
+
+class TrabajoExportacion(models.Model):
+    """
+    Cola de exportaciones (XLSX/CSV) guardada en la base de datos. La vista solo
+    registra el trabajo; el archivo lo genera 'python manage.py procesar_exportaciones'
+    dentro de MEDIA_ROOT y el usuario lo descarga cuando está TERMINADO.
+    """
+    PENDIENTE = 'PENDIENTE'
+    PROCESANDO = 'PROCESANDO'
+    TERMINADO = 'TERMINADO'
+    ERROR = 'ERROR'
+    ESTADOS = (
+        (PENDIENTE, 'Pendiente'),
+        (PROCESANDO, 'Procesando'),
+        (TERMINADO, 'Terminado'),
+        (ERROR, 'Error'),
+    )
+    FORMATOS = (
+        ('xlsx', 'Excel (.xlsx)'),
+        ('csv', 'CSV (.csv)'),
+    )
+
+    usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='exportaciones')
+    formato = models.CharField(max_length=4, choices=FORMATOS, default='xlsx')
+    filtros = models.JSONField(default=dict, blank=True)
+    # sha256 de (usuario, formato, filtros): identifica pedidos repetidos
+    huella = models.CharField(max_length=64, db_index=True)
+
+    estado = models.CharField(max_length=12, choices=ESTADOS, default=PENDIENTE)
+    archivo = models.FileField(upload_to='exportaciones/%Y/%m/', blank=True)
+    total_filas = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_inicio = models.DateTimeField(null=True, blank=True)
+    fecha_fin = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-fecha_creacion']
+        indexes = [
+            models.Index(fields=['estado', 'id'], name='exportacion_cola_idx'),
+        ]
+
+    def __str__(self):
+        return f"Exportación {self.pk} ({self.formato}) de {self.usuario_id}: {self.estado}"
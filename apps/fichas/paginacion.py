@@ -0,0 +1,188 @@
+"""
+Paginación por cursor (keyset / seek) para los listados.
+
+En lugar de COUNT(*) + OFFSET (cada página más profunda cuesta más), cada página
+se pide "después de" o "antes de" la última fila vista, usando el orden
+(campo DESC, id DESC):
+
+    siguiente: WHERE (campo < v) OR (campo = v AND id < i) ORDER BY campo DESC, id DESC LIMIT n+1
+    anterior:  WHERE (campo > v) OR (campo = v AND id > i) ORDER BY campo ASC,  id ASC  LIMIT n+1
+
+Con un índice sobre (..., campo) la página 5.000 cuesta lo mismo que la 1.
+El cursor viaja firmado en '?cursor=' para que sea opaco y no se pueda alterar.
+"""
+from django.core import signing
+from django.db.models import Q
+
+from .asincrono import en_paralelo
+
+SALT_CURSOR = 'apps.fichas.paginacion'
+TAMANO_PAGINA = 10
+# Tope del servidor para ?por_pagina=, sin importar lo que pida el cliente
+TAMANO_MAXIMO = 100
+# El total se cuenta solo hasta este tope; más allá se muestra como "más de N"
+LIMITE_TOTAL = 1000
+
+
+class PaginaCursor:
+    """Página de resultados. Se itera igual que una página de Paginator."""
+
+    def __init__(self, object_list, has_next, has_previous, cursor_siguiente, cursor_anterior,
+                 total=None, total_es_aproximado=False):
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.cursor_siguiente = cursor_siguiente
+        self.cursor_anterior = cursor_anterior
+        self.total = total
+        self.total_es_aproximado = total_es_aproximado
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+
+def tamano_pagina(request, defecto=TAMANO_PAGINA, maximo=TAMANO_MAXIMO):
+    """Lee ?por_pagina= y lo limita a [1, maximo]."""
+    try:
+        tamano = int(request.GET.get('por_pagina', defecto))
+    except (TypeError, ValueError):
+        return defecto
+    return max(1, min(tamano, maximo))
+
+
+def _valor(objeto, campo):
+    return objeto[campo] if isinstance(objeto, dict) else getattr(objeto, campo)
+
+
+def codificar_cursor(direccion, objeto, campo):
+    valor = _valor(objeto, campo)
+    if hasattr(valor, 'isoformat'):
+        valor = valor.isoformat()
+    return signing.dumps([direccion, valor, _valor(objeto, 'id')], salt=SALT_CURSOR, compress=True)
+
+
+def decodificar_cursor(token, modelo, campo):
+    """Devuelve (direccion, valor, id) o None si el token no es válido."""
+    if not token:
+        return None
+    try:
+        direccion, valor, pk = signing.loads(token, salt=SALT_CURSOR)
+        valor = modelo._meta.get_field(campo).to_python(valor)
+    except (signing.BadSignature, ValueError, TypeError):
+        return None
+    if direccion not in ('sig', 'ant'):
+        return None
+    return direccion, valor, pk
+
+
+def contar_hasta(queryset, limite=LIMITE_TOTAL):
+    """COUNT acotado: (total, es_aproximado). Nunca recorre más de limite+1 filas."""
+    total = queryset.order_by().values('pk')[:limite + 1].count()
+    if total > limite:
+        return limite, True
+    return total, False
+
+
+def lotes_por_cursor(queryset, campo=None, tamano=2000):
+    """
+    Recorre todo 'queryset' (un .values() que incluya 'id' y 'campo') en lotes de
+    'tamano' filas, cada uno con el mismo seek que las páginas: (campo DESC, id DESC),
+    o id ASC sin 'campo'. Es el reemplazo de .iterator() para recorridos completos:
+    pymysql no hace streaming y trae el resultado entero de una consulta a memoria,
+    mientras que aquí cada consulta está acotada y la memoria queda plana.
+    """
+    ultimo = None
+    while True:
+        lote = queryset
+        if campo:
+            lote = lote.order_by(f'-{campo}', '-id')
+            if ultimo:
+                lote = lote.filter(Q(**{f'{campo}__lt': ultimo[campo]}) | Q(**{campo: ultimo[campo], 'id__lt': ultimo['id']}))
+        else:
+            lote = lote.order_by('id')
+            if ultimo:
+                lote = lote.filter(id__gt=ultimo['id'])
+        filas = list(lote[:tamano])
+        if not filas:
+            return
+        yield filas
+        ultimo = filas[-1]
+
+
+def paginar_por_cursor(queryset, token, campo='fecha_registro', tamano=TAMANO_PAGINA, con_total=False):
+    """
+    Página de 'queryset' ordenada por (campo DESC, id DESC) a partir del cursor
+    recibido en request.GET['cursor'] (None o inválido -> primera página).
+    """
+    cursor = decodificar_cursor(token, queryset.model, campo)
+
+    if cursor and cursor[0] == 'ant':
+        _, valor, pk = cursor
+        filas = list(
+            queryset.filter(Q(**{f'{campo}__gt': valor}) | Q(**{campo: valor, 'id__gt': pk}))
+            .order_by(campo, 'id')[:tamano + 1]
+        )
+        has_previous = len(filas) > tamano
+        filas = filas[:tamano][::-1]
+        has_next = True
+    else:
+        if cursor:
+            _, valor, pk = cursor
+            queryset_pagina = queryset.filter(Q(**{f'{campo}__lt': valor}) | Q(**{campo: valor, 'id__lt': pk}))
+        else:
+            queryset_pagina = queryset
+        filas = list(queryset_pagina.order_by(f'-{campo}', '-id')[:tamano + 1])
+        has_next = len(filas) > tamano
+        filas = filas[:tamano]
+        has_previous = cursor is not None
+
+    total, aproximado = contar_hasta(queryset) if con_total else (None, False)
+
+    return PaginaCursor(
+        filas,
+        has_next=has_next and bool(filas),
+        has_previous=has_previous and bool(filas),
+        cursor_siguiente=codificar_cursor('sig', filas[-1], campo) if filas else None,
+        cursor_anterior=codificar_cursor('ant', filas[0], campo) if filas else None,
+        total=total,
+        total_es_aproximado=aproximado,
+    )
+
+
+async def apaginar_por_cursor(queryset, token, campo='fecha_registro', tamano=TAMANO_PAGINA, con_total=False):
+    """paginar_por_cursor() para vistas async: la página y el total se consultan a la vez."""
+    if not con_total:
+        (pagina,) = await en_paralelo(lambda: paginar_por_cursor(queryset, token, campo, tamano))
+        return pagina
+    pagina, (total, aproximado) = await en_paralelo(
+        lambda: paginar_por_cursor(queryset, token, campo, tamano),
+        lambda: contar_hasta(queryset),
+    )
+    pagina.total, pagina.total_es_aproximado = total, aproximado
+    return pagina
+
+
+# Columnas que muestran las tablas de fichas de un encuestador
+CAMPOS_LISTADO_FICHA = (
+    'id', 'fecha_registro', 'nombres_evaluado', 'apellidos_evaluado',
+    'dni_evaluado', 'puntaje_total', 'nivel_riesgo',
+)
+
+
+def listado_fichas(request, queryset, tamano=20, con_total=False):
+    """
+    Página de fichas para los historiales por encuestador: solo las columnas de
+    la tabla (only) y tamaño de página acotado por el servidor.
+    """
+    return paginar_por_cursor(
+        queryset.only(*CAMPOS_LISTADO_FICHA),
+        request.GET.get('cursor'),
+        tamano=tamano_pagina(request, defecto=tamano),
+        con_total=con_total,
+    )
@@ -0,0 +1,84 @@
+"""
+Motor de puntaje de la ficha socio-familiar.
+
+Calcula en una sola pasada el puntaje total, los subtotales por dimensión
+(columnas puntaje_dimension_a..f de FichaEvaluacion) y el nivel de riesgo.
+Lo usan registrar_ficha, editar_ficha y el comando recalcular_puntajes.
+"""
+from dataclasses import dataclass
+
+# Umbrales de riesgo (de mayor a menor): puntaje mínimo -> nivel
+UMBRALES_RIESGO = (
+    (126, 'RIESGO CRÍTICO'),
+    (76, 'RIESGO SEVERO'),
+    (26, 'RIESGO MODERADO'),
+)
+RIESGO_POR_DEFECTO = 'RIESGO BAJO'
+
+# Orden de la dimensión (A=1 ... F=6) -> columna precalculada en la ficha
+CAMPOS_DIMENSION = {
+    1: 'puntaje_dimension_a',
+    2: 'puntaje_dimension_b',
+    3: 'puntaje_dimension_c',
+    4: 'puntaje_dimension_d',
+    5: 'puntaje_dimension_e',
+    6: 'puntaje_dimension_f',
+}
+
+CAMPOS_PUNTAJE = ['puntaje_total', 'nivel_riesgo', *CAMPOS_DIMENSION.values()]
+
+
+def nivel_de_riesgo(puntaje_total, umbrales=UMBRALES_RIESGO, por_defecto=RIESGO_POR_DEFECTO):
+    for minimo, nivel in umbrales:
+        if puntaje_total >= minimo:
+            return nivel
+    return por_defecto
+
+
+@dataclass(frozen=True)
+class ResultadoPuntaje:
+    puntaje_total: int
+    por_dimension: dict   # {campo puntaje_dimension_x: subtotal}
+    nivel_riesgo: str
+
+    def aplicar(self, ficha):
+        """Copia el resultado en la instancia (no guarda)."""
+        ficha.puntaje_total = self.puntaje_total
+        ficha.nivel_riesgo = self.nivel_riesgo
+        for campo, subtotal in self.por_dimension.items():
+            setattr(ficha, campo, subtotal)
+        return ficha
+
+
+def calcular_puntaje(respuestas, catalogo):
+    """
+    respuestas: iterable de (pregunta_id, puntaje).
+    Usa la estructura y los umbrales del catálogo recibido (vigente o de la
+    versión con la que se llenó la ficha).
+    Las preguntas de dimensiones sin columna propia suman solo al total.
+    """
+    por_dimension = dict.fromkeys(CAMPOS_DIMENSION.values(), 0)
+    total = 0
+    for pregunta_id, puntaje in respuestas:
+        total += puntaje
+        pregunta = catalogo.preguntas.get(pregunta_id)
+        if pregunta is None:
+            continue
+        campo = CAMPOS_DIMENSION.get(catalogo.dimensiones_por_id[pregunta.dimension_id].orden)
+        if campo:
+            por_dimension[campo] += puntaje
+
+    return ResultadoPuntaje(
+        puntaje_total=total,
+        por_dimension=por_dimension,
+        nivel_riesgo=nivel_de_riesgo(total, catalogo.umbrales, catalogo.riesgo_por_defecto),
+    )
+
+
+def calcular_puntaje_opciones(opcion_ids, catalogo):
+    """Igual que calcular_puntaje, pero a partir de los ids de opciones elegidas."""
+    opciones = catalogo.opciones
+    return calcular_puntaje(
+        ((opciones[i].pregunta_id, opciones[i].puntaje) for i in opcion_ids),
+        catalogo,
+    )
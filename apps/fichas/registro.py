@@ -0,0 +1,127 @@
+"""
+Pipeline de registro de fichas.
+
+Lee las respuestas y familiares enviados en el POST del formulario de riesgo y
+los persiste con un número fijo de consultas (las opciones se validan contra el
+catálogo en memoria y se hace un bulk_create por tabla), sin importar cuántas
+preguntas o familiares tenga la ficha. La edición (actualizar_respuestas) sigue
+la misma idea: compara en memoria y escribe solo las filas que cambiaron.
+"""
+from django.core.exceptions import ValidationError
+
+from .models import FamiliarDelEvaluado, FichaDetalle
+from .auditoria import cambio_pregunta
+
+PREFIJO_PREGUNTA = 'pregunta_'
+
+
+def leer_respuestas(data):
+    """
+    Devuelve {pregunta_id: opcion_id} a partir de las llaves 'pregunta_<id>' del POST.
+    Las preguntas sin respuesta se omiten (igual que el flujo original).
+    """
+    respuestas = {}
+    for key, value in data.items():
+        if not key.startswith(PREFIJO_PREGUNTA) or not value:
+            continue
+        try:
+            respuestas[int(key[len(PREFIJO_PREGUNTA):])] = int(value)
+        except ValueError:
+            raise ValidationError(f'Respuesta inválida en "{key}".')
+    return respuestas
+
+
+def cargar_opciones(respuestas, catalogo):
+    """
+    Resuelve las opciones elegidas contra el catálogo en memoria (sin consultas)
+    y valida que cada una pertenezca a su pregunta. Devuelve {opcion_id: OpcionCatalogo}.
+    """
+    opciones = {}
+    for pregunta_id, opcion_id in respuestas.items():
+        opcion = catalogo.opciones.get(opcion_id)
+        if opcion is None:
+            raise ValidationError(f'La opción {opcion_id} no existe.')
+        if opcion.pregunta_id != pregunta_id:
+            raise ValidationError(f'La opción {opcion_id} no corresponde a la pregunta {pregunta_id}.')
+        opciones[opcion_id] = opcion
+    return opciones
+
+
+def leer_familiares(data):
+    """Construye (sin guardar) los familiares enviados como fam_<i>_*."""
+    familiares = []
+    total_filas = int(data.get('total_familiares') or 0)
+    for i in range(1, total_filas + 1):
+        nombre = data.get(f'fam_{i}_nombre')
+        if nombre:
+            familiares.append(FamiliarDelEvaluado(
+                nombres=nombre,
+                parentesco=data.get(f'fam_{i}_parentesco', ''),
+                edad=data.get(f'fam_{i}_edad') or 0,
+                sexo=data.get(f'fam_{i}_sexo', 'M'),
+                estado_civil=data.get(f'fam_{i}_ecivil', ''),
+                nivel_educativo=data.get(f'fam_{i}_neducativo', ''),
+                ocupacion=data.get(f'fam_{i}_ocupacion', ''),
+                ingresos=data.get(f'fam_{i}_ingresos') or 0
+            ))
+    return familiares
+
+
+def guardar_familiares(ficha, familiares):
+    for familiar in familiares:
+        familiar.ficha = ficha
+    FamiliarDelEvaluado.objects.bulk_create(familiares)
+
+
+def guardar_respuestas(ficha, respuestas, opciones):
+    FichaDetalle.objects.bulk_create([
+        FichaDetalle(
+            ficha=ficha,
+            pregunta_id=pregunta_id,
+            opcion_seleccionada_id=opcion_id,
+            puntaje_obtenido=opciones[opcion_id].puntaje
+        )
+        for pregunta_id, opcion_id in respuestas.items()
+    ])
+
+
+def actualizar_respuestas(ficha, actuales, respuestas, opciones, catalogo_anterior):
+    """
+    Aplica la edición de respuestas escribiendo solo lo que cambió.
+
+    actuales: {pregunta_id: FichaDetalle} ya cargados de la ficha.
+    respuestas/opciones: lo devuelto por leer_respuestas/cargar_opciones.
+    catalogo_anterior: catálogo con el que se llenó la ficha (textos para la auditoría).
+
+    Deja 'actuales' con el estado final y retorna los CambioFicha (sin guardar).
+    """
+    cambios = []
+    modificados = []
+    nuevos = []
+    for pregunta_id, opcion_id in respuestas.items():
+        opcion = opciones[opcion_id]
+        detalle = actuales.get(pregunta_id)
+
+        if detalle is None:
+            detalle = FichaDetalle(ficha=ficha, pregunta_id=pregunta_id)
+            nuevos.append(detalle)
+            actuales[pregunta_id] = detalle
+            texto_anterior = "Sin respuesta"
+        elif detalle.opcion_seleccionada_id != opcion_id or detalle.puntaje_obtenido != opcion.puntaje:
+            modificados.append(detalle)
+            anterior = catalogo_anterior.opciones.get(detalle.opcion_seleccionada_id)
+            texto_anterior = anterior.texto if anterior else "Sin respuesta"
+        else:
+            continue
+
+        if texto_anterior != opcion.texto:
+            cambios.append(cambio_pregunta(pregunta_id, texto_anterior, opcion.texto))
+
+        detalle.opcion_seleccionada_id = opcion_id
+        detalle.puntaje_obtenido = opcion.puntaje
+
+    if modificados:
+        FichaDetalle.objects.bulk_update(modificados, ['opcion_seleccionada', 'puntaje_obtenido'])
+    if nuevos:
+        FichaDetalle.objects.bulk_create(nuevos)
+    return cambios
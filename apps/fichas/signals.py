@@ -0,0 +1,56 @@
+"""
+Signals de la app fichas: mantienen EstadisticaDiaria al día cuando una ficha
+se crea, edita (cambia de grupo o de puntaje) o elimina, recalculan las
+claves de detección de duplicados en cada guardado e invalidan los tableros
+en cache que muestran la ficha.
+"""
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import FichaEvaluacion
+from . import cache_tableros, duplicados, estadisticas
+
+
+@receiver(pre_save, sender=FichaEvaluacion)
+def normalizar_claves_duplicado(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    duplicados.asignar_claves(instance)
+
+
+@receiver(pre_save, sender=FichaEvaluacion)
+def capturar_estado_anterior(sender, instance, raw=False, **kwargs):
+    instance._estado_estadistica = None
+    if raw or not instance.pk:
+        return
+    anterior = sender.objects.filter(pk=instance.pk).values_list(
+        'fecha_registro', 'usuario_registra_id', 'institucion_id', 'nivel_riesgo', 'puntaje_total'
+    ).first()
+    if anterior:
+        instance._estado_estadistica = estadisticas.estado_de(*anterior)
+
+
+@receiver(post_save, sender=FichaEvaluacion)
+def actualizar_estadistica(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    anterior = getattr(instance, '_estado_estadistica', None)
+    actual = estadisticas.estado_de_ficha(instance)
+    if anterior == actual:
+        return
+    if anterior:
+        estadisticas.restar(*anterior)
+    estadisticas.sumar(*actual)
+
+
+@receiver(post_delete, sender=FichaEvaluacion)
+def descontar_estadistica(sender, instance, **kwargs):
+    estadisticas.restar(*estadisticas.estado_de_ficha(instance))
+
+
+@receiver(post_save, sender=FichaEvaluacion)
+@receiver(post_delete, sender=FichaEvaluacion)
+def invalidar_tableros(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    cache_tableros.invalidar_ficha(instance)
@@ -0,0 +1,302 @@
+"""
+Sincronización en lote de fichas llenadas sin conexión.
+
+El dispositivo guarda cada ficha con una clave UUID propia y, cuando tiene
+señal, envía su cola en un solo POST JSON a 'api_sincronizar_fichas':
+
+    {"fichas": [
+        {"clave": "<uuid>",
+         "nombres_evaluado": "...", ... (CAMPOS_FICHA y CAMPOS_UBIGEO),
+         "familiares": [{"nombres": "...", "parentesco": "...", "edad": 40, "sexo": "F", ...}],
+         "respuestas": {"<pregunta_id>": <opcion_id>, ...}},
+        ...
+    ]}
+
+Cada ficha se valida en memoria (campos del modelo, ubigeo contra el árbol en
+memoria y respuestas contra el catálogo vigente) y las válidas se insertan con
+un bulk_create por tabla dentro de una sola transacción. El resultado dice,
+ficha por ficha, si quedó 'aceptada', 'duplicada' (la clave ya se había
+recibido: reenviar un lote tras un corte no duplica nada) o 'rechazada' con
+sus errores. Las aceptadas que parecen del mismo estudiante que otra ficha de
+la institución llevan 'posibles_duplicados' (ver duplicados.py).
+
+Sesión y CSRF: el dispositivo usa la misma sesión que la web.
+  1. GET a la página de login: la respuesta deja la cookie 'csrftoken'.
+  2. POST al login (username = correo, password y csrfmiddlewaretoken = valor de esa
+     cookie); se guarda la cookie 'sessionid'.
+  3. Cada lote va con ambas cookies, Content-Type: application/json y el header
+     'X-CSRFToken: <csrftoken>'. En HTTPS además 'Origin' (o 'Referer') con la
+     URL del sitio, que debe estar en CSRF_TRUSTED_ORIGINS o ser el mismo host.
+Respuestas: 200 resultado del lote, 400 lote mal formado, 401 sesión vencida
+(repetir 1-2 y reenviar el mismo lote: las claves evitan duplicados) y 403
+token CSRF inválido (leer de nuevo la cookie 'csrftoken').
+"""
+import json
+import uuid
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+
+from apps.ubigeo.arbol import obtener_arbol
+
+from . import cache_tableros, duplicados, estadisticas
+from .catalogo import obtener_catalogo
+from .models import FamiliarDelEvaluado, FichaDetalle, FichaEvaluacion, Institucion
+from .puntaje import calcular_puntaje_opciones
+from .registro import cargar_opciones
+
+ACEPTADA, DUPLICADA, RECHAZADA = 'aceptada', 'duplicada', 'rechazada'
+
+# Máximo de fichas por POST: el dispositivo parte su cola en lotes de este tamaño
+LOTE_MAXIMO = 100
+# Filas por INSERT en los bulk_create de familiares y respuestas
+TAMANO_LOTE = 500
+
+# Datos que envía el dispositivo (los mismos del formulario web)
+CAMPOS_FICHA = (
+    'nombres_evaluado', 'apellidos_evaluado', 'dni_evaluado', 'fecha_nacimiento', 'edad_evaluado',
+    'sexo_evaluado', 'nivel_educativo', 'direccion_domicilio',
+    'telefono_contacto', 'email_contacto',
+    'emergencia_nombres', 'emergencia_telefono', 'emergencia_parentesco',
+    'jefe_hogar', 'num_integrantes', 'observaciones_familia',
+)
+CAMPOS_UBIGEO = ('ubigeo_departamento', 'ubigeo_provincia', 'ubigeo_distrito')
+CAMPOS_FAMILIAR = (
+    'nombres', 'parentesco', 'edad', 'sexo', 'estado_civil', 'nivel_educativo', 'ocupacion', 'ingresos',
+)
+# Relaciones que asigna el servidor (o que se validan aparte): full_clean no las revisa
+EXCLUIDOS_FICHA = ['usuario_registra', 'institucion', 'version_cuestionario', *CAMPOS_UBIGEO]
+
+
+def leer_lote(cuerpo):
+    """Lista de fichas del cuerpo JSON. ValidationError si el lote en sí no es válido."""
+    try:
+        datos = json.loads(cuerpo)
+    except (ValueError, UnicodeDecodeError):
+        raise ValidationError('El cuerpo no es JSON válido.')
+    fichas = datos.get('fichas') if isinstance(datos, dict) else None
+    if not isinstance(fichas, list):
+        raise ValidationError('Se esperaba {"fichas": [...]}.')
+    if len(fichas) > LOTE_MAXIMO:
+        raise ValidationError(f'Máximo {LOTE_MAXIMO} fichas por lote (se recibieron {len(fichas)}).')
+    return fichas
+
+
+def _valores(dato, campos):
+    """Campos presentes del JSON; los null cuentan como ausentes (toman el default del modelo)."""
+    valores = {}
+    for campo in campos:
+        valor = dato.get(campo)
+        if valor is None:
+            continue
+        if not isinstance(valor, (str, int, float)):
+            raise ValidationError({campo: ['Valor inválido.']})
+        valores[campo] = valor
+    return valores
+
+
+def _validar_ubigeo(dato, arbol):
+    """Ids de ubigeo validados contra el árbol en memoria (cada nivel dentro de su padre)."""
+    dep, prov, dist = (str(dato.get(campo) or '') or None for campo in CAMPOS_UBIGEO)
+    errores = {}
+    if dep and dep not in {d['id'] for d in arbol.departamentos}:
+        errores['ubigeo_departamento'] = [f'El departamento {dep} no existe.']
+    if prov and prov not in {p['id'] for p in arbol.provincias.get(dep, ())}:
+        errores['ubigeo_provincia'] = [f'La provincia {prov} no pertenece al departamento {dep}.']
+    if dist and dist not in {d['id'] for d in arbol.distritos.get(prov, ())}:
+        errores['ubigeo_distrito'] = [f'El distrito {dist} no pertenece a la provincia {prov}.']
+    if errores:
+        raise ValidationError(errores)
+    return {'ubigeo_departamento_id': dep, 'ubigeo_provincia_id': prov, 'ubigeo_distrito_id': dist}
+
+
+def _leer_respuestas(dato):
+    respuestas = dato.get('respuestas') or {}
+    if not isinstance(respuestas, dict):
+        raise ValidationError('Se esperaba {"<pregunta_id>": <opcion_id>}.')
+    try:
+        return {int(pregunta): int(opcion) for pregunta, opcion in respuestas.items() if opcion is not None}
+    except (TypeError, ValueError):
+        raise ValidationError('Las preguntas y opciones deben ser ids numéricos.')
+
+
+def validar_ficha(dato, catalogo, arbol):
+    """
+    Arma (sin guardar) la ficha, sus familiares y respuestas, sin consultar la BD.
+    Retorna (ficha, familiares, respuestas, opciones) o lanza ValidationError
+    con un dict {campo: [errores]}.
+    """
+    errores = {}
+
+    ubigeo = {}
+    try:
+        ubigeo = _validar_ubigeo(dato, arbol)
+    except ValidationError as e:
+        errores.update(e.message_dict)
+
+    try:
+        ficha = FichaEvaluacion(**_valores(dato, CAMPOS_FICHA), **ubigeo)
+        ficha.full_clean(exclude=EXCLUIDOS_FICHA, validate_unique=False, validate_constraints=False)
+    except ValidationError as e:
+        errores.update(e.message_dict)
+
+    familiares = []
+    lista = dato.get('familiares') or []
+    if not isinstance(lista, list):
+        errores['familiares'] = ['Se esperaba una lista.']
+        lista = []
+    for i, fila in enumerate(lista):
+        try:
+            if not isinstance(fila, dict):
+                raise ValidationError({'familiar': ['Se esperaba un objeto.']})
+            familiar = FamiliarDelEvaluado(**_valores(fila, CAMPOS_FAMILIAR))
+            familiar.full_clean(exclude=['ficha'], validate_unique=False, validate_constraints=False)
+            familiares.append(familiar)
+        except ValidationError as e:
+            errores.update({f'familiares.{i}.{campo}': mensajes for campo, mensajes in e.message_dict.items()})
+
+    respuestas, opciones = {}, {}
+    try:
+        respuestas = _leer_respuestas(dato)
+        opciones = cargar_opciones(respuestas, catalogo)
+    except ValidationError as e:
+        errores['respuestas'] = e.messages
+
+    if errores:
+        raise ValidationError(errores)
+
+    calcular_puntaje_opciones(respuestas.values(), catalogo).aplicar(ficha)
+    return ficha, familiares, respuestas, opciones
+
+
+def _insertar(usuario, validas, resultados, catalogo):
+    """
+    Dentro de la transacción: descarta las claves ya recibidas y crea el resto
+    con un bulk_create por tabla. validas: {clave: (indice, ficha, familiares, respuestas, opciones)}.
+    """
+    existentes = {
+        clave: (ficha_id, usuario_id)
+        for clave, ficha_id, usuario_id in FichaEvaluacion.objects.filter(clave_sincronizacion__in=validas)
+        .values_list('clave_sincronizacion', 'id', 'usuario_registra_id')
+    }
+    for clave, (ficha_id, usuario_id) in existentes.items():
+        indice = validas[clave][0]
+        if usuario_id == usuario.pk:
+            resultados[indice] = {'estado': DUPLICADA, 'ficha_id': ficha_id}
+        else:
+            resultados[indice] = {'estado': RECHAZADA, 'errores': {'clave': ['La clave ya fue usada por otro usuario.']}}
+
+    nuevas = {clave: item for clave, item in validas.items() if clave not in existentes}
+    if not nuevas:
+        return
+
+    # Igual que registrar_ficha: la ficha se asigna a la primera institución
+    institucion = Institucion.objects.first()
+    if institucion is None:
+        for indice, *_ in nuevas.values():
+            resultados[indice] = {'estado': RECHAZADA, 'errores': {'institucion': ['No hay instituciones registradas.']}}
+        return
+
+    catalogo_id = catalogo.version_cuestionario_id
+    fichas = []
+    for clave, (_, ficha, *_) in nuevas.items():
+        ficha.clave_sincronizacion = clave
+        ficha.usuario_registra = usuario
+        ficha.institucion = institucion
+        ficha.version_cuestionario_id = catalogo_id
+        # bulk_create no pasa por pre_save: las claves de duplicados se asignan aquí
+        duplicados.asignar_claves(ficha)
+        fichas.append(ficha)
+    FichaEvaluacion.objects.bulk_create(fichas)
+
+    # MySQL no devuelve los ids de un INSERT múltiple: se recuperan por la clave
+    if fichas[0].pk is None:
+        ids = dict(
+            FichaEvaluacion.objects.filter(clave_sincronizacion__in=nuevas).values_list('clave_sincronizacion', 'id')
+        )
+        for ficha in fichas:
+            ficha.pk = ficha.id = ids[ficha.clave_sincronizacion]
+
+    familiares, detalles = [], []
+    indice_por_id = {}
+    for indice, ficha, familiares_ficha, respuestas, opciones in nuevas.values():
+        for familiar in familiares_ficha:
+            familiar.ficha = ficha
+            familiares.append(familiar)
+        detalles.extend(
+            FichaDetalle(
+                ficha=ficha,
+                pregunta_id=pregunta_id,
+                opcion_seleccionada_id=opcion_id,
+                puntaje_obtenido=opciones[opcion_id].puntaje,
+            )
+            for pregunta_id, opcion_id in respuestas.items()
+        )
+        resultados[indice] = {'estado': ACEPTADA, 'ficha_id': ficha.pk, 'nivel_riesgo': ficha.nivel_riesgo}
+        indice_por_id[ficha.pk] = indice
+    FamiliarDelEvaluado.objects.bulk_create(familiares, batch_size=TAMANO_LOTE)
+    FichaDetalle.objects.bulk_create(detalles, batch_size=TAMANO_LOTE)
+
+    # Se aceptan igual, pero el dispositivo avisa al encuestador (incluye repetidos dentro del lote)
+    for ficha_id, ids in duplicados.duplicados_de_lote(fichas).items():
+        resultados[indice_por_id[ficha_id]]['posibles_duplicados'] = ids
+
+    # bulk_create no dispara los signals que mantienen el resumen del dashboard ni su cache
+    estadisticas.sumar_fichas(fichas)
+    cache_tableros.invalidar_encuestador(usuario.pk, usuario.supervisor_asignado_id)
+
+
+def sincronizar_lote(usuario, datos):
+    """
+    Valida e inserta un lote de fichas (ver leer_lote). Retorna el resultado por
+    ficha, en el mismo orden del lote, y los totales por estado.
+    """
+    catalogo = obtener_catalogo()
+    arbol = obtener_arbol()
+
+    resultados = [None] * len(datos)
+    claves = [None] * len(datos)
+    validas = {}
+    for indice, dato in enumerate(datos):
+        try:
+            if not isinstance(dato, dict):
+                raise ValidationError({'ficha': ['Se esperaba un objeto.']})
+            try:
+                claves[indice] = clave = uuid.UUID(str(dato.get('clave')))
+            except ValueError:
+                raise ValidationError({'clave': ['Se esperaba un UUID generado por el dispositivo.']})
+            if clave in validas:
+                # Repetida dentro del mismo lote: se resuelve igual que su primera aparición válida
+                continue
+            validas[clave] = (indice, *validar_ficha(dato, catalogo, arbol))
+        except ValidationError as e:
+            resultados[indice] = {'estado': RECHAZADA, 'errores': e.message_dict}
+
+    if validas:
+        # Si otro request guarda la misma clave entre la consulta y el INSERT,
+        # el índice único lo detiene: se repite una vez y esa ficha sale como duplicada.
+        for intento in range(2):
+            try:
+                with transaction.atomic():
+                    _insertar(usuario, validas, resultados, catalogo)
+                break
+            except IntegrityError:
+                if intento:
+                    raise
+
+    for indice, clave in enumerate(claves):
+        if resultados[indice] is None:
+            primera = resultados[validas[clave][0]]
+            resultados[indice] = (
+                {'estado': DUPLICADA, 'ficha_id': primera['ficha_id']} if 'ficha_id' in primera else dict(primera)
+            )
+
+    for indice, resultado in enumerate(resultados):
+        resultado['indice'] = indice
+        if claves[indice] is not None:
+            resultado['clave'] = str(claves[indice])
+
+    totales = {estado: 0 for estado in (ACEPTADA, DUPLICADA, RECHAZADA)}
+    for resultado in resultados:
+        totales[resultado['estado']] += 1
+    return {'resultados': resultados, 'totales': totales}
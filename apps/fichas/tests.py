@@ -1,3 +1,520 @@
-from django.test import TestCase
+import json
+import uuid
+from datetime import date, timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.core import signing
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.ubigeo.arbol import invalidar_arbol
+from apps.ubigeo.models import Departamento, Distrito, Provincia
+from apps.usuarios.models import Usuario
+
+from . import cache_tableros
+from .catalogo import invalidar_catalogo, obtener_catalogo
+from .estadisticas import reconstruir_estadisticas
+from .forms import FichaEvaluacionForm
+from .models import (
+    CambioFicha, Dimension, EstadisticaDiaria, FichaDetalle, FichaEvaluacion, FichaHistorial, Institucion, Opcion,
+    Pregunta,
+)
+from .paginacion import LIMITE_TOTAL, SALT_CURSOR, contar_hasta, lotes_por_cursor, paginar_por_cursor
+
+
+class DatosFichasMixin:
+    """
+    Equipo (supervisor + encuestador), una institución, un ubigeo y un
+    cuestionario de una dimensión con dos preguntas (opciones de 0, 10 y 100 puntos).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.supervisor = Usuario.objects.create_user(
+            'sup@test.pe', 'clave', rol='SUPERVISOR', nombres='Sara', apellidos='Supervisora', dni='10000001',
+        )
+        cls.encuestador = Usuario.objects.create_user(
+            'enc@test.pe', 'clave', rol='ENCUESTADOR', nombres='Elio', apellidos='Encuestador', dni='10000002',
+            supervisor_asignado=cls.supervisor,
+        )
+        cls.institucion = Institucion.objects.create(codigo_modular='0000001', nombre='IE Prueba', nombre_contacto='Dirección')
+
+        cls.departamento = Departamento.objects.create(id='15', nombre='Lima')
+        cls.provincia = Provincia.objects.create(id='1501', nombre='Lima', departamento=cls.departamento)
+        cls.distrito = Distrito.objects.create(id='150101', nombre='Lima', provincia=cls.provincia)
+
+        dimension = Dimension.objects.create(nombre='Socioeconómicas', orden=1)
+        cls.opciones = {}
+        for orden in (1, 2):
+            pregunta = Pregunta.objects.create(dimension=dimension, enunciado=f'Pregunta {orden}', orden=orden)
+            cls.opciones[pregunta.pk] = [
+                Opcion.objects.create(pregunta=pregunta, texto=f'{puntaje} puntos', puntaje=puntaje)
+                for puntaje in (0, 10, 100)
+            ]
+
+    def setUp(self):
+        # El catálogo y el árbol de ubigeo se guardan por proceso: el rollback de cada test no los limpia
+        invalidar_catalogo()
+        invalidar_arbol()
+        self.catalogo = obtener_catalogo()
+
+    def respuestas(self, indice):
+        """{pregunta_id: opcion_id} marcando la misma alternativa (0, 1 o 2) en todas las preguntas."""
+        return {pregunta_id: opciones[indice].pk for pregunta_id, opciones in self.opciones.items()}
+
+    def datos_ficha(self, **cambios):
+        datos = {
+            'nombres_evaluado': 'Ana', 'apellidos_evaluado': 'Pérez', 'dni_evaluado': '12345678',
+            'fecha_nacimiento': '2010-05-01', 'edad_evaluado': 15, 'sexo_evaluado': 'F',
+            'nivel_educativo': 'Secundaria', 'direccion_domicilio': 'Av. Perú 123',
+            'telefono_contacto': '999888777', 'emergencia_nombres': 'Rosa Pérez',
+            'emergencia_telefono': '999111222', 'emergencia_parentesco': 'Madre',
+            'jefe_hogar': 'Rosa Pérez', 'num_integrantes': 4,
+        }
+        datos.update(cambios)
+        return datos
+
+    def crear_ficha(self, puntaje_total=0, nivel_riesgo='RIESGO BAJO', **cambios):
+        """Ficha guardada con save() (pasa por los signals), sin respuestas."""
+        datos = self.datos_ficha(**cambios)
+        datos['fecha_nacimiento'] = date.fromisoformat(datos['fecha_nacimiento'])
+        return FichaEvaluacion.objects.create(
+            usuario_registra=self.encuestador, institucion=self.institucion,
+            puntaje_total=puntaje_total, nivel_riesgo=nivel_riesgo, **datos,
+        )
+
+
+class SincronizacionLoteTests(DatosFichasMixin, TestCase):
+    """API de sincronización en lote (sincronizacion.py)."""
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('api_sincronizar_fichas')
+        self.client.force_login(self.encuestador)
+
+    def ficha_lote(self, respuestas=None, **cambios):
+        return {
+            'clave': str(uuid.uuid4()),
+            **self.datos_ficha(**cambios),
+            'ubigeo_departamento': self.departamento.pk,
+            'ubigeo_provincia': self.provincia.pk,
+            'ubigeo_distrito': self.distrito.pk,
+            'familiares': [{'nombres': 'Rosa Pérez', 'parentesco': 'Madre', 'edad': 40, 'sexo': 'F'}],
+            'respuestas': respuestas or {str(k): v for k, v in self.respuestas(1).items()},
+        }
+
+    def enviar(self, fichas, cliente=None):
+        return (cliente or self.client).post(self.url, json.dumps({'fichas': fichas}), content_type='application/json')
+
+    def test_reenviar_el_lote_no_duplica_fichas(self):
+        lote = [self.ficha_lote(), self.ficha_lote(dni_evaluado='87654321', nombres_evaluado='Luis')]
+
+        primera = self.enviar(lote).json()
+        self.assertEqual(primera['totales'], {'aceptada': 2, 'duplicada': 0, 'rechazada': 0})
+        ids = [r['ficha_id'] for r in primera['resultados']]
+
+        segunda = self.enviar(lote).json()
+        self.assertEqual(segunda['totales'], {'aceptada': 0, 'duplicada': 2, 'rechazada': 0})
+        self.assertEqual([r['ficha_id'] for r in segunda['resultados']], ids)
+        self.assertEqual(FichaEvaluacion.objects.count(), 2)
+
+    def test_ficha_aceptada_queda_completa_y_puntuada(self):
+        item = self.ficha_lote()
+        resultado = self.enviar([item]).json()['resultados'][0]
+
+        ficha = FichaEvaluacion.objects.get(pk=resultado['ficha_id'])
+        self.assertEqual(str(ficha.clave_sincronizacion), item['clave'])
+        self.assertEqual(ficha.usuario_registra, self.encuestador)
+        self.assertEqual(ficha.puntaje_total, 20)
+        self.assertEqual(ficha.detalles.count(), 2)
+        self.assertEqual(ficha.familiares.count(), 1)
+        self.assertEqual(ficha.version_cuestionario_id, self.catalogo.version_cuestionario_id)
+
+    def test_rechazada_no_bloquea_al_resto_del_lote(self):
+        pregunta_id = next(iter(self.opciones))
+        lote = [self.ficha_lote(), self.ficha_lote(edad_evaluado='abc', respuestas={str(pregunta_id): 999999})]
+
+        datos = self.enviar(lote).json()
+        self.assertEqual(datos['totales'], {'aceptada': 1, 'duplicada': 0, 'rechazada': 1})
+        errores = datos['resultados'][1]['errores']
+        self.assertIn('edad_evaluado', errores)
+        self.assertIn('respuestas', errores)
+        self.assertEqual(FichaEvaluacion.objects.count(), 1)
+
+    def test_lote_mal_formado_responde_400(self):
+        respuesta = self.client.post(self.url, 'no es json', content_type='application/json')
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertIn('error', respuesta.json())
+
+    def test_sin_sesion_responde_401_en_json(self):
+        respuesta = self.enviar([self.ficha_lote()], cliente=Client())
+        self.assertEqual(respuesta.status_code, 401)
+        self.assertEqual(respuesta.json()['codigo'], 'no_autenticado')
+
+    def test_csrf_invalido_responde_403_en_json(self):
+        cliente = Client(enforce_csrf_checks=True)
+        cliente.force_login(self.encuestador)
+        respuesta = self.enviar([self.ficha_lote()], cliente=cliente)
+        self.assertEqual(respuesta.status_code, 403)
+        self.assertEqual(respuesta.json()['codigo'], 'csrf')
+        self.assertFalse(FichaEvaluacion.objects.exists())
+
+
+class EstadisticaDiariaTests(DatosFichasMixin, TestCase):
+    """Resumen diario mantenido por los signals de FichaEvaluacion (estadisticas.py)."""
+
+    def resumen(self):
+        return {
+            e.nivel_riesgo: (e.cantidad, e.suma_puntaje, e.puntaje_min, e.puntaje_max)
+            for e in EstadisticaDiaria.objects.filter(encuestador=self.encuestador, institucion=self.institucion)
+        }
+
+    def assertIgualAReconstruido(self):
+        campos = ('dia', 'encuestador_id', 'institucion_id', 'nivel_riesgo', 'cantidad', 'suma_puntaje', 'puntaje_min', 'puntaje_max')
+        incremental = sorted(EstadisticaDiaria.objects.values_list(*campos))
+        reconstruir_estadisticas()
+        self.assertEqual(incremental, sorted(EstadisticaDiaria.objects.values_list(*campos)))
+
+    def test_crear_suma_cantidad_puntaje_y_extremos(self):
+        self.crear_ficha(puntaje_total=10)
+        self.crear_ficha(puntaje_total=4)
+        self.crear_ficha(puntaje_total=30, nivel_riesgo='RIESGO MODERADO')
+
+        self.assertEqual(self.resumen(), {
+            'RIESGO BAJO': (2, 14, 4, 10),
+            'RIESGO MODERADO': (1, 30, 30, 30),
+        })
+        self.assertIgualAReconstruido()
+
+    def test_editar_el_puntaje_recalcula_min_y_max(self):
+        minima = self.crear_ficha(puntaje_total=2)
+        self.crear_ficha(puntaje_total=10)
+        maxima = self.crear_ficha(puntaje_total=20)
+
+        minima.puntaje_total = 15
+        minima.save()
+        self.assertEqual(self.resumen(), {'RIESGO BAJO': (3, 45, 10, 20)})
+
+        maxima.puntaje_total = 12
+        maxima.save()
+        self.assertEqual(self.resumen(), {'RIESGO BAJO': (3, 37, 10, 15)})
+        self.assertIgualAReconstruido()
+
+    def test_cambiar_de_nivel_mueve_la_ficha_de_grupo(self):
+        ficha = self.crear_ficha(puntaje_total=20)
+        self.crear_ficha(puntaje_total=5)
+
+        ficha.puntaje_total = 80
+        ficha.nivel_riesgo = 'RIESGO SEVERO'
+        ficha.save()
+
+        self.assertEqual(self.resumen(), {
+            'RIESGO BAJO': (1, 5, 5, 5),
+            'RIESGO SEVERO': (1, 80, 80, 80),
+        })
+        self.assertIgualAReconstruido()
+
+    def test_eliminar_descuenta_y_borra_el_grupo_vacio(self):
+        unica = self.crear_ficha(puntaje_total=30, nivel_riesgo='RIESGO MODERADO')
+        self.crear_ficha(puntaje_total=3)
+        menor = self.crear_ficha(puntaje_total=1)
+
+        unica.delete()
+        menor.delete()
+
+        self.assertEqual(self.resumen(), {'RIESGO BAJO': (1, 3, 3, 3)})
+        self.assertIgualAReconstruido()
+
+    def test_guardar_sin_cambios_no_toca_el_resumen(self):
+        ficha = self.crear_ficha(puntaje_total=10)
+        ficha.direccion_domicilio = 'Jr. Lima 456'
+        ficha.save()
+
+        self.assertEqual(self.resumen(), {'RIESGO BAJO': (1, 10, 10, 10)})
+
+
+class AuditoriaEdicionTests(DatosFichasMixin, TestCase):
+    """Auditoría estructurada de editar_ficha (auditoria.py) y su búsqueda por equipo."""
+
+    def setUp(self):
+        super().setUp()
+        ubigeo = {
+            'ubigeo_departamento': self.departamento,
+            'ubigeo_provincia': self.provincia,
+            'ubigeo_distrito': self.distrito,
+        }
+        self.ficha = self.crear_ficha(version_cuestionario_id=self.catalogo.version_cuestionario_id, **ubigeo)
+        for pregunta_id, opcion_id in self.respuestas(0).items():
+            FichaDetalle.objects.create(
+                ficha=self.ficha, pregunta_id=pregunta_id, opcion_seleccionada_id=opcion_id, puntaje_obtenido=0,
+            )
+        self.url = reverse('editar_ficha', args=[self.ficha.pk])
+        self.client.force_login(self.encuestador)
+
+    def formulario(self, respuestas=None, **cambios):
+        """POST de editar_ficha con los datos actuales de la ficha, más 'cambios'."""
+        datos = {campo: '' for campo in FichaEvaluacionForm._meta.fields}
+        datos.update({k: v for k, v in self.datos_ficha(**cambios).items() if k in datos})
+        datos.update({
+            'ubigeo_departamento': self.departamento.pk,
+            'ubigeo_provincia': self.provincia.pk,
+            'ubigeo_distrito': self.distrito.pk,
+        })
+        for pregunta_id, opcion_id in (respuestas or self.respuestas(0)).items():
+            datos[f'pregunta_{pregunta_id}'] = opcion_id
+        return datos
+
+    def test_edicion_registra_un_historial_y_un_cambio_por_campo(self):
+        pregunta_id = next(iter(self.opciones))
+        respuestas = {**self.respuestas(0), pregunta_id: self.opciones[pregunta_id][2].pk}
+
+        respuesta = self.client.post(self.url, self.formulario(respuestas, direccion_domicilio='Jr. Lima 456'))
+        self.assertRedirects(respuesta, reverse('listar_fichas'), fetch_redirect_response=False)
+
+        historial = FichaHistorial.objects.get(ficha=self.ficha)
+        self.assertEqual(historial.usuario, self.encuestador)
+        cambios = {
+            c.campo: (c.pregunta_id, c.valor_anterior, c.valor_nuevo)
+            for c in CambioFicha.objects.filter(historial=historial)
+        }
+        self.assertEqual(cambios, {
+            'direccion_domicilio': (None, 'Av. Perú 123', 'Jr. Lima 456'),
+            CambioFicha.CAMPO_PREGUNTA: (pregunta_id, '0 puntos', '100 puntos'),
+            'puntaje_total': (None, '0', '100'),
+            'nivel_riesgo': (None, 'RIESGO BAJO', 'RIESGO SEVERO'),
+        })
+        self.assertEqual(CambioFicha.objects.filter(ficha=self.ficha, fecha_edicion=historial.fecha_edicion).count(), 4)
+
+    def test_guardar_sin_cambios_no_registra_auditoria(self):
+        respuesta = self.client.post(self.url, self.formulario())
+        self.assertRedirects(respuesta, reverse('listar_fichas'), fetch_redirect_response=False)
+        self.assertFalse(FichaHistorial.objects.exists())
+        self.assertFalse(CambioFicha.objects.exists())
+
+    def test_busqueda_solo_muestra_cambios_del_equipo(self):
+        self.client.post(self.url, self.formulario(direccion_domicilio='Jr. Lima 456'))
+        otro = Usuario.objects.create_user(
+            'otro@test.pe', 'clave', rol='SUPERVISOR', nombres='Otto', apellidos='Supervisor', dni='10000003',
+        )
+        url = reverse('auditoria_fichas')
+
+        self.client.force_login(self.supervisor)
+        propios = self.client.get(url, {'campo': 'direccion_domicilio'}).context['cambios'].object_list
+        self.assertEqual([c.ficha_id for c in propios], [self.ficha.pk])
+
+        self.client.force_login(otro)
+        self.assertEqual(list(self.client.get(url).context['cambios'].object_list), [])
+
+
+class PaginacionCursorTests(DatosFichasMixin, TestCase):
+    """Paginación por cursor y recorridos en lotes (paginacion.py)."""
+
+    def crear_fichas(self, cantidad):
+        """Fichas con bulk_create (sin signals): aquí solo importa el orden."""
+        datos = self.datos_ficha()
+        datos['fecha_nacimiento'] = date.fromisoformat(datos['fecha_nacimiento'])
+        FichaEvaluacion.objects.bulk_create([
+            FichaEvaluacion(usuario_registra=self.encuestador, institucion=self.institucion, **datos)
+            for _ in range(cantidad)
+        ])
+        return FichaEvaluacion.objects.all()
+
+    def fichas_con_empates(self):
+        """Siete fichas en tres instantes: 3 + 3 + 1 comparten fecha_registro."""
+        fichas = self.crear_fichas(7)
+        ids = list(fichas.order_by('id').values_list('id', flat=True))
+        base = timezone.now().replace(microsecond=0)
+        for horas, grupo in ((2, ids[:3]), (1, ids[3:6]), (0, ids[6:])):
+            fichas.filter(id__in=grupo).update(fecha_registro=base - timedelta(hours=horas))
+        orden = list(fichas.order_by('-fecha_registro', '-id').values_list('id', flat=True))
+        return fichas, orden
+
+    def test_avanzar_y_retroceder_con_fechas_empatadas(self):
+        fichas, orden = self.fichas_con_empates()
+
+        paginas, token = [], None
+        while True:
+            pagina = paginar_por_cursor(fichas, token, tamano=3)
+            paginas.append(pagina)
+            if not pagina.has_next:
+                break
+            token = pagina.cursor_siguiente
+        self.assertEqual([[f.id for f in p] for p in paginas], [orden[:3], orden[3:6], orden[6:]])
+        self.assertFalse(paginas[0].has_previous)
+        self.assertTrue(paginas[-1].has_previous)
+
+        anterior = paginar_por_cursor(fichas, paginas[-1].cursor_anterior, tamano=3)
+        self.assertEqual([f.id for f in anterior], orden[3:6])
+        self.assertTrue(anterior.has_next and anterior.has_previous)
+        primera = paginar_por_cursor(fichas, anterior.cursor_anterior, tamano=3)
+        self.assertEqual([f.id for f in primera], orden[:3])
+        self.assertFalse(primera.has_previous)
+
+    def test_cursor_alterado_vuelve_a_la_primera_pagina(self):
+        fichas, orden = self.fichas_con_empates()
+        token = paginar_por_cursor(fichas, None, tamano=3).cursor_siguiente
+
+        alterado = token[:-1] + ('A' if token[-1] != 'A' else 'B')
+        fecha = fichas.get(id=orden[2]).fecha_registro.isoformat()
+        firmado_sin_direccion = signing.dumps(['x', fecha, orden[2]], salt=SALT_CURSOR, compress=True)
+        for invalido in (alterado, 'basura', firmado_sin_direccion):
+            pagina = paginar_por_cursor(fichas, invalido, tamano=3)
+            self.assertEqual([f.id for f in pagina], orden[:3])
+            self.assertFalse(pagina.has_previous)
+
+    def test_total_se_corta_en_el_limite(self):
+        fichas = self.crear_fichas(LIMITE_TOTAL)
+        self.assertEqual(contar_hasta(fichas), (LIMITE_TOTAL, False))
+
+        self.crear_fichas(1)
+        self.assertEqual(contar_hasta(fichas), (LIMITE_TOTAL, True))
+        pagina = paginar_por_cursor(fichas, None, con_total=True)
+        self.assertEqual((pagina.total, pagina.total_es_aproximado), (LIMITE_TOTAL, True))
+
+    def test_lotes_recorren_cada_fila_una_vez(self):
+        fichas, orden = self.fichas_con_empates()
+        filas = fichas.values('id', 'fecha_registro')
+
+        por_fecha = [[f['id'] for f in lote] for lote in lotes_por_cursor(filas, campo='fecha_registro', tamano=2)]
+        self.assertEqual([len(lote) for lote in por_fecha], [2, 2, 2, 1])
+        self.assertEqual([pk for lote in por_fecha for pk in lote], orden)
+
+        por_id = [f['id'] for lote in lotes_por_cursor(filas, tamano=3) for f in lote]
+        self.assertEqual(por_id, sorted(orden))
+
+
+class CacheTablerosTests(DatosFichasMixin, TestCase):
+    """Cache de tableros e invalidación por ámbito al confirmar (cache_tableros.py)."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.calculos = {}
+
+    def tablero(self, nombre, usuario, ambito):
+        """Valor en cache del tablero; cuenta cuántas veces se tuvo que calcular."""
+        def calcular():
+            self.calculos[nombre] = self.calculos.get(nombre, 0) + 1
+            return self.calculos[nombre]
+        return cache_tableros.obtener(nombre, usuario, [ambito], calcular)
+
+    def tableros(self):
+        return (
+            self.tablero('kpis_encuestador', self.encuestador, f'encuestador:{self.encuestador.pk}'),
+            self.tablero('dashboard_supervisor', self.supervisor, f'equipo:{self.supervisor.pk}'),
+            self.tablero('contadores_usuarios', self.supervisor, 'usuarios'),
+        )
+
+    def test_guardar_ficha_recalcula_los_tableros_del_encuestador_y_su_supervisor(self):
+        self.assertEqual(self.tableros(), (1, 1, 1))
+        self.assertEqual(self.tableros(), (1, 1, 1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.crear_ficha(puntaje_total=10)
+
+        # Los contadores de usuarios no dependen de las fichas: siguen en cache
+        self.assertEqual(self.tableros(), (2, 2, 1))
+
+    def test_transaccion_revertida_no_invalida(self):
+        self.assertEqual(self.tableros(), (1, 1, 1))
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(RuntimeError):
+                with transaction.atomic():
+                    self.crear_ficha(puntaje_total=10)
+                    raise RuntimeError('rollback')
+
+        self.assertEqual(callbacks, [])
+        self.assertEqual(self.tableros(), (1, 1, 1))
+
+    def test_contadores_de_aciertos_y_fallos(self):
+        def contadores():
+            tablero = cache_tableros.estadisticas()['tableros']['kpis_encuestador']
+            return tablero['aciertos'], tablero['fallos'], tablero['tasa_aciertos']
+
+        self.assertEqual(contadores(), (0, 0, None))
+        self.tableros()
+        self.assertEqual(contadores(), (0, 1, 0.0))
+        self.tableros()
+        self.tableros()
+        self.assertEqual(contadores(), (2, 1, 0.667))
+
+
+class CargarDataTests(DatosFichasMixin, TestCase):
+    """Carga incremental del banco de preguntas (management/commands/cargar_data.py)."""
+
+    def cargar(self, *args):
+        """Ejecuta el comando; retorna (salida, sentencias que escribieron en la base)."""
+        salida = StringIO()
+        with CaptureQueriesContext(connection) as consultas:
+            call_command('cargar_data', *args, stdout=salida)
+        escrituras = [
+            q['sql'] for q in consultas.captured_queries
+            if q['sql'].lstrip().upper().startswith(('INSERT', 'UPDATE', 'DELETE'))
+        ]
+        return salida.getvalue(), escrituras
+
+    def banco(self):
+        return (
+            sorted(Dimension.objects.values_list('id', 'nombre', 'descripcion', 'orden')),
+            sorted(Pregunta.objects.values_list('id', 'dimension_id', 'enunciado', 'orden')),
+            sorted(Opcion.objects.values_list('id', 'pregunta_id', 'texto', 'puntaje')),
+        )
+
+    def test_segunda_carga_no_escribe_nada(self):
+        _, escrituras = self.cargar()
+        self.assertTrue(escrituras)
+        antes = self.banco()
+
+        salida, escrituras = self.cargar()
+        self.assertEqual(escrituras, [])
+        self.assertIn('ya está al día', salida)
+        self.assertEqual(self.banco(), antes)
+
+    def test_recarga_conserva_los_ids_de_las_opciones_respondidas(self):
+        self.cargar()
+        pregunta = Pregunta.objects.exclude(dimension__nombre='Socioeconómicas').order_by('id').first()
+        opcion = pregunta.opciones.order_by('id').first()
+        ids_opciones = set(Opcion.objects.values_list('id', flat=True))
+
+        # Deriva respecto a la estructura: texto y puntaje editados a mano, dos opciones de más
+        Pregunta.objects.filter(pk=pregunta.pk).update(enunciado='Enunciado editado')
+        Opcion.objects.filter(pk=opcion.pk).update(puntaje=opcion.puntaje + 50)
+        sobrante_respondida = Opcion.objects.create(pregunta=pregunta, texto='Sobrante con respuestas', puntaje=1)
+        sobrante_libre = Opcion.objects.create(pregunta=pregunta, texto='Sobrante sin respuestas', puntaje=1)
+        ficha = self.crear_ficha()
+        for elegida in (opcion, sobrante_respondida):
+            FichaDetalle.objects.create(
+                ficha=ficha, pregunta=pregunta, opcion_seleccionada=elegida, puntaje_obtenido=elegida.puntaje,
+            )
+
+        salida, _ = self.cargar()
+
+        self.assertIn('1 opción(es) sobrante(s) se conservaron', salida)
+        pregunta_recargada = Pregunta.objects.get(pk=pregunta.pk)
+        self.assertEqual(pregunta_recargada.enunciado, pregunta.enunciado)
+        self.assertEqual(Opcion.objects.get(pk=opcion.pk).puntaje, opcion.puntaje)
+        self.assertTrue(Opcion.objects.filter(pk=sobrante_respondida.pk).exists())
+        self.assertFalse(Opcion.objects.filter(pk=sobrante_libre.pk).exists())
+        self.assertEqual(set(Opcion.objects.values_list('id', flat=True)), ids_opciones | {sobrante_respondida.pk})
+
+    def test_dry_run_no_escribe(self):
+        salida, escrituras = self.cargar('--dry-run')
+        self.assertEqual(escrituras, [])
+        self.assertIn('+ Dimensión', salida)
+        self.assertFalse(Pregunta.objects.exclude(dimension__nombre='Socioeconómicas').exists())
+
+        self.cargar()
+        opcion = Opcion.objects.exclude(pregunta__dimension__nombre='Socioeconómicas').order_by('id').first()
+        Opcion.objects.filter(pk=opcion.pk).update(puntaje=opcion.puntaje + 50)
+        antes = self.banco()
+
+        salida, escrituras = self.cargar('--dry-run')
+        self.assertEqual(escrituras, [])
+        self.assertIn(f"~ Opción '{opcion.texto}' -> {opcion.puntaje} pts", salida)
+        self.assertEqual(self.banco(), antes)
@@ -0,0 +1,175 @@
+"""
+Exportaciones en segundo plano (cola en base de datos, sin broker externo).
+
+Flujo:
+  1. La vista llama a solicitar_exportacion() con los filtros del listado; se crea
+     un TrabajoExportacion PENDIENTE (o se reutiliza uno igual y reciente).
+  2. 'python manage.py procesar_exportaciones' toma los trabajos con
+     tomar_siguiente() y genera el archivo en MEDIA_ROOT con procesar().
+  3. El usuario consulta el estado y descarga el archivo cuando está TERMINADO.
+"""
+import hashlib
+import json
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import FichaEvaluacion, TrabajoExportacion
+from .busqueda import filtrar_por_dni
+from .filtros import leer_rango, filtrar_por_fecha
+from .paginacion import contar_hasta
+from .exportacion import ESCRITORES, REPORTE_ENCUESTADOR, REPORTE_SUPERVISOR
+
+# Mismos parámetros GET que usan mis_encuestas, listar_mis_fichas y ver_detalle_equipo
+FILTROS_EXPORTACION = ('usuario_id', 'institucion_id', 'dni', 'dni_modo', 'rango_fecha', 'fecha_desde', 'fecha_hasta')
+
+
+def leer_filtros(*fuentes):
+    """Toma los filtros conocidos de uno o más QueryDict (el primero que los traiga gana)."""
+    filtros = {}
+    for campo in FILTROS_EXPORTACION:
+        for datos in fuentes:
+            valor = (datos.get(campo) or '').strip()
+            if valor:
+                filtros[campo] = valor
+                break
+    return filtros
+
+
+def reporte_para(usuario):
+    return REPORTE_ENCUESTADOR if usuario.rol == 'ENCUESTADOR' else REPORTE_SUPERVISOR
+
+
+def fichas_para_exportar(usuario, filtros):
+    """Queryset a exportar: mismo alcance y filtros que las vistas exportar_excel*."""
+    if usuario.rol == 'ENCUESTADOR':
+        fichas = FichaEvaluacion.objects.filter(usuario_registra=usuario)
+    else:
+        # Admin o Supervisor ven todo
+        fichas = FichaEvaluacion.objects.all()
+        if filtros.get('usuario_id'):
+            fichas = fichas.filter(usuario_registra_id=filtros['usuario_id'])
+
+    if filtros.get('institucion_id'):
+        fichas = fichas.filter(institucion_id=filtros['institucion_id'])
+
+    fichas = filtrar_por_dni(fichas, filtros.get('dni'), filtros.get('dni_modo', ''))
+
+    fichas = filtrar_por_fecha(fichas, leer_rango(filtros))
+
+    return fichas.order_by('-fecha_registro')
+
+
+def exportacion_grande(fichas):
+    """
+    True si 'fichas' supera EXPORTACION_INLINE_MAXIMO: la vista la encola en lugar
+    de generarla dentro del request (COUNT acotado, no recorre toda la tabla).
+    """
+    _, excede = contar_hasta(fichas, settings.EXPORTACION_INLINE_MAXIMO)
+    return excede
+
+
+def calcular_huella(usuario, formato, filtros):
+    contenido = json.dumps([usuario.pk, formato, filtros], sort_keys=True)
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+
+def solicitar_exportacion(usuario, formato, filtros):
+    """
+    Crea un trabajo PENDIENTE. Si el mismo usuario pidió lo mismo hace poco
+    (EXPORTACION_REUTILIZAR_MINUTOS) se devuelve ese trabajo en lugar de generar
+    otro archivo. Retorna (trabajo, reutilizado).
+    """
+    if formato not in ESCRITORES:
+        raise ValueError(f"Formato de exportación no soportado: {formato}")
+
+    huella = calcular_huella(usuario, formato, filtros)
+    limite = timezone.now() - timedelta(minutes=settings.EXPORTACION_REUTILIZAR_MINUTOS)
+    existente = (
+        TrabajoExportacion.objects.filter(usuario=usuario, huella=huella)
+        .filter(
+            Q(estado__in=[TrabajoExportacion.PENDIENTE, TrabajoExportacion.PROCESANDO])
+            | Q(estado=TrabajoExportacion.TERMINADO, fecha_fin__gte=limite)
+        )
+        .order_by('-fecha_creacion')
+        .first()
+    )
+    if existente:
+        return existente, True
+
+    trabajo = TrabajoExportacion.objects.create(
+        usuario=usuario, formato=formato, filtros=filtros, huella=huella,
+    )
+    return trabajo, False
+
+
+def tomar_siguiente():
+    """
+    Reserva el trabajo pendiente más antiguo. El UPDATE condicionado al estado
+    hace que, con varios workers, solo uno se quede con cada trabajo.
+    """
+    while True:
+        candidato = (
+            TrabajoExportacion.objects.filter(estado=TrabajoExportacion.PENDIENTE)
+            .order_by('id').values_list('id', flat=True).first()
+        )
+        if candidato is None:
+            return None
+        tomado = TrabajoExportacion.objects.filter(
+            pk=candidato, estado=TrabajoExportacion.PENDIENTE
+        ).update(estado=TrabajoExportacion.PROCESANDO, fecha_inicio=timezone.now())
+        if tomado:
+            return TrabajoExportacion.objects.select_related('usuario').get(pk=candidato)
+        # Otro worker lo tomó primero: probamos con el siguiente
+
+
+def procesar(trabajo):
+    """Genera el archivo del trabajo en MEDIA_ROOT y lo marca TERMINADO (o ERROR)."""
+    reporte = reporte_para(trabajo.usuario)
+    fichas = fichas_para_exportar(trabajo.usuario, trabajo.filtros)
+    escribir = ESCRITORES[trabajo.formato]
+
+    try:
+        with tempfile.TemporaryFile() as temporal:
+            trabajo.total_filas = escribir(temporal, reporte, fichas)
+            temporal.seek(0)
+            nombre = f"Reporte_Fichas_{trabajo.pk}.{trabajo.formato}"
+            trabajo.archivo.save(nombre, File(temporal), save=False)
+    except Exception as e:
+        trabajo.estado = TrabajoExportacion.ERROR
+        trabajo.error = str(e)
+    else:
+        trabajo.estado = TrabajoExportacion.TERMINADO
+        trabajo.error = ''
+
+    trabajo.fecha_fin = timezone.now()
+    trabajo.save(update_fields=['archivo', 'total_filas', 'estado', 'error', 'fecha_fin'])
+    return trabajo
+
+
+def reencolar_colgados(minutos):
+    """Devuelve a PENDIENTE los trabajos PROCESANDO de un worker que murió a medio camino."""
+    limite = timezone.now() - timedelta(minutes=minutos)
+    return TrabajoExportacion.objects.filter(
+        estado=TrabajoExportacion.PROCESANDO, fecha_inicio__lt=limite
+    ).update(estado=TrabajoExportacion.PENDIENTE, fecha_inicio=None)
+
+
+def purgar_vencidos(dias):
+    """Borra los trabajos (y sus archivos) terminados hace más de 'dias' días."""
+    limite = timezone.now() - timedelta(days=dias)
+    vencidos = TrabajoExportacion.objects.filter(
+        estado__in=[TrabajoExportacion.TERMINADO, TrabajoExportacion.ERROR],
+        fecha_fin__lt=limite,
+    )
+    total = 0
+    for trabajo in vencidos.iterator():
+        if trabajo.archivo:
+            trabajo.archivo.delete(save=False)
+        trabajo.delete()
+        total += 1
+    return total
@@ -1,5 +1,7 @@
 from django.urls import path
 from .views import mis_encuestas,registrar_ficha,ver_ficha, exportar_excel,lista_instituciones,gestion_institucion,eliminar_institucion,lista_banco_preguntas,gestion_dimension,gestion_pregunta,eliminar_generico, listar_mis_fichas,editar_ficha
+from .views import solicitar_exportacion_view, mis_exportaciones, estado_exportacion, descargar_exportacion
+from .views import auditoria_fichas, sincronizar_fichas
 
 urlpatterns = [
     path('', mis_encuestas, name='fichas_root'),
@@ -9,6 +11,16 @@ urlpatterns = [
     path('mis-fichas-socio-familiares/', listar_mis_fichas, name='listar_fichas'),
     path('ficha/editar/<int:ficha_id>/', editar_ficha, name='editar_ficha'),
     path('exportar-excel/', exportar_excel, name='exportar_excel'),
+    path('auditoria/', auditoria_fichas, name='auditoria_fichas'),
+
+    # Exportaciones en segundo plano
+    path('exportaciones/', mis_exportaciones, name='mis_exportaciones'),
+    path('exportaciones/solicitar/', solicitar_exportacion_view, name='solicitar_exportacion'),
+    path('exportaciones/<int:pk>/estado/', estado_exportacion, name='estado_exportacion'),
+    path('exportaciones/<int:pk>/descargar/', descargar_exportacion, name='descargar_exportacion'),
+
+    # Sincronización en lote desde dispositivos sin conexión estable
+    path('api/sincronizar/', sincronizar_fichas, name='api_sincronizar_fichas'),
 
     # Instituciones
     path('config/instituciones/', lista_instituciones, name='lista_instituciones'),
@@ -1,17 +1,26 @@
 
+import asyncio
+from functools import wraps
+
+from django.conf import settings
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db import transaction
-from .models import FichaEvaluacion, FamiliarDelEvaluado, FichaDetalle, Pregunta, Opcion, Dimension, Institucion, FichaHistorial
-from apps.ubigeo.models import Departamento
+from .models import FichaEvaluacion, FamiliarDelEvaluado, FichaDetalle, Pregunta, Opcion, Dimension, Institucion, FichaHistorial, EstadisticaDiaria
+from apps.ubigeo.arbol import obtener_arbol
 from datetime import timedelta
 from django.utils import timezone
 from django.db.models import Q
 from .forms import PreguntaForm, OpcionFormSet
+from .catalogo import obtener_catalogo, invalidar_catalogo, catalogo_de_ficha, respuestas_de_ficha
+from .kpis import resumen_riesgo_diario
+from .puntaje import calcular_puntaje, calcular_puntaje_opciones, CAMPOS_PUNTAJE
+from .registro import leer_respuestas, cargar_opciones, leer_familiares, guardar_familiares, guardar_respuestas, actualizar_respuestas
 from django.db import transaction
 #apartado del administrador
-from django.shortcuts import render, redirect, get_object_or_404
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
 from django.contrib.auth.decorators import user_passes_test
 
 from django.core.paginator import Paginator
@@ -23,9 +32,22 @@ from .forms import InstitucionForm, DimensionForm, PreguntaForm
 
 from django.utils import timezone
 from datetime import timedelta
-import openpyxl
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-from django.http import HttpResponse
+from .exportacion import respuesta_xlsx, REPORTE_ENCUESTADOR
+from .models import TrabajoExportacion
+from .trabajos import leer_filtros, solicitar_exportacion, exportacion_grande
+from .busqueda import filtrar_por_dni
+from .filtros import leer_rango, filtrar_por_fecha
+from .paginacion import paginar_por_cursor, apaginar_por_cursor, listado_fichas, tamano_pagina
+from .asincrono import en_paralelo, arender
+from .sincronizacion import leer_lote, sincronizar_lote
+from .duplicados import posibles_duplicados
+from . import cache_tableros
+from .auditoria import cambio_campo, registrar_edicion, CAMPOS_DERIVADOS, campos_auditables, buscar_cambios
+from django.http import FileResponse, JsonResponse
+from django.urls import reverse
+from django.views.decorators.http import require_POST
+from django.views.decorators.csrf import csrf_exempt
+from django.middleware.csrf import CsrfViewMiddleware
 
 def es_admin(user):
     return user.is_authenticated and user.rol == 'ADMIN'
@@ -36,63 +58,56 @@ def es_supervisor(user):
 # =======================================================
 
 @login_required 
-def mis_encuestas(request):
+async def mis_encuestas(request):
     """
     Dashboard con Búsqueda y Filtros.
+    El historial y los KPIs son consultas independientes: se piden a la vez.
     """
+    usuario = await request.auser()
+
     # 1. BASE: Fichas del usuario
     mis_fichas = FichaEvaluacion.objects.filter(
-        usuario_registra=request.user
+        usuario_registra=usuario
     ).order_by('-fecha_registro')
 
     # 2. CAPTURAR PARÁMETROS DE BÚSQUEDA
     dni_query = request.GET.get('dni', '').strip()
+    dni_modo = request.GET.get('dni_modo', '')
     fecha_filtro = request.GET.get('rango_fecha', '')
     
     # 3. APLICAR FILTROS (Si existen)
     
-    # Filtro por DNI (Búsqueda exacta o parcial)
-    if dni_query:
-        mis_fichas = mis_fichas.filter(dni_evaluado__icontains=dni_query)
+    # Filtro por DNI (exacto o prefijo con índice; parcial solo con dni_modo=contiene)
+    mis_fichas = filtrar_por_dni(mis_fichas, dni_query, dni_modo)
 
-    # Filtro por Fecha
-    hoy = timezone.now().date()
-    if fecha_filtro == 'hoy':
-        mis_fichas = mis_fichas.filter(fecha_registro__date=hoy)
-    elif fecha_filtro == '7dias':
-        semana_atras = hoy - timedelta(days=7)
-        mis_fichas = mis_fichas.filter(fecha_registro__date__gte=semana_atras)
-    elif fecha_filtro == 'mes':
-        mes_atras = hoy - timedelta(days=30)
-        mis_fichas = mis_fichas.filter(fecha_registro__date__gte=mes_atras)
-
-    # 4. CALCULAR KPI's (Sobre el total histórico, NO sobre la búsqueda, para no perder contexto)
+    # Filtro por Fecha (preset o desde/hasta, como rango de timestamps en hora de Lima)
+    rango = leer_rango(request.GET)
+    mis_fichas = filtrar_por_fecha(mis_fichas, rango)
+
+    # 4. HISTORIAL PAGINADO Y KPI's (Sobre el total histórico, NO sobre la búsqueda, para no perder contexto)
     # Nota: Si prefieres que los KPIs cambien según la búsqueda, usa 'mis_fichas' en lugar de 'todas_mis_fichas'
-    todas_mis_fichas = FichaEvaluacion.objects.filter(usuario_registra=request.user)
-    
-    total = todas_mis_fichas.count()
-    bajo = todas_mis_fichas.filter(nivel_riesgo='RIESGO BAJO').count()
-    moderado = todas_mis_fichas.filter(nivel_riesgo='RIESGO MODERADO').count()
-    severo = todas_mis_fichas.filter(nivel_riesgo='RIESGO SEVERO').count()
-    critico = todas_mis_fichas.filter(nivel_riesgo='RIESGO CRÍTICO').count()
-   
-# if puntaje_total >= 126: ficha.nivel_riesgo = 'RIESGO CRÍTICO'
-#                 elif puntaje_total >= 76: ficha.nivel_riesgo = 'RIESGO SEVERO'
-#                 elif puntaje_total >= 26: ficha.nivel_riesgo = 'RIESGO MODERADO'
-#                 else: ficha.nivel_riesgo = 'RIESGO BAJO'
+    fichas, kpis = await en_paralelo(
+        # Historial paginado por cursor: nunca se renderizan todas las fichas
+        lambda: listado_fichas(request, mis_fichas),
+        # KPIs en cache por encuestador; los signals de la ficha los invalidan
+        lambda: cache_tableros.obtener(
+            'kpis_encuestador', usuario, [f'encuestador:{usuario.pk}'],
+            lambda: resumen_riesgo_diario(EstadisticaDiaria.objects.filter(encuestador=usuario)),
+        ),
+    )
+
     context = {
-        'fichas': mis_fichas,
-        'total': total,
-        'bajo': bajo,
-        'moderado': moderado,
-        'severo': severo,
-        'critico': critico, 
+        'fichas': fichas,
+        **kpis,  # total, bajo, moderado, severo, critico
         # Devolvemos los valores para mantenerlos en los inputs tras buscar
         'filtro_dni': dni_query,
-        'filtro_fecha': fecha_filtro
+        'filtro_dni_modo': dni_modo,
+        'filtro_fecha': fecha_filtro,
+        'filtro_desde': request.GET.get('fecha_desde', ''),
+        'filtro_hasta': request.GET.get('fecha_hasta', ''),
     }
     
-    return render(request, 'fichas/dashboard_encuestador.html', context)
+    return await arender(request, 'fichas/dashboard_encuestador.html', context)
 # =======================================================
 # PARTE 2: MODELO PRINCIPAL DE LA FICHA
 
@@ -101,11 +116,21 @@ def mis_encuestas(request):
 def registrar_ficha(request):
     if request.method == 'POST':
         try:
+            # 1. LEER Y VALIDAR RESPUESTAS (contra el catálogo en memoria)
+            catalogo = obtener_catalogo()
+            respuestas = leer_respuestas(request.POST)
+            opciones = cargar_opciones(respuestas, catalogo)
+            familiares = leer_familiares(request.POST)
+
+            # 2. CALCULAR PUNTAJES (total, por dimensión y nivel de riesgo)
+            resultado = calcular_puntaje_opciones(respuestas.values(), catalogo)
+
             with transaction.atomic():
-                # 1. CREAR FICHA
+                # 3. CREAR FICHA (ya con su puntaje, sin un segundo save)
                 ficha = FichaEvaluacion.objects.create(
                     usuario_registra=request.user,
                     institucion=Institucion.objects.first(),
+                    version_cuestionario_id=catalogo.version_cuestionario_id,
                     
                     # Datos Personales
                     nombres_evaluado=request.POST.get('nombres_encuestado', '').split(' ')[0], 
@@ -134,85 +159,79 @@ def registrar_ficha(request):
                     jefe_hogar=request.POST.get('jefe_hogar'),
                     num_integrantes=request.POST.get('num_integrantes') or 0,
                     observaciones_familia=request.POST.get('observaciones_familia'),
+
+                    # Resultado
+                    puntaje_total=resultado.puntaje_total,
+                    nivel_riesgo=resultado.nivel_riesgo,
+                    **resultado.por_dimension,
                 )
 
-                # 2. FAMILIARES
-                total_filas = int(request.POST.get('total_familiares', 0))
-                for i in range(1, total_filas + 1):
-                    nombre = request.POST.get(f'fam_{i}_nombre')
-                    if nombre:
-                        FamiliarDelEvaluado.objects.create(
-                            ficha=ficha,
-                            nombres=nombre,
-                            parentesco=request.POST.get(f'fam_{i}_parentesco', ''),
-                            edad=request.POST.get(f'fam_{i}_edad') or 0,
-                            sexo=request.POST.get(f'fam_{i}_sexo', 'M'),
-                            estado_civil=request.POST.get(f'fam_{i}_ecivil', ''),
-                            nivel_educativo=request.POST.get(f'fam_{i}_neducativo', ''),
-                            ocupacion=request.POST.get(f'fam_{i}_ocupacion', ''),
-                            ingresos=request.POST.get(f'fam_{i}_ingresos') or 0
-                        )
-
-                # 3. PREGUNTAS
-                preguntas = Pregunta.objects.all()
-                puntaje_total = 0
-                for pregunta in preguntas:
-                    opcion_id = request.POST.get(f'pregunta_{pregunta.id}')
-                    if opcion_id:
-                        opcion = Opcion.objects.get(id=opcion_id)
-                        FichaDetalle.objects.create(
-                            ficha=ficha,
-                            pregunta=pregunta,
-                            opcion_seleccionada=opcion,
-                            puntaje_obtenido=opcion.puntaje
-                        )
-                        puntaje_total += opcion.puntaje
-
-                # 4. CALCULAR RIESGO
-                ficha.puntaje_total = puntaje_total
-                if puntaje_total >= 126: ficha.nivel_riesgo = 'RIESGO CRÍTICO'
-                elif puntaje_total >= 76: ficha.nivel_riesgo = 'RIESGO SEVERO'
-                elif puntaje_total >= 26: ficha.nivel_riesgo = 'RIESGO MODERADO'
-                else: ficha.nivel_riesgo = 'RIESGO BAJO'
-                
-                ficha.save()
+                # 4. FAMILIARES Y RESPUESTAS (bulk_create: una consulta por tabla)
+                guardar_familiares(ficha, familiares)
+                guardar_respuestas(ficha, respuestas, opciones)
+
                 messages.success(request, f'Ficha guardada. Riesgo: {ficha.nivel_riesgo}')
+
+                # Se guarda igual, pero se avisa si el estudiante ya parece registrado en la institución
+                repetidas = posibles_duplicados(ficha)
+                if repetidas:
+                    messages.warning(request, 'Posible duplicado: ya existen fichas de este estudiante en la institución ({}).'.format(
+                        ', '.join(f"N° {f['id']} del {timezone.localtime(f['fecha_registro']):%d/%m/%Y}" for f in repetidas)
+                    ))
                 return redirect('mis_encuestas')
 
         except Exception as e:
             messages.error(request, f'Error al guardar: {str(e)}')
-            dimensiones = Dimension.objects.prefetch_related('preguntas__opciones').order_by('orden')
-            departamentos = Departamento.objects.all().order_by('nombre')
+            dimensiones = obtener_catalogo().dimensiones
+            departamentos = obtener_arbol().departamentos
             return render(request, 'fichas/form_riesgo.html', {'dimensiones': dimensiones, 'departamentos': departamentos})
 
     # GET
-    dimensiones = Dimension.objects.prefetch_related('preguntas__opciones').order_by('orden')
-    departamentos = Departamento.objects.all().order_by('nombre')
+    dimensiones = obtener_catalogo().dimensiones
+    departamentos = obtener_arbol().departamentos
     return render(request, 'fichas/form_riesgo.html', {'dimensiones': dimensiones, 'departamentos': departamentos})
 
 from django.shortcuts import render, redirect, get_object_or_404
 # ... tus otros imports ...
 
 @login_required
-def ver_ficha(request, ficha_id):
-    # 1. Obtener la ficha (o 404 si no existe)
-    ficha = get_object_or_404(FichaEvaluacion, id=ficha_id)
-    
+async def ver_ficha(request, ficha_id):
+    usuario = await request.auser()
+
     # OPCIONAL: Seguridad (Solo ver tus propias fichas)
     # if ficha.usuario_registra != request.user:
     #     return redirect('mis_encuestas')
 
-    # 2. Obtener familiares
-    familiares = ficha.familiares.all()
+    # 1. Ficha (o 404), familiares, respuestas e historial dependen solo de ficha_id: van a la vez
+    consultas = [
+        lambda: get_object_or_404(
+            FichaEvaluacion.objects.select_related(
+                'institucion', 'ubigeo_departamento', 'ubigeo_provincia', 'ubigeo_distrito'
+            ),
+            id=ficha_id,
+        ),
+        lambda: list(FamiliarDelEvaluado.objects.filter(ficha_id=ficha_id)),
+        lambda: list(FichaDetalle.objects.filter(ficha_id=ficha_id).values_list(
+            'pregunta_id', 'opcion_seleccionada_id', 'puntaje_obtenido'
+        )),
+    ]
+    # Historial paginado por cursor (índice ficha + fecha_edicion), solo lo ve el supervisor
+    ficha_historial = None
+    if usuario.rol == 'SUPERVISOR':
+        historial = FichaHistorial.objects.filter(ficha_id=ficha_id).select_related('usuario')
+        ficha_historial, (ficha, familiares, detalles) = await asyncio.gather(
+            apaginar_por_cursor(historial, request.GET.get('cursor'), campo='fecha_edicion', con_total=True),
+            en_paralelo(*consultas),
+        )
+    else:
+        ficha, familiares, detalles = await en_paralelo(*consultas)
 
-    ficha_historial = FichaHistorial.objects.filter(ficha=ficha).order_by('-fecha_edicion')
-    respuestas = FichaDetalle.objects.filter(ficha=ficha).select_related(
-        'pregunta', 
-        'pregunta__dimension', 
-        'opcion_seleccionada'
-    ).order_by('pregunta__dimension__orden', 'pregunta__orden')
+    # 2. Textos y orden salen de la versión del cuestionario con la que se llenó la ficha
+    # (cacheada por proceso: normalmente no consulta la BD)
+    catalogo = await sync_to_async(catalogo_de_ficha)(ficha)
+    respuestas = respuestas_de_ficha(detalles, catalogo)
 
-    return render(request, 'fichas/ver_ficha.html', {
+    return await arender(request, 'fichas/ver_ficha.html', {
         'ficha': ficha,
         'familiares': familiares,
         'respuestas': respuestas,
@@ -228,125 +247,159 @@ from .models import FichaEvaluacion
 from .models import FichaEvaluacion, Institucion # Importamos Institucion
 
 @user_passes_test(es_supervisor)
-def listar_mis_fichas(request):
+async def listar_mis_fichas(request):
     # 1. Obtener parámetros de búsqueda
     # Usamos el ID de la institución para una búsqueda más precisa
     inst_id = request.GET.get('institucion_id', '') 
-    search_dni = request.GET.get('dni', '')
+    search_dni = request.GET.get('dni', '').strip()
+    dni_modo = request.GET.get('dni_modo', '')
 
     # 2. Queryset base
-    queryset = FichaEvaluacion.objects.all().select_related('institucion').order_by('-fecha_registro')
+    queryset = FichaEvaluacion.objects.all().select_related('institucion', 'usuario_registra').order_by('-fecha_registro')
 
     # 3. Aplicar filtros
     if inst_id:
         queryset = queryset.filter(institucion_id=inst_id)
     
-    if search_dni:
-        queryset = queryset.filter(dni_evaluado__icontains=search_dni)
-
-    # 4. Traer todas las instituciones para el combo
-    instituciones = Institucion.objects.all().order_by('nombre')
+    queryset = filtrar_por_dni(queryset, search_dni, dni_modo)
 
-    # 5. Paginación
-    paginator = Paginator(queryset, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # 4. Instituciones para el combo y 5. paginación por cursor (fecha_registro, id), a la vez:
+    # sin OFFSET, cada página cuesta lo mismo
+    (instituciones,), page_obj = await asyncio.gather(
+        en_paralelo(lambda: list(Institucion.objects.all().order_by('nombre'))),
+        apaginar_por_cursor(queryset, request.GET.get('cursor'), con_total=True),
+    )
 
-    return render(request, 'fichas/listar_fichas.html', {
+    return await arender(request, 'fichas/listar_fichas.html', {
         'fichas': page_obj,
         'instituciones': instituciones, # Enviamos la lista de instituciones
         'inst_id': inst_id,             # Enviamos el ID seleccionado para mantenerlo en el combo
         'search_dni': search_dni,
+        'dni_modo': dni_modo,
     })
 
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from .models import FichaEvaluacion, FichaHistorial
 from .forms import FichaEvaluacionForm
+from django.core.exceptions import ValidationError
 
 @login_required
 def editar_ficha(request, ficha_id):
-    # 1. Traemos la ficha original de la DB
-    ficha = get_object_or_404(FichaEvaluacion, id=ficha_id)
-    dimensiones = Dimension.objects.prefetch_related('preguntas__opciones').all().order_by('orden')
-    
-    # 2. Diccionario de respuestas actuales para auditar preguntas
-    detalles_actuales = {
-        d.pregunta_id: d.opcion_seleccionada.texto 
-        for d in ficha.detalles.select_related('opcion_seleccionada').all()
+    # 1. Traemos la ficha original (con los ubigeos que muestra la auditoría) y sus respuestas
+    ficha = get_object_or_404(
+        FichaEvaluacion.objects.select_related(
+            'ubigeo_departamento', 'ubigeo_provincia__departamento', 'ubigeo_distrito__provincia'
+        ),
+        id=ficha_id,
+    )
+    catalogo = obtener_catalogo()
+    dimensiones = catalogo.dimensiones
+
+    # 2. Respuestas actuales en una sola consulta: {pregunta_id: FichaDetalle}
+    actuales = {
+        d.pregunta_id: d
+        for d in ficha.detalles.only('id', 'ficha_id', 'pregunta_id', 'opcion_seleccionada_id', 'puntaje_obtenido')
     }
 
     if request.method == 'POST':
+        # Copia "congelada" de la cabecera antes de que el formulario toque la instancia
+        originales = {campo: getattr(ficha, campo) for campo in FichaEvaluacionForm._meta.fields}
+        catalogo_anterior = catalogo_de_ficha(ficha)
         form = FichaEvaluacionForm(request.POST, instance=ficha)
-        
-        if form.is_valid():
-            cambios_detectados = []
 
-            # --- CORRECCIÓN DE AUDITORÍA DE CABECERA ---
-            # Obtenemos una copia "congelada" de la ficha tal como está en la DB
-            ficha_original = FichaEvaluacion.objects.get(pk=ficha.pk)
-
-            for campo in form.changed_data:
-                # Sacamos el valor de la copia que NO ha sido tocada por el formulario
-                valor_antiguo = getattr(ficha_original, campo)
-                valor_nuevo = form.cleaned_data.get(campo)
-                
-                # Solo registramos si realmente son diferentes (evita ruidos)
-                if valor_antiguo != valor_nuevo:
-                    cambios_detectados.append(f"Campo {campo}: '{valor_antiguo}' ➔ '{valor_nuevo}'")
-
-            # Ahora sí, preparamos el guardado
-            ficha = form.save(commit=False)
-            nuevo_puntaje_total = 0
-
-            # --- AUDITORÍA DE PREGUNTAS (MINUCIOSA) ---
-            for key, value in request.POST.items():
-                if key.startswith('pregunta_'):
-                    id_pregunta = int(key.split('_')[1])
-                    id_opcion_nueva = int(value)
-                    
-                    pregunta_obj = Pregunta.objects.get(id=id_pregunta)
-                    opcion_nueva_obj = Opcion.objects.get(id=id_opcion_nueva)
-                    
-                    texto_anterior = detalles_actuales.get(id_pregunta, "Sin respuesta")
-                    texto_nuevo = opcion_nueva_obj.texto
-
-                    if texto_anterior != texto_nuevo:
-                        cambios_detectados.append(
-                            f"Pregunta {pregunta_obj.orden}: '{texto_anterior}' ➔ '{texto_nuevo}'"
-                        )
-                    
-                    FichaDetalle.objects.update_or_create(
-                        ficha=ficha, pregunta=pregunta_obj,
-                        defaults={
-                            'opcion_seleccionada': opcion_nueva_obj,
-                            'puntaje_obtenido': opcion_nueva_obj.puntaje
-                        }
+        if form.is_valid():
+            try:
+                # Las opciones se validan contra el catálogo en memoria (sin consultas)
+                respuestas = leer_respuestas(request.POST)
+                opciones = cargar_opciones(respuestas, catalogo)
+            except ValidationError as e:
+                messages.error(request, f'Error al guardar: {e.messages[0]}')
+            else:
+                cambios_detectados = []
+
+                # --- AUDITORÍA DE CABECERA ---
+                for campo in form.changed_data:
+                    valor_antiguo = originales[campo]
+                    valor_nuevo = form.cleaned_data.get(campo)
+                    # Solo registramos si realmente son diferentes (evita ruidos)
+                    if valor_antiguo != valor_nuevo:
+                        cambios_detectados.append(cambio_campo(campo, valor_antiguo, valor_nuevo))
+
+                ficha = form.save(commit=False)
+                resultados_antes = {campo: getattr(ficha, campo) for campo in CAMPOS_PUNTAJE}
+                version_antes = ficha.version_cuestionario_id
+
+                with transaction.atomic():
+                    # --- RESPUESTAS: diff en memoria, bulk_update solo de las que cambiaron ---
+                    cambios_detectados += actualizar_respuestas(
+                        ficha, actuales, respuestas, opciones, catalogo_anterior
                     )
-                    nuevo_puntaje_total += opcion_nueva_obj.puntaje
-            
-            ficha.puntaje_total = nuevo_puntaje_total
-            ficha.save()
-
-            # 3. Guardar Auditoría solo si hubo cambios reales
-            if cambios_detectados:
-                FichaHistorial.objects.create(
-                    ficha=ficha,
-                    usuario=request.user,
-                    accion="Edición de Ficha",
-                    detalles="\n".join(cambios_detectados)
-                )
-            
-            return redirect('listar_fichas')
+
+                    # Puntaje y nivel de riesgo con el estado final de todas las respuestas
+                    # (la ficha pasa a la versión vigente: sus respuestas salen de ella)
+                    ficha.version_cuestionario_id = catalogo.version_cuestionario_id
+                    calcular_puntaje(
+                        ((d.pregunta_id, d.puntaje_obtenido) for d in actuales.values()), catalogo
+                    ).aplicar(ficha)
+                    cambios_detectados += [
+                        cambio_campo(campo, resultados_antes[campo], getattr(ficha, campo))
+                        for campo in CAMPOS_DERIVADOS
+                        if resultados_antes[campo] != getattr(ficha, campo)
+                    ]
+
+                    if (form.has_changed() or cambios_detectados
+                            or version_antes != ficha.version_cuestionario_id
+                            or any(resultados_antes[c] != getattr(ficha, c) for c in CAMPOS_PUNTAJE)):
+                        ficha.save()
+
+                    # 3. Guardar Auditoría solo si hubo cambios reales (historial + cambios en bulk)
+                    if cambios_detectados:
+                        registrar_edicion(ficha, request.user, cambios_detectados, catalogo_anterior)
+
+                return redirect('listar_fichas')
     else:
         form = FichaEvaluacionForm(instance=ficha)
-    respuestas_ids = list(ficha.detalles.values_list('opcion_seleccionada_id', flat=True))
+
+    respuestas_ids = {d.opcion_seleccionada_id for d in actuales.values()}
     return render(request, 'fichas/editar_ficha.html', {
         'form': form,
         'ficha': ficha,
         'dimensiones': dimensiones,
         'respuestas_ids': respuestas_ids,
-        # 'respuestas_actuales': {k: v for k, v in ficha.detalles.values_list('pregunta_id', 'opcion_seleccionada_id')}
+    })
+
+
+@user_passes_test(es_supervisor)
+def auditoria_fichas(request):
+    """
+    Búsqueda en la auditoría estructurada: qué cambió, en qué fichas y cuándo.
+    Solo muestra las fichas de los encuestadores asignados al supervisor.
+    """
+    campo = request.GET.get('campo', '')
+    valor = request.GET.get('valor', '').strip()
+    ficha_id = request.GET.get('ficha_id', '').strip()
+    if not ficha_id.isdigit():
+        ficha_id = ''
+    rango = leer_rango(request.GET)
+
+    cambios = buscar_cambios(request.user, campo=campo, ficha_id=ficha_id or None, valor=valor, rango=rango)
+
+    # Cursor por (fecha_edicion, id): cada página cuesta lo mismo aunque el historial crezca
+    page_obj = paginar_por_cursor(
+        cambios, request.GET.get('cursor'), campo='fecha_edicion',
+        tamano=tamano_pagina(request, defecto=25), con_total=True,
+    )
+
+    return render(request, 'fichas/auditoria.html', {
+        'cambios': page_obj,
+        'campos': campos_auditables(),
+        'campo': campo,
+        'valor': valor,
+        'ficha_id': ficha_id,
+        'filtro_fecha': request.GET.get('rango_fecha', ''),
+        'filtro_desde': request.GET.get('fecha_desde', ''),
+        'filtro_hasta': request.GET.get('fecha_hasta', ''),
     })
 
 
@@ -354,30 +407,8 @@ def editar_ficha(request, ficha_id):
 
 @login_required
 def exportar_excel(request):
-    # 1. Crear el libro y la hoja
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Reporte Filtrado"
-
-    # 2. Estilos
-    header_font = Font(bold=True, color="FFFFFF")
-    header_fill = PatternFill(start_color="2563EB", end_color="2563EB", fill_type="solid")
-    center_align = Alignment(horizontal="center", vertical="center")
-    thin_border = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
-
-    # 3. Encabezados
-    headers = ["ID", "Fecha", "Estudiante", "DNI", "Institución", "Puntaje", "Nivel de Riesgo"]
-    ws.append(headers)
-
-    for col_num, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col_num)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = center_align
-        cell.border = thin_border
-
     # =======================================================
-    # 4. OBTENER DATOS Y APLICAR FILTROS (IGUAL QUE EN DASHBOARD)
+    # 1. OBTENER DATOS Y APLICAR FILTROS (IGUAL QUE EN DASHBOARD)
     # =======================================================
     
     # Base: Fichas del usuario
@@ -385,49 +416,135 @@ def exportar_excel(request):
   
     # Capturar parámetros de la URL
     dni_query = request.GET.get('dni', '').strip()
-    fecha_filtro = request.GET.get('rango_fecha', '')
 
     # Filtro por DNI
-    if dni_query:
-        fichas = fichas.filter(dni_evaluado__icontains=dni_query)
+    fichas = filtrar_por_dni(fichas, dni_query, request.GET.get('dni_modo', ''))
 
     # Filtro por Fecha
-    hoy = timezone.now().date()
-    if fecha_filtro == 'hoy':
-        fichas = fichas.filter(fecha_registro__date=hoy)
-    elif fecha_filtro == '7dias':
-        semana_atras = hoy - timedelta(days=7)
-        fichas = fichas.filter(fecha_registro__date__gte=semana_atras)
-    elif fecha_filtro == 'mes':
-        mes_atras = hoy - timedelta(days=30)
-        fichas = fichas.filter(fecha_registro__date__gte=mes_atras)
+    fichas = filtrar_por_fecha(fichas, leer_rango(request.GET))
+
+    # Una exportación grande no se genera aquí: ocuparía el worker web (y bajo uvicorn
+    # al único hilo de las vistas sync) mientras dura. Se encola con los mismos filtros.
+    if exportacion_grande(fichas):
+        return encolar_exportacion(request)
 
     # =======================================================
+    # 2. EXCEL EN STREAMING (write-only + lotes por cursor, memoria plana)
+    # =======================================================
+    return respuesta_xlsx(REPORTE_ENCUESTADOR, fichas, 'Reporte_Fichas.xlsx')
 
-    # 5. Escribir filas con los datos ya filtrados
-    for ficha in fichas:
-        row = [
-            ficha.id,
-            ficha.fecha_registro.strftime("%d/%m/%Y %H:%M"),
-            f"{ficha.nombres_evaluado} {ficha.apellidos_evaluado}",
-            ficha.dni_evaluado,
-            ficha.institucion.nombre if ficha.institucion else "-",
-            ficha.puntaje_total,
-            ficha.nivel_riesgo
-        ]
-        ws.append(row)
-
-    # 6. Ajustar ancho
-    for column_cells in ws.columns:
-        length = max(len(str(cell.value) or "") for cell in column_cells)
-        ws.column_dimensions[column_cells[0].column_letter].width = length + 2
-
-    # 7. Respuesta
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = 'attachment; filename="Reporte_Fichas.xlsx"'
-    
-    wb.save(response)
-    return response
+
+# =======================================================
+# EXPORTACIONES EN SEGUNDO PLANO
+# =======================================================
+
+@login_required
+@require_POST
+def solicitar_exportacion_view(request):
+    """
+    Encola una exportación con los filtros del listado actual (vienen en la
+    query string del form o como campos ocultos). El archivo lo genera el
+    worker 'procesar_exportaciones'.
+    """
+    formato = request.POST.get('formato', 'xlsx')
+    if formato not in dict(TrabajoExportacion.FORMATOS):
+        messages.error(request, "Formato de exportación no válido.")
+        return redirect('mis_exportaciones')
+
+    filtros = leer_filtros(request.POST, request.GET)
+    trabajo, reutilizado = solicitar_exportacion(request.user, formato, filtros)
+
+    if reutilizado:
+        messages.info(request, f"Ya tenías una exportación igual (#{trabajo.pk}); se reutiliza ese archivo.")
+    else:
+        messages.success(request, f"Exportación #{trabajo.pk} en cola. Podrás descargarla aquí cuando termine.")
+    return redirect('mis_exportaciones')
+
+
+def encolar_exportacion(request):
+    """Encola en Excel la exportación pedida por GET (exportar_excel*) y manda a 'Mis exportaciones'."""
+    trabajo, reutilizado = solicitar_exportacion(request.user, 'xlsx', leer_filtros(request.GET))
+    if reutilizado:
+        messages.info(request, f"Ya tenías una exportación igual (#{trabajo.pk}); se reutiliza ese archivo.")
+    else:
+        messages.info(
+            request,
+            f"La exportación supera {settings.EXPORTACION_INLINE_MAXIMO} fichas: se generará en segundo plano "
+            f"(#{trabajo.pk}). Podrás descargarla aquí cuando termine.",
+        )
+    return redirect('mis_exportaciones')
+
+
+@login_required
+def mis_exportaciones(request):
+    trabajos = TrabajoExportacion.objects.filter(usuario=request.user).order_by('-fecha_creacion')[:20]
+    return render(request, 'fichas/mis_exportaciones.html', {
+        'trabajos': trabajos,
+        'hay_pendientes': any(t.estado in (t.PENDIENTE, t.PROCESANDO) for t in trabajos),
+    })
+
+
+@login_required
+async def estado_exportacion(request, pk):
+    """Consulta ligera (polling) del estado de un trabajo. Async: bajo ASGI no ocupa un hilo."""
+    usuario = await request.auser()
+    trabajo = await aget_object_or_404(TrabajoExportacion, pk=pk, usuario=usuario)
+    return JsonResponse({
+        'id': trabajo.pk,
+        'estado': trabajo.estado,
+        'total_filas': trabajo.total_filas,
+        'error': trabajo.error,
+        'url_descarga': reverse('descargar_exportacion', args=[trabajo.pk]) if trabajo.estado == trabajo.TERMINADO else None,
+    })
+
+
+@login_required
+def descargar_exportacion(request, pk):
+    trabajo = get_object_or_404(
+        TrabajoExportacion, pk=pk, usuario=request.user, estado=TrabajoExportacion.TERMINADO
+    )
+    if not trabajo.archivo:
+        messages.error(request, "El archivo de esta exportación ya no está disponible.")
+        return redirect('mis_exportaciones')
+    nombre = f"Reporte_Fichas.{trabajo.formato}"
+    return FileResponse(trabajo.archivo.open('rb'), as_attachment=True, filename=nombre)
+
+
+# Solo para usar su verificación dentro de api_json (el middleware global no ve esas vistas)
+_verificador_csrf = CsrfViewMiddleware(lambda request: None)
+
+
+def api_json(vista):
+    """
+    Autenticación y CSRF para las APIs de los dispositivos, respondiendo en JSON:
+    401 sin sesión (login_required redirigiría al login HTML) y 403 con el token
+    CSRF ausente o inválido (en lugar de la página 403 de Django). Así el cliente
+    distingue "volver a iniciar sesión" de "lote rechazado" (400).
+    """
+    @csrf_exempt
+    @wraps(vista)
+    def envoltura(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': 'La sesión expiró o no se inició.', 'codigo': 'no_autenticado'}, status=401)
+        # La misma verificación del middleware; su respuesta HTML se descarta
+        if _verificador_csrf.process_view(request, None, (), {}) is not None:
+            return JsonResponse({'error': 'Token CSRF ausente o inválido.', 'codigo': 'csrf'}, status=403)
+        return vista(request, *args, **kwargs)
+    return envoltura
+
+
+@api_json
+@require_POST
+def sincronizar_fichas(request):
+    """
+    API JSON para encuestadores sin conexión estable: recibe un lote de fichas
+    con claves de idempotencia y responde el resultado de cada una (ver sincronizacion.py).
+    """
+    try:
+        datos = leer_lote(request.body)
+    except ValidationError as e:
+        return JsonResponse({'error': e.messages[0]}, status=400)
+    return JsonResponse(sincronizar_lote(request.user, datos))
 
 
 
@@ -444,8 +561,7 @@ def lista_instituciones(request):
     if query:
         items = items.filter(Q(nombre__icontains=query) | Q(codigo_modular__icontains=query))
     
-    paginator = Paginator(items, 10)
-    page_obj = paginator.get_page(request.GET.get('page'))
+    page_obj = paginar_por_cursor(items, request.GET.get('cursor'), con_total=True)
     
     return render(request, 'configuracion/lista_instituciones.html', {
         'items': page_obj, 'query': query
@@ -510,6 +626,7 @@ def gestion_dimension(request, pk=None):
         form = DimensionForm(request.POST, instance=instancia)
         if form.is_valid():
             form.save()
+            invalidar_catalogo()
             messages.success(request, 'Dimensión guardada.')
             return redirect('lista_banco_preguntas')
     else:
@@ -588,6 +705,7 @@ def gestion_pregunta(request, pk=None):
                 nueva_pregunta.save()
                 formset.instance = nueva_pregunta
                 formset.save()
+                invalidar_catalogo()
                 
             messages.success(request, f'Pregunta guardada. Posición {nueva_pregunta.orden} en {nueva_pregunta.dimension}.')
             return redirect('lista_banco_preguntas')
@@ -640,6 +758,8 @@ def eliminar_generico(request, modelo, pk):
                 item.delete()
                 msg = 'Elemento eliminado correctamente.'
 
+            invalidar_catalogo()
+
             messages.success(request, msg)
     
     return redirect('lista_banco_preguntas')
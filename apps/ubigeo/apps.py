@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class UbigeoConfig(AppConfig):
     name = 'apps.ubigeo'
+
+    def ready(self):
+        from . import signals  # noqa: F401 (registra los receivers)
@@ -0,0 +1,94 @@
+"""
+Árbol de ubigeo (Departamento -> Provincia -> Distrito) en memoria.
+
+Los ~1.900 distritos prácticamente no cambian, así que cada proceso arma el
+árbol una sola vez (tres consultas) y responde las APIs del combo en cascada
+sin tocar la base de datos. El ETag es el hash del contenido: todos los
+workers con los mismos datos entregan el mismo ETag y el navegador/proxy puede
+revalidar con un 304.
+
+Si se edita el ubigeo (admin o 'cargar_ubigeo'), invalidar_arbol() descarta la
+copia del proceso actual; los demás procesos la renuevan al reiniciar.
+"""
+import gzip
+import hashlib
+import json
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+
+from asgiref.sync import sync_to_async
+
+from .models import Departamento, Provincia, Distrito
+
+# Cache-Control de las APIs de ubigeo (1 día; luego se revalida con ETag)
+MAX_AGE_UBIGEO = 60 * 60 * 24
+
+
+@dataclass(frozen=True)
+class ArbolUbigeo:
+    departamentos: tuple                # ({'id', 'nombre'}, ...)
+    provincias: MappingProxyType        # {departamento_id: ({'id', 'nombre'}, ...)}
+    distritos: MappingProxyType         # {provincia_id: ({'id', 'nombre'}, ...)}
+    etag: str
+    json_completo: bytes                # árbol completo ya serializado
+    json_completo_gzip: bytes           # ... y comprimido una sola vez
+
+
+_lock = threading.Lock()
+_arbol = None
+
+
+def _agrupar(filas, campo_padre):
+    grupos = {}
+    for fila in filas:
+        grupos.setdefault(fila[campo_padre], []).append({'id': fila['id'], 'nombre': fila['nombre']})
+    return MappingProxyType({padre: tuple(hijos) for padre, hijos in grupos.items()})
+
+
+def construir_arbol():
+    departamentos = tuple(Departamento.objects.order_by('nombre').values('id', 'nombre'))
+    provincias = _agrupar(Provincia.objects.order_by('nombre').values('id', 'nombre', 'departamento_id'), 'departamento_id')
+    distritos = _agrupar(Distrito.objects.order_by('nombre').values('id', 'nombre', 'provincia_id'), 'provincia_id')
+
+    # Formato compacto para el cliente: pares [id, nombre]
+    contenido = {
+        'departamentos': [[d['id'], d['nombre']] for d in departamentos],
+        'provincias': {dep: [[p['id'], p['nombre']] for p in lista] for dep, lista in provincias.items()},
+        'distritos': {prov: [[d['id'], d['nombre']] for d in lista] for prov, lista in distritos.items()},
+    }
+    json_completo = json.dumps(contenido, ensure_ascii=False, separators=(',', ':'), sort_keys=True).encode('utf-8')
+    etag = hashlib.sha1(json_completo).hexdigest()
+
+    return ArbolUbigeo(
+        departamentos=departamentos,
+        provincias=provincias,
+        distritos=distritos,
+        etag=etag,
+        json_completo=json_completo,
+        json_completo_gzip=gzip.compress(json_completo, mtime=0),
+    )
+
+
+def obtener_arbol():
+    global _arbol
+    arbol = _arbol
+    if arbol is not None:
+        return arbol
+    with _lock:
+        if _arbol is None:
+            _arbol = construir_arbol()
+        return _arbol
+
+
+async def aobtener_arbol():
+    """Versión async: sin hilo extra si el árbol ya está en memoria (el caso normal)."""
+    arbol = _arbol
+    if arbol is not None:
+        return arbol
+    return await sync_to_async(obtener_arbol)()
+
+
+def invalidar_arbol():
+    global _arbol
+    _arbol = None
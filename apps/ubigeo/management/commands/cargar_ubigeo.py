@@ -1,95 +1,116 @@
 import csv
 import os
+import time
 from django.core.management.base import BaseCommand
 from django.db import transaction
 from apps.ubigeo.models import Departamento, Provincia, Distrito
+from apps.ubigeo.arbol import invalidar_arbol
+
+# Filas por INSERT/UPDATE en bulk_create / bulk_update
+TAMANO_LOTE = 500
+
 
 class Command(BaseCommand):
-    help = 'Carga la data de Ubigeos desde el CSV interno de la app'
+    help = (
+        'Carga o actualiza los Ubigeos desde el CSV interno de la app. '
+        'Es idempotente: solo inserta lo nuevo y actualiza lo que cambió, '
+        'por eso se ejecuta en cada arranque del contenedor.'
+    )
+
+    def leer_csv(self, archivo_csv):
+        """
+        Recorre el CSV una sola vez y deduplica en memoria.
+        Retorna tres dicts {codigo: campos}; si un código se repite gana la primera fila.
+        """
+        departamentos, provincias, distritos = {}, {}, {}
+
+        # Usamos 'latin-1' para soportar tildes y Ñ
+        with open(archivo_csv, mode='r', encoding='latin-1') as f:
+            # Si tu CSV usa comas en lugar de punto y coma, cambia delimiter=','
+            for row in csv.DictReader(f, delimiter=';'):
+                ubigeo = (row.get('IDDIST') or '').strip()
+                # Filas sin ubigeo (líneas en blanco al final del archivo) se saltan
+                if not ubigeo:
+                    continue
+
+                # Desglose del código: 01 / 0101 / 010101
+                cod_dep, cod_prov = ubigeo[0:2], ubigeo[0:4]
+
+                departamentos.setdefault(cod_dep, {
+                    'nombre': (row.get('NOMBDEP') or '').strip(),
+                })
+                provincias.setdefault(cod_prov, {
+                    'nombre': (row.get('NOMBPROV') or '').strip(),
+                    'departamento_id': cod_dep,
+                })
+                distritos.setdefault(ubigeo, {
+                    'nombre': (row.get('NOMBDIST') or '').strip(),
+                    'provincia_id': cod_prov,
+                    'region_natural': (row.get('REGION NATURAL') or '').strip(),
+                })
+
+        return departamentos, provincias, distritos
+
+    def sincronizar(self, modelo, filas):
+        """
+        Compara 'filas' con lo que ya existe (una sola consulta) y escribe solo la
+        diferencia con bulk_create / bulk_update. Retorna (insertados, actualizados, sin_cambios).
+        """
+        campos = list(next(iter(filas.values())).keys()) if filas else []
+        existentes = {
+            fila['id']: fila for fila in modelo.objects.values('id', *campos)
+        }
+
+        nuevos, cambiados = [], []
+        for codigo, valores in filas.items():
+            actual = existentes.get(codigo)
+            if actual is None:
+                nuevos.append(modelo(id=codigo, **valores))
+            elif any(actual[campo] != valor for campo, valor in valores.items()):
+                cambiados.append(modelo(id=codigo, **valores))
+
+        if nuevos:
+            modelo.objects.bulk_create(nuevos, batch_size=TAMANO_LOTE)
+        if cambiados:
+            modelo.objects.bulk_update(cambiados, campos, batch_size=TAMANO_LOTE)
+
+        return len(nuevos), len(cambiados), len(filas) - len(nuevos) - len(cambiados)
 
     def handle(self, *args, **kwargs):
         # 1. CALCULAR RUTA
         ruta_script = os.path.dirname(os.path.abspath(__file__))
         ruta_app_ubigeo = os.path.dirname(os.path.dirname(ruta_script))
         archivo_csv = os.path.join(ruta_app_ubigeo, 'data', 'UBIGEOS_2022_1891_distritos.csv')
-        
+
         if not os.path.exists(archivo_csv):
             self.stdout.write(self.style.ERROR(f'❌ No se encontró el archivo en: {archivo_csv}'))
             return
 
-        print(f"--- 🚀 LEYENDO DESDE: {archivo_csv} ---")
-        
-        deps_creados = 0
-        provs_creadas = 0
-        dists_creados = 0
+        self.stdout.write(f"--- 🚀 LEYENDO DESDE: {archivo_csv} ---")
+        inicio = time.perf_counter()
 
         try:
-            # Usamos 'latin-1' para soportar tildes y Ñ
-            with open(archivo_csv, mode='r', encoding='latin-1') as f:
-                # Si tu CSV usa comas en lugar de punto y coma, cambia delimiter=','
-                reader = csv.DictReader(f, delimiter=';') 
-                
-                with transaction.atomic():
-                    # Usamos enumerate para contar filas de forma segura (i)
-                    for i, row in enumerate(reader):
-                        
-                        # 1. LIMPIEZA Y VALIDACIÓN
-                        # Usamos .get() para evitar error si la columna no existe o está vacía
-                        ubigeo = row.get('IDDIST', '').strip()
-                        
-                        # ¡AQUÍ ESTÁ LA SOLUCIÓN!: Si el ubigeo está vacío, saltamos la fila
-                        if not ubigeo:
-                            continue
-                            
-                        # Desglose del código
-                        cod_dep = ubigeo[0:2]
-                        cod_prov = ubigeo[0:4]
-                        cod_dist = ubigeo
-                        
-                        nombre_dep = row.get('NOMBDEP', '').strip()
-                        nombre_prov = row.get('NOMBPROV', '').strip()
-                        nombre_dist = row.get('NOMBDIST', '').strip()
-                        region = row.get('REGION NATURAL', '').strip()
-
-                        # 2. DEPARTAMENTO
-                        dep_obj, created_dep = Departamento.objects.get_or_create(
-                            id=cod_dep,
-                            defaults={'nombre': nombre_dep}
-                        )
-                        if created_dep: deps_creados += 1
-
-                        # 3. PROVINCIA
-                        prov_obj, created_prov = Provincia.objects.get_or_create(
-                            id=cod_prov,
-                            defaults={
-                                'nombre': nombre_prov,
-                                'departamento': dep_obj
-                            }
-                        )
-                        if created_prov: provs_creadas += 1
-
-                        # 4. DISTRITO
-                        dist_obj, created_dist = Distrito.objects.get_or_create(
-                            id=cod_dist,
-                            defaults={
-                                'nombre': nombre_dist,
-                                'provincia': prov_obj,
-                                'region_natural': region
-                            }
-                        )
-                        if created_dist: dists_creados += 1
-
-                        # Reporte de progreso cada 500 filas (Usando contador i, no el valor del ubigeo)
-                        if i % 500 == 0:
-                            self.stdout.write(f"Procesando fila {i}... {nombre_dist}")
-
-            self.stdout.write(self.style.SUCCESS(f"""
-            ✅ ¡CARGA EXITOSA!
-            -----------------------
-            Departamentos: {deps_creados}
-            Provincias:    {provs_creadas}
-            Distritos:     {dists_creados}
-            """))
+            departamentos, provincias, distritos = self.leer_csv(archivo_csv)
 
+            # El orden importa: cada nivel necesita a su padre ya guardado
+            with transaction.atomic():
+                resultados = [
+                    ('Departamentos', self.sincronizar(Departamento, departamentos)),
+                    ('Provincias', self.sincronizar(Provincia, provincias)),
+                    ('Distritos', self.sincronizar(Distrito, distritos)),
+                ]
         except Exception as e:
-            self.stdout.write(self.style.ERROR(f'❌ Error: {str(e)}'))
\ No newline at end of file
+            self.stdout.write(self.style.ERROR(f'❌ Error: {str(e)}'))
+            return
+
+        # bulk_create/bulk_update no disparan señales: descartamos el árbol a mano
+        invalidar_arbol()
+
+        segundos = time.perf_counter() - inicio
+        lineas = '\n'.join(
+            f"{nombre:<14} {insertados:>5} nuevos | {actualizados:>5} actualizados | {iguales:>5} sin cambios"
+            for nombre, (insertados, actualizados, iguales) in resultados
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ ¡CARGA EXITOSA! ({segundos:.2f} s)\n-----------------------\n{lineas}"
+        ))
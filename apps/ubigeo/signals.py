@@ -0,0 +1,15 @@
+"""
+Descarta el árbol de ubigeo en memoria cuando se edita desde el admin.
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Departamento, Provincia, Distrito
+from .arbol import invalidar_arbol
+
+
+@receiver([post_save, post_delete], sender=Departamento)
+@receiver([post_save, post_delete], sender=Provincia)
+@receiver([post_save, post_delete], sender=Distrito)
+def descartar_arbol(sender, **kwargs):
+    invalidar_arbol()
@@ -4,4 +4,5 @@ from . import views
 urlpatterns = [
     path('api/provincias/', views.obtener_provincias, name='api_provincias'),
     path('api/distritos/', views.obtener_distritos, name='api_distritos'),
-]
\ No newline at end of file
+    path('api/arbol/', views.obtener_arbol_completo, name='api_ubigeo_arbol'),
+]
@@ -1,19 +1,67 @@
 from django.shortcuts import render
 
 # Create your views here.
-from django.http import JsonResponse
-from .models import Provincia, Distrito
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import require_GET
+from .arbol import aobtener_arbol, MAX_AGE_UBIGEO
 
-def obtener_provincias(request):
-    # Recibimos el ID del departamento desde la petición AJAX
+# Vistas async: responden desde el árbol en memoria, así bajo ASGI (uvicorn) no
+# ocupan un hilo por request. Bajo WSGI siguen funcionando igual.
+
+
+async def responder_ubigeo(request, construir_respuesta):
+    """
+    Revalidación con ETag (mismo ETag para todas las APIs: cambia solo si cambia
+    el árbol) y respuesta construida desde memoria.
+    """
+    arbol = await aobtener_arbol()
+    etag = f'"{arbol.etag}"'
+    no_modificado = get_conditional_response(request, etag=etag)
+    if no_modificado is not None:
+        return no_modificado
+    response = construir_respuesta(arbol)
+    response['ETag'] = etag
+    return response
+
+
+@require_GET
+@cache_control(public=True, max_age=MAX_AGE_UBIGEO)
+async def obtener_provincias(request):
+    # Recibimos el ID del departamento desde la petición AJAX (se responde desde memoria)
     dep_id = request.GET.get('dep_id')
-    provincias = Provincia.objects.filter(departamento_id=dep_id).order_by('nombre')
-    # Convertimos a lista de diccionarios para JSON
-    data = [{'id': p.id, 'nombre': p.nombre} for p in provincias]
-    return JsonResponse(data, safe=False)
+    return await responder_ubigeo(
+        request, lambda arbol: JsonResponse(list(arbol.provincias.get(dep_id, ())), safe=False)
+    )
+
 
-def obtener_distritos(request):
+@require_GET
+@cache_control(public=True, max_age=MAX_AGE_UBIGEO)
+async def obtener_distritos(request):
     prov_id = request.GET.get('prov_id')
-    distritos = Distrito.objects.filter(provincia_id=prov_id).order_by('nombre')
-    data = [{'id': d.id, 'nombre': d.nombre} for d in distritos]
-    return JsonResponse(data, safe=False)
\ No newline at end of file
+    return await responder_ubigeo(
+        request, lambda arbol: JsonResponse(list(arbol.distritos.get(prov_id, ())), safe=False)
+    )
+
+
+@require_GET
+@cache_control(public=True, max_age=MAX_AGE_UBIGEO)
+async def obtener_arbol_completo(request):
+    """
+    Todo el ubigeo en una sola respuesta para hacer la cascada en el navegador:
+    {"departamentos": [[id, nombre]], "provincias": {dep_id: [[id, nombre]]}, "distritos": {prov_id: [[id, nombre]]}}
+    Se entrega ya comprimido con gzip si el cliente lo acepta.
+    """
+    acepta_gzip = 'gzip' in request.headers.get('Accept-Encoding', '')
+
+    def construir(arbol):
+        if acepta_gzip:
+            response = HttpResponse(arbol.json_completo_gzip, content_type='application/json')
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(arbol.json_completo, content_type='application/json')
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+    return await responder_ubigeo(request, construir)
@@ -0,0 +1,19 @@
+"""
+Signals de la app usuarios: invalidan los tableros en cache cuando se crea,
+edita o elimina un usuario (contadores del admin, equipos de los supervisores).
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.fichas import cache_tableros
+
+from .models import Usuario
+
+
+@receiver(post_save, sender=Usuario)
+@receiver(post_delete, sender=Usuario)
+def invalidar_tableros(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Cada login guarda last_login: no cambia nada de lo que muestran los tableros
+    if raw or (update_fields and set(update_fields) <= {'last_login'}):
+        return
+    cache_tableros.invalidar_al_confirmar('usuarios')
@@ -1,3 +1,45 @@
+from django.core.cache import cache
 from django.test import TestCase
 
-# Create your tests here.
+from apps.fichas import cache_tableros
+
+from .models import Usuario
+
+
+class InvalidacionTablerosUsuariosTests(TestCase):
+    """Signals de Usuario que invalidan el ámbito 'usuarios' de los tableros (signals.py)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Usuario.objects.create_user(
+            'admin@test.pe', 'clave', rol='ADMIN', nombres='Ada', apellidos='Admin', dni='10000009',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.calculos = 0
+
+    def contadores(self):
+        def calcular():
+            self.calculos += 1
+            return self.calculos
+        return cache_tableros.obtener('contadores_usuarios', self.admin, ['usuarios'], calcular)
+
+    def test_login_no_invalida_los_contadores(self):
+        self.assertEqual(self.contadores(), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(self.client.login(email='admin@test.pe', password='clave'))
+
+        self.admin.refresh_from_db()
+        self.assertIsNotNone(self.admin.last_login)
+        self.assertEqual(self.contadores(), 1)
+
+    def test_editar_un_usuario_invalida_los_contadores(self):
+        self.assertEqual(self.contadores(), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.admin.nombres = 'Adela'
+            self.admin.save()
+
+        self.assertEqual(self.contadores(), 2)
@@ -1,7 +1,7 @@
 from django.urls import path
 from django.contrib.auth.views import LogoutView
 from django.contrib.auth import views as auth_views
-from .views import CustomLoginView, exportar_excel_supervisor,dashboard_admin, editar_perfil, lista_usuarios,  gestionar_usuario, eliminar_usuario,detalle_usuario,listar_mi_equipo, crear_encuestador_supervisor, editar_encuestador_supervisor,ver_detalle_equipo,eliminar_encuestador_equipo
+from .views import CustomLoginView, exportar_excel_supervisor,dashboard_admin, editar_perfil, lista_usuarios,  gestionar_usuario, eliminar_usuario,detalle_usuario,listar_mi_equipo, crear_encuestador_supervisor, editar_encuestador_supervisor,ver_detalle_equipo,eliminar_encuestador_equipo, estado_cache
 
 urlpatterns = [
     path('', CustomLoginView.as_view(), name='login'), # La raíz es el login
@@ -15,6 +15,8 @@ urlpatterns = [
     path('editar/<int:pk>/', gestionar_usuario, name='editar_usuario'),
     path('eliminar/<int:pk>/', eliminar_usuario, name='eliminar_usuario'),
     path('detalle/<int:pk>/', detalle_usuario, name='detalle_usuario'),
+    # Monitoreo del cache de tableros (JSON, solo admin)
+    path('monitoreo/cache/', estado_cache, name='estado_cache'),
 
 # --- ZONA SUPERVISOR (Mi Equipo) ---
     path('mi-equipo/', listar_mi_equipo, name='listar_mi_equipo'),
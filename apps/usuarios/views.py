@@ -1,4 +1,5 @@
 from django.shortcuts import render, redirect, get_list_or_404
+from django.http import JsonResponse
 from django.contrib.auth.views import LoginView, LogoutView
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic import TemplateView
@@ -24,9 +25,10 @@ from django.db.models import Count, Sum, Avg, Q
 from django.db.models.functions import TruncDate
 from apps.usuarios.models import Usuario
 import json
-import openpyxl
-from openpyxl.styles import Font, PatternFill, Alignment
-from django.http import HttpResponse
+from apps.fichas.exportacion import respuesta_xlsx, REPORTE_SUPERVISOR
+from apps.fichas.trabajos import exportacion_grande
+from apps.fichas.views import encolar_exportacion
+from apps.fichas.busqueda import filtrar_por_dni
 from django.shortcuts import redirect
 
 
@@ -72,106 +74,106 @@ from django.db.models import Count, Avg, Q, Sum
 from django.utils import timezone
 from datetime import timedelta
 from apps.fichas.models import FichaEvaluacion, Institucion, Pregunta, Dimension
+from apps.fichas.models import EstadisticaDiaria
+from apps.fichas.kpis import resumen_riesgo, resumen_riesgo_diario
+from apps.fichas.filtros import leer_rango, filtrar_por_fecha
+from apps.fichas.paginacion import paginar_por_cursor, listado_fichas
+from apps.fichas.asincrono import en_paralelo, arender
+from apps.fichas import cache_tableros
 from django.contrib.auth import get_user_model
 
 from django.db.models import Max, Min
+from django.db.models.functions import Coalesce
 
 
 User = get_user_model()
 
-@user_passes_test(es_supervisor)
-def dashboard_admin(request):
-    hoy = timezone.now().date()
-  
-    
-    # --- KPI CARDS (Métricas Principales) ---
-    kpi_hoy = 0
-    kpi_total_fichas = 0
-    kpi_casos_criticos = 0
-    kpi_puntaje_mas_bajo = 0
-    kpi_puntaje_promedio = 0
-    kpi_puntaje_mas_alto = 0
-    todas_las_fichas = FichaEvaluacion.objects.filter(usuario_registra__supervisor_asignado=request.user).all()
-
-    
-    for ficha in todas_las_fichas:
-        kpi_total_fichas += 1
-        if ficha.fecha_registro.date() == hoy:
-            kpi_hoy += 1
-        if ficha.nivel_riesgo == 'RIESGO CRÍTICO' or ficha.nivel_riesgo == 'RIESGO SEVERO':
-            kpi_casos_criticos += 1
-    kpi_puntaje_mas_bajo = todas_las_fichas.aggregate(minimo=Min('puntaje_total'))['minimo'] or 0
-    kpi_puntaje_mas_alto = todas_las_fichas.aggregate(maximo=Max('puntaje_total'))['maximo'] or 0
-    kpi_puntaje_promedio = todas_las_fichas.aggregate(promedio=Avg('puntaje_total'))['promedio'] or 0
-    
-    
-    kpi_encuestadores = User.objects.filter(supervisor_asignado=request.user).count()
+async def _contexto_dashboard(supervisor, hoy):
+    """
+    Datos del dashboard del supervisor. Las siete consultas (KPIs, tendencia,
+    riesgos, tops y actividad) no dependen entre sí: se ejecutan a la vez con en_paralelo.
+    """
+    fichas_equipo = FichaEvaluacion.objects.filter(usuario_registra__supervisor_asignado=supervisor)
+    # Tabla resumen (día x encuestador x institución x riesgo) del equipo
+    resumen_equipo = EstadisticaDiaria.objects.filter(encuestador__supervisor_asignado=supervisor)
+
+    (
+        kpis, kpi_encuestadores, conteo_por_dia, riesgos_query,
+        top_encuestadores, top_instituciones, ultimas_fichas,
+    ) = await en_paralelo(
+        # --- KPI CARDS (Métricas Principales): una sola consulta agregada ---
+        lambda: resumen_equipo.aggregate(
+            total=Coalesce(Sum('cantidad'), 0),
+            hoy=Coalesce(Sum('cantidad', filter=Q(dia=hoy)), 0),
+            criticos=Coalesce(Sum('cantidad', filter=Q(nivel_riesgo__in=['RIESGO CRÍTICO', 'RIESGO SEVERO'])), 0),
+            suma=Coalesce(Sum('suma_puntaje'), 0),
+            minimo=Min('puntaje_min'),
+            maximo=Max('puntaje_max'),
+        ),
+        lambda: User.objects.filter(supervisor_asignado=supervisor).count(),
+
+        # 1. Tendencia de los últimos 8 días
+        lambda: dict(
+            resumen_equipo.filter(dia__gte=hoy - timedelta(days=7))
+            .values('dia')
+            .annotate(total=Sum('cantidad'))
+            .values_list('dia', 'total')
+            .order_by()
+        ),
+
+        # 2. Distribución de Riesgos (Pie Chart)
+        lambda: list(resumen_equipo.values('nivel_riesgo').annotate(total=Sum('cantidad')).order_by()),
+
+        # 3. Top 5 Agentes (Filtrado por el equipo del supervisor logueado)
+        lambda: list(Usuario.objects.filter(
+            supervisor_asignado=supervisor # Solo encuestadores que reportan a él
+        ).annotate(
+            # Total histórico de fichas de cada encuestador del equipo
+            total_fichas=Coalesce(Sum('estadisticas_diarias__cantidad'), 0),
+            
+            # Fichas realizadas por el encuestador solo en el mes actual
+            fichas_mes=Coalesce(Sum(
+                'estadisticas_diarias__cantidad',
+                filter=Q(estadisticas_diarias__dia__gte=hoy.replace(day=1))
+            ), 0)
+        ).order_by('-total_fichas')[:5]),
+
+        # 4. Top 5 Instituciones (Filtrado por el equipo del supervisor logueado)
+        lambda: list(Institucion.objects.filter(
+            # Filtramos para considerar solo instituciones que tengan fichas de su equipo
+            estadisticas_diarias__encuestador__supervisor_asignado=supervisor
+        ).annotate(
+            # Total de fichas del equipo en esa institución
+            total=Sum('estadisticas_diarias__cantidad')
+        ).order_by('-total')[:5]),
+
+        # --- ACTIVIDAD RECIENTE (Últimas 8 fichas del equipo del supervisor) ---
+        lambda: list(fichas_equipo.select_related(
+            'institucion', 
+            'usuario_registra'
+        ).order_by('-fecha_registro')[:8]),
+    )
+    kpi_promedio = kpis['suma'] / kpis['total'] if kpis['total'] else 0
 
-    # 1. Preparación de variables
     labels_tendencia = []
     data_tendencia = []
     for i in range(7, -1, -1):
         dia = hoy - timedelta(days=i)
         labels_tendencia.append(dia.strftime('%d %b'))
-
-        conteo_dia = 0
-
-        for ficha in todas_las_fichas:
-            if ficha.fecha_registro.date() == dia:
-                conteo_dia += 1
-        data_tendencia.append(conteo_dia)
-
-    # 2. Distribución de Riesgos (Pie Chart)
-    riesgos_query = FichaEvaluacion.objects.filter(
-    usuario_registra__supervisor_asignado=request.user
-    ).values('nivel_riesgo').annotate(total=Count('id'))
+        data_tendencia.append(conteo_por_dia.get(dia, 0))
 
     # Generamos las etiquetas y los datos para el gráfico
     riesgos_labels = [r['nivel_riesgo'] or 'Sin Evaluar' for r in riesgos_query]
     riesgos_data = [r['total'] for r in riesgos_query]
 
-    # 3. Top 5 Agentes (Filtrado por el equipo del supervisor logueado)
-    top_encuestadores = Usuario.objects.filter(
-        supervisor_asignado=request.user # Solo encuestadores que reportan a él
-    ).annotate(
-        # Total histórico de fichas de cada encuestador del equipo
-        total_fichas=Count('fichas_realizadas'), 
-        
-        # Fichas realizadas por el encuestador solo en el mes actual
-        fichas_mes=Count(
-            'fichas_realizadas', 
-            filter=Q(fichas_realizadas__fecha_registro__month=hoy.month)
-        )
-    ).order_by('-total_fichas')[:5]
-
-    # 4. Top 5 Instituciones (Filtrado por el equipo del supervisor logueado)
-    top_instituciones = Institucion.objects.filter(
-        # Filtramos para considerar solo instituciones que tengan fichas de su equipo
-        fichaevaluacion__usuario_registra__supervisor_asignado=request.user
-    ).annotate(
-        # Total de fichas del equipo en esa institución
-        total=Count(
-            'fichaevaluacion', 
-            filter=Q(fichaevaluacion__usuario_registra__supervisor_asignado=request.user)
-        )
-    ).distinct().order_by('-total')[:5]
-
-    # --- ACTIVIDAD RECIENTE (Últimas 8 fichas del equipo del supervisor) ---
-    ultimas_fichas = FichaEvaluacion.objects.filter(
-        usuario_registra__supervisor_asignado=request.user
-    ).select_related(
-        'institucion', 
-        'usuario_registra'
-    ).order_by('-fecha_registro')[:8]
-
     context = {
-        'kpi_hoy': kpi_hoy,
-        'kpi_total_fichas': kpi_total_fichas,
-        'kpi_casos_criticos': kpi_casos_criticos,
+        'kpi_hoy': kpis['hoy'],
+        'kpi_total_fichas': kpis['total'],
+        'kpi_casos_criticos': kpis['criticos'],
         'kpi_encuestadores': kpi_encuestadores,
-        'kpi_puntaje_mas_bajo': kpi_puntaje_mas_bajo,
-        'kpi_puntaje_mas_alto': kpi_puntaje_mas_alto,
-        'kpi_puntaje_promedio': round(kpi_puntaje_promedio, 1),
+        'kpi_puntaje_mas_bajo': kpis['minimo'] or 0,
+        'kpi_puntaje_mas_alto': kpis['maximo'] or 0,
+        'kpi_puntaje_promedio': round(kpi_promedio, 1),
         'ultimas_fichas': ultimas_fichas,
         'top_encuestadores': top_encuestadores,
         'top_instituciones': top_instituciones,
@@ -181,7 +183,24 @@ def dashboard_admin(request):
         'riesgos_labels': riesgos_labels,
         'riesgos_data': riesgos_data,
     }
-    return render(request, 'usuarios/dashboard.html', context)
+    return context
+
+
+@user_passes_test(es_supervisor)
+async def dashboard_admin(request):
+    """
+    Dashboard del supervisor, en cache por supervisor y día (los KPIs de "hoy" y
+    del mes dependen de la fecha). Se invalida cuando cambia una ficha de su
+    equipo o cualquier usuario (ver apps/fichas/cache_tableros.py).
+    """
+    supervisor = await request.auser()
+    hoy = timezone.localdate()
+    context = await cache_tableros.aobtener(
+        'dashboard_supervisor', supervisor, [f'equipo:{supervisor.pk}', 'usuarios'],
+        lambda: _contexto_dashboard(supervisor, hoy),
+        filtros={'dia': hoy},
+    )
+    return await arender(request, 'usuarios/dashboard.html', context)
 
 @login_required
 def editar_perfil(request):
@@ -239,26 +258,34 @@ def lista_usuarios(request):
     if filtro_rol:
         usuarios_list = usuarios_list.filter(rol=filtro_rol)
 
-    # 6. Paginación (10 resultados por página)
-    paginator = Paginator(usuarios_list, 10) 
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-
-    base_counts = Usuario.objects.exclude(id=request.user.id)
-    total_admins = base_counts.filter(rol='ADMIN').count()
-    total_supervisores = base_counts.filter(rol='SUPERVISOR').count()
-    total_encuestadores = base_counts.filter(rol='ENCUESTADOR').count()
+    # 6. Paginación por cursor (date_joined, id), 10 resultados por página
+    page_obj = paginar_por_cursor(usuarios_list, request.GET.get('cursor'), campo='date_joined', con_total=True)
+
+    # Contadores por rol (sin contar al propio admin): una consulta, en cache hasta que cambie un usuario
+    totales = cache_tableros.obtener(
+        'contadores_usuarios', request.user, ['usuarios'],
+        lambda: Usuario.objects.exclude(id=request.user.id).aggregate(
+            total_admins=Count('id', filter=Q(rol='ADMIN')),
+            total_supervisores=Count('id', filter=Q(rol='SUPERVISOR')),
+            total_encuestadores=Count('id', filter=Q(rol='ENCUESTADOR')),
+        ),
+    )
 
     context = {
         'usuarios': page_obj,
         'query': query,
         'filtro_rol': filtro_rol,
-        'total_admins': total_admins,
-        'total_supervisores': total_supervisores,
-        'total_encuestadores': total_encuestadores
+        **totales,
     }
 
     return render(request, 'usuarios/lista_usuarios.html', context)
+
+
+@user_passes_test(es_admin)
+def estado_cache(request):
+    """Aciertos y fallos del cache de tableros, en JSON para el monitoreo."""
+    return JsonResponse(cache_tableros.estadisticas())
+
 # 2. CREAR Y EDITAR (Vista Híbrida)
 @user_passes_test(es_admin)
 
@@ -346,40 +373,36 @@ def detalle_usuario(request, pk):
 
         # 2. Capturar Filtros (Igual que en Supervisor)
         filtro_dni = request.GET.get('dni', '').strip()
+        filtro_dni_modo = request.GET.get('dni_modo', '')
         filtro_fecha = request.GET.get('rango_fecha', '')
 
-        # Filtro DNI
+        # Filtro DNI (exacto/prefijo con índice; 'contiene' solo si se pide)
+        fichas_queryset = filtrar_por_dni(fichas_queryset, filtro_dni, filtro_dni_modo)
+
+        # Filtro Fecha (preset o desde/hasta en hora de Lima)
+        rango = leer_rango(request.GET)
+        fichas_queryset = filtrar_por_fecha(fichas_queryset, rango)
+
+        # 3. Calcular KPIs (Sobre la data filtrada, en una sola consulta)
+        # Sin búsqueda por DNI basta la tabla resumen diaria
         if filtro_dni:
-            fichas_queryset = fichas_queryset.filter(dni_evaluado__icontains=filtro_dni)
-
-        # Filtro Fecha
-        if filtro_fecha:
-            hoy = timezone.now().date()
-            if filtro_fecha == 'hoy':
-                fichas_queryset = fichas_queryset.filter(fecha_registro__date=hoy)
-            elif filtro_fecha == '7dias':
-                inicio = hoy - timedelta(days=7)
-                fichas_queryset = fichas_queryset.filter(fecha_registro__date__gte=inicio)
-            elif filtro_fecha == 'mes':
-                inicio = hoy - timedelta(days=30)
-                fichas_queryset = fichas_queryset.filter(fecha_registro__date__gte=inicio)
-
-        # 3. Calcular KPIs (Sobre la data filtrada)
-        context['total_fichas'] = fichas_queryset.count()
-        context['bajo'] = fichas_queryset.filter(nivel_riesgo='RIESGO BAJO').count()
-        context['moderado'] = fichas_queryset.filter(nivel_riesgo='RIESGO MODERADO').count()
-        context['severo'] = fichas_queryset.filter(nivel_riesgo='RIESGO SEVERO').count()
-        context['critico'] = fichas_queryset.filter(nivel_riesgo='RIESGO CRÍTICO').count()
-
-        # 4. Obtener datos para la tabla
-        if filtro_dni or filtro_fecha:
-            context['fichas_realizadas'] = fichas_queryset.order_by('-fecha_registro')
+            kpis = resumen_riesgo(fichas_queryset)
         else:
-            context['fichas_realizadas'] = fichas_queryset.order_by('-fecha_registro')[:20]
+            kpis = resumen_riesgo_diario(
+                EstadisticaDiaria.objects.filter(encuestador=usuario, **rango.filtro_dias())
+            )
+        context['total_fichas'] = kpis.pop('total')
+        context.update(kpis)
+
+        # 4. Obtener datos para la tabla (paginada y solo con las columnas visibles)
+        context['fichas_realizadas'] = listado_fichas(request, fichas_queryset)
         
         # Pasar filtros al template
         context['filtro_dni'] = filtro_dni
+        context['filtro_dni_modo'] = filtro_dni_modo
         context['filtro_fecha'] = filtro_fecha
+        context['filtro_desde'] = request.GET.get('fecha_desde', '')
+        context['filtro_hasta'] = request.GET.get('fecha_hasta', '')
 
     return render(request, 'usuarios/detalle_usuario.html', context)
 
@@ -405,14 +428,13 @@ def listar_mi_equipo(request):
             Q(institucion_procedencia__icontains=query)
         )
 
-    # 3. Paginación
-    paginator = Paginator(equipo, 10)
-    page_obj = paginator.get_page(request.GET.get('page'))
+    # 3. Paginación por cursor (date_joined, id)
+    page_obj = paginar_por_cursor(equipo, request.GET.get('cursor'), campo='date_joined', con_total=True)
 
     context = {
         'equipo': page_obj,
         'query': query,
-        'total_miembros': equipo.count()
+        'total_miembros': page_obj.total
     }
     # OJO: Creamos una carpeta nueva en templates
     return render(request, 'usuarios/supervisor/lista_equipo.html', context)
@@ -473,51 +495,43 @@ def ver_detalle_equipo(request, pk):
     # --- LÓGICA DE FILTROS ---
     # Capturamos los datos que vienen de la URL (del formulario HTML)
     filtro_dni = request.GET.get('dni', '').strip()
+    filtro_dni_modo = request.GET.get('dni_modo', '')
     filtro_fecha = request.GET.get('rango_fecha', '')
 
-    # A. Filtrar por DNI
-    if filtro_dni:
-        fichas_queryset = fichas_queryset.filter(dni_evaluado__icontains=filtro_dni)
-
-    # B. Filtrar por Fecha
-    if filtro_fecha:
-        hoy = timezone.now().date()
-        if filtro_fecha == 'hoy':
-            fichas_queryset = fichas_queryset.filter(fecha_registro__date=hoy)
-        elif filtro_fecha == '7dias':
-            inicio = hoy - timedelta(days=7)
-            fichas_queryset = fichas_queryset.filter(fecha_registro__date__gte=inicio)
-        elif filtro_fecha == 'mes':
-            inicio = hoy - timedelta(days=30)
-            fichas_queryset = fichas_queryset.filter(fecha_registro__date__gte=inicio)
+    # A. Filtrar por DNI (exacto/prefijo con índice; 'contiene' solo si se pide)
+    fichas_queryset = filtrar_por_dni(fichas_queryset, filtro_dni, filtro_dni_modo)
+
+    # B. Filtrar por Fecha (preset o desde/hasta en hora de Lima)
+    rango = leer_rango(request.GET)
+    fichas_queryset = filtrar_por_fecha(fichas_queryset, rango)
 
     # 3. CÁLCULO DE KPIS (Se actualizan según el filtro aplicado)
     # Si filtras por "hoy", los contadores mostrarán solo los riesgos de hoy.
-    total_fichas = fichas_queryset.count()
-    bajo = fichas_queryset.filter(nivel_riesgo='RIESGO BAJO').count()
-    moderado = fichas_queryset.filter(nivel_riesgo='RIESGO MODERADO').count()
-    severo = fichas_queryset.filter(nivel_riesgo='RIESGO SEVERO').count()
-    critico = fichas_queryset.filter(nivel_riesgo='RIESGO CRÍTICO').count()
+    if filtro_dni:
+        kpis = resumen_riesgo(fichas_queryset)
+    else:
+        kpis = resumen_riesgo_diario(
+            EstadisticaDiaria.objects.filter(encuestador=encuestador, **rango.filtro_dias())
+        )
 
     # 4. LISTADO PARA LA TABLA
-    # Si el usuario está filtrando, mostramos TODOS los resultados coincidentes.
-    # Si NO está filtrando, mostramos solo los últimos 10 o 20 para no saturar.
-    if filtro_dni or filtro_fecha:
-        fichas_realizadas = fichas_queryset.order_by('-fecha_registro')
-    else:
-        fichas_realizadas = fichas_queryset.order_by('-fecha_registro')[:20]
+    # Con o sin filtros, la tabla va paginada por cursor (20 por página, máx. 100)
+    fichas_realizadas = listado_fichas(request, fichas_queryset)
 
     context = {
         'usuario': encuestador,
-        'bajo': bajo,
-        'moderado': moderado,
-        'severo': severo,
-        'critico': critico,
+        'bajo': kpis['bajo'],
+        'moderado': kpis['moderado'],
+        'severo': kpis['severo'],
+        'critico': kpis['critico'],
         'fichas_realizadas': fichas_realizadas,
-        'total_fichas': total_fichas,
+        'total_fichas': kpis['total'],
         # Pasamos los filtros al template para mantenerlos escritos en los inputs
         'filtro_dni': filtro_dni,
-        'filtro_fecha': filtro_fecha
+        'filtro_dni_modo': filtro_dni_modo,
+        'filtro_fecha': filtro_fecha,
+        'filtro_desde': request.GET.get('fecha_desde', ''),
+        'filtro_hasta': request.GET.get('fecha_hasta', ''),
     }
 
     return render(request, 'usuarios/supervisor/detalle_encuestador.html', context)
@@ -554,7 +568,7 @@ def exportar_excel_supervisor(request):
         fichas_queryset = FichaEvaluacion.objects.filter(usuario_registra=request.user)
     else:
         # Admin o Supervisor inician viendo todo
-        fichas_queryset = FichaEvaluacion.objects.all().select_related('usuario_registra', 'institucion')
+        fichas_queryset = FichaEvaluacion.objects.all()
 
     # ======================================================
     # 2. APLICACIÓN DE FILTROS (Misma lógica que tu vista HTML)
@@ -567,93 +581,23 @@ def exportar_excel_supervisor(request):
 
     # B. Filtro por DNI (Buscador)
     filtro_dni = request.GET.get('dni', '').strip()
-    if filtro_dni:
-        fichas_queryset = fichas_queryset.filter(dni_evaluado__icontains=filtro_dni)
+    fichas_queryset = filtrar_por_dni(fichas_queryset, filtro_dni, request.GET.get('dni_modo', ''))
 
     # C. Filtro por FECHAS
-    filtro_fecha = request.GET.get('rango_fecha', '')
-    if filtro_fecha:
-        hoy = timezone.now().date()
-        if filtro_fecha == 'hoy':
-            fichas_queryset = fichas_queryset.filter(fecha_registro__date=hoy)
-        elif filtro_fecha == '7dias':
-            inicio = hoy - timedelta(days=7)
-            fichas_queryset = fichas_queryset.filter(fecha_registro__date__gte=inicio)
-        elif filtro_fecha == 'mes':
-            inicio = hoy - timedelta(days=30)
-            fichas_queryset = fichas_queryset.filter(fecha_registro__date__gte=inicio)
+    fichas_queryset = filtrar_por_fecha(fichas_queryset, leer_rango(request.GET))
 
     # Ordenamos por fecha descendente
     fichas_queryset = fichas_queryset.order_by('-fecha_registro')
 
-    # ======================================================
-    # 3. CREACIÓN DEL ARCHIVO EXCEL
-    # ======================================================
-    
-    # Crear libro y hoja
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Reporte de Fichas"
-
-    # Definir Cabeceras
-    headers = [
-        "Fecha Registro",
-        "Encuestador",
-        "Evaluado (Estudiante)",
-        "DNI",
-        "Edad",
-        "Institución",
-        "Puntaje Total",
-        "Nivel de Riesgo"
-    ]
-
-    # Escribir Cabeceras y Estilizar
-    ws.append(headers)
-    
-    header_font = Font(bold=True, color="FFFFFF")
-    header_fill = PatternFill(start_color="2563EB", end_color="2563EB", fill_type="solid") # Azul tipo Tailwind
-
-    for cell in ws[1]: # Primera fila
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal="center")
-
-    # Escribir Datos
-    for ficha in fichas_queryset:
-        # Formatear fecha para que no salga con microsegundos
-        fecha_str = ficha.fecha_registro.strftime('%d/%m/%Y %H:%M') if ficha.fecha_registro else '-'
-        
-        # Concatenar nombres
-        nombre_completo = f"{ficha.nombres_evaluado} {ficha.apellidos_evaluado}"
-        encuestador_nombre = f"{ficha.usuario_registra.nombres} {ficha.usuario_registra.apellidos}" if ficha.usuario_registra else "Desconocido"
-        colegio = ficha.institucion.nombre if ficha.institucion else "Sin Institución"
-
-        row = [
-            fecha_str,              # Col A
-            encuestador_nombre,     # Col B
-            nombre_completo,        # Col C
-            ficha.dni_evaluado,     # Col D
-            ficha.edad_evaluado,    # Col E
-            colegio,                # Col F
-            ficha.puntaje_total,    # Col G
-            ficha.nivel_riesgo      # Col H
-        ]
-        ws.append(row)
-
-    # Ajustar ancho de columnas automáticamente (Opcional pero recomendado)
-    column_widths = [20, 30, 35, 15, 10, 30, 15, 20]
-    for i, width in enumerate(column_widths, 1):
-        ws.column_dimensions[openpyxl.utils.get_column_letter(i)].width = width
+    # Las exportaciones grandes se encolan para el worker en lugar de generarse aquí
+    if exportacion_grande(fichas_queryset):
+        return encolar_exportacion(request)
 
     # ======================================================
-    # 4. RESPUESTA HTTP (Descarga)
+    # 3. EXCEL EN STREAMING (write-only + lotes por cursor, memoria plana)
     # ======================================================
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    filename = f"Reporte_Riesgo_Social_{timezone.now().strftime('%Y%m%d_%H%M')}.xlsx"
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    
-    wb.save(response)
-    return response
+    filename = f"Reporte_Riesgo_Social_{timezone.localtime().strftime('%Y%m%d_%H%M')}.xlsx"
+    return respuesta_xlsx(REPORTE_SUPERVISOR, fichas_queryset, filename)
 
 # Redireccionamiento 
 
@@ -9,6 +9,15 @@ https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 
 import os
 
+# --- PARCHE DE COMPATIBILIDAD (igual que wsgi.py) ---
+try:
+    import pymysql
+    pymysql.install_as_MySQLdb()
+    import MySQLdb
+    MySQLdb.version_info = (2, 2, 1, "final", 0)
+except ImportError:
+    pass
+
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'encuesta.settings')
@@ -11,10 +11,13 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
 
+from importlib.util import find_spec
 from pathlib import Path
 import os
 import environ
 
+from django.core.exceptions import ImproperlyConfigured
+
 
 env = environ.Env()
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -111,6 +114,49 @@ DATABASES = {
     
 }
 
+# Manejo de conexiones (ver 'python manage.py medir_conexiones')
+# DB_CONN_MAX_AGE: segundos que un worker reutiliza su conexión entre requests
+# (0 = abrir y cerrar una por request, el comportamiento anterior)
+DATABASES['default']['CONN_MAX_AGE'] = env.int('DB_CONN_MAX_AGE', default=60)
+# Antes de reutilizar una conexión persistente se verifica que siga viva (reinicios del servidor de BD)
+DATABASES['default']['CONN_HEALTH_CHECKS'] = env.bool('DB_CONN_HEALTH_CHECKS', default=True)
+
+if DATABASES['default']['ENGINE'] in ('django.db.backends.mysql', 'django.db.backends.postgresql'):
+    # Segundos para abrir la conexión antes de fallar (evita workers colgados si la BD no responde)
+    DATABASES['default']['OPTIONS'] = {'connect_timeout': env.int('DB_CONNECT_TIMEOUT', default=10)}
+
+# Pool nativo de Django 5.1+: solo PostgreSQL con psycopg 3 ('psycopg[pool]' en requirements.txt).
+# Con el pool activo las conexiones las administra el pool y CONN_MAX_AGE debe ser 0.
+if DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql' and env.bool('DB_POOL', default=False):
+    if not (find_spec('psycopg') and find_spec('psycopg_pool')):
+        # Sin esto Django recién falla en la primera conexión, con un error menos claro
+        raise ImproperlyConfigured(
+            "DB_POOL=True necesita psycopg 3 con su pool: pip install 'psycopg[binary,pool]' "
+            "(psycopg2 no lo soporta) o use DB_POOL=False."
+        )
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': env.int('DB_POOL_MIN', default=2),
+        'max_size': env.int('DB_POOL_MAX', default=10),
+        'timeout': env.int('DB_POOL_TIMEOUT', default=10),
+    }
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+
+# Vistas async (apps/fichas/asincrono.py): hilos que ejecutan a la vez las consultas
+# independientes de una página. Cada hilo guarda su propia conexión, así que cada
+# proceso abre hasta DB_CONSULTAS_PARALELAS conexiones además de las de sus hilos de
+# request (presupuesto total en gunicorn.conf.py). Las páginas async hacen 3-4 consultas.
+DB_CONSULTAS_PARALELAS = env.int('DB_CONSULTAS_PARALELAS', default=3)
+
+# Cache (apps/fichas/cache_tableros.py). CACHE_URL elige el backend:
+#   locmemcache://            en memoria, por proceso (desarrollo / un solo worker)
+#   filecache:///ruta/carpeta compartido entre los workers de un mismo servidor
+#   redis://host:6379/1       compartido entre servidores (requiere el paquete 'redis')
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://encuesta'),
+}
+# Vida máxima de un tablero en cache; los signals lo invalidan antes si cambian los datos
+CACHE_TABLEROS_SEGUNDOS = env.int('CACHE_TABLEROS_SEGUNDOS', default=300)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -157,6 +203,15 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Exportaciones en segundo plano (apps/fichas/trabajos.py)
+# Un pedido idéntico dentro de esta ventana reutiliza el archivo ya generado
+EXPORTACION_REUTILIZAR_MINUTOS = env.int('EXPORTACION_REUTILIZAR_MINUTOS', default=15)
+# Días que se conservan los archivos generados antes de purgarlos
+EXPORTACION_RETENCION_DIAS = env.int('EXPORTACION_RETENCION_DIAS', default=7)
+# Fichas que los botones "Exportar Excel" generan dentro del request; más que esto se
+# encola para el worker (un export largo en línea bloquearía al worker de gunicorn)
+EXPORTACION_INLINE_MAXIMO = env.int('EXPORTACION_INLINE_MAXIMO', default=5000)
+
 
 AUTH_USER_MODEL = 'usuarios.Usuario'
 
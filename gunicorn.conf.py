@@ -0,0 +1,72 @@
+"""
+Configuración de Gunicorn (se carga sola al ejecutar 'gunicorn' desde /app).
+
+Modo de servicio según GUNICORN_WORKER_CLASS:
+  - sync:    un request a la vez por proceso (encuesta.wsgi). Workers = 2 x CPU + 1.
+  - gthread: varios hilos por proceso (encuesta.wsgi); un export o dashboard lento
+             ya no bloquea a los demás. Workers = CPU + 1, GUNICORN_THREADS hilos c/u.
+  - uvicorn: workers de uvicorn sobre encuesta.asgi; las vistas async (APIs de
+             ubigeo, estado/descarga de exportaciones) no ocupan un hilo mientras esperan.
+             Workers = CPU + 1.
+
+GUNICORN_WORKERS / GUNICORN_THREADS sobrescriben los valores calculados.
+
+Conexiones a la BD: cada hilo que atiende requests guarda su conexión persistente
+(CONN_MAX_AGE) y el pool de consultas en paralelo de las vistas async
+(apps/fichas/asincrono.py) suma DB_CONSULTAS_PARALELAS por proceso. En total:
+
+    workers x (hilos + DB_CONSULTAS_PARALELAS) + 1 del worker de exportaciones
+
+con hilos = GUNICORN_THREADS en gthread y 1 en sync/uvicorn. Ese total (más los
+clientes administrativos) debe quedar por debajo de max_connections de MySQL
+(151 por defecto): con 8 CPU en gthread son 9 x (4 + 3) + 1 = 64. Al arrancar se
+escribe el presupuesto en el log; si no alcanza, baje GUNICORN_WORKERS o
+DB_CONSULTAS_PARALELAS, o suba max_connections.
+Para comparar los modos: 'python manage.py prueba_carga --modos sync,gthread,uvicorn'.
+"""
+import multiprocessing
+import os
+
+CLASES_WORKER = {
+    'sync': 'sync',
+    'gthread': 'gthread',
+    'uvicorn': 'uvicorn_worker.UvicornWorker',
+}
+
+modo = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+if modo not in CLASES_WORKER:
+    raise RuntimeError(f"GUNICORN_WORKER_CLASS inválido: '{modo}' (opciones: {', '.join(CLASES_WORKER)})")
+
+cpus = multiprocessing.cpu_count()
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+worker_class = CLASES_WORKER[modo]
+wsgi_app = 'encuesta.asgi:application' if modo == 'uvicorn' else 'encuesta.wsgi:application'
+
+workers = int(os.environ.get('GUNICORN_WORKERS') or (2 * cpus + 1 if modo == 'sync' else cpus + 1))
+if modo == 'gthread':
+    threads = int(os.environ.get('GUNICORN_THREADS') or 4)
+
+# Mismo valor por defecto que settings.DB_CONSULTAS_PARALELAS
+consultas_paralelas = int(os.environ.get('DB_CONSULTAS_PARALELAS') or 3)
+conexiones_bd = workers * ((threads if modo == 'gthread' else 1) + consultas_paralelas) + 1
+
+# Los exports pesados van al worker de segundo plano; un request que tarda más es un cuelgue
+timeout = int(os.environ.get('GUNICORN_TIMEOUT') or 60)
+graceful_timeout = 30
+keepalive = 5
+
+# Reciclar procesos de a poco evita que la memoria crezca sin límite
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS') or 1000)
+max_requests_jitter = 100
+
+accesslog = '-'
+errorlog = '-'
+
+
+def on_starting(server):
+    server.log.info(
+        'Conexiones a la BD hasta %s: %s workers x (%s hilos + %s consultas en paralelo) + 1 del worker de '
+        'exportaciones; deben caber en max_connections',
+        conexiones_bd, workers, threads if modo == 'gthread' else 1, consultas_paralelas,
+    )